@@ -1,20 +1,107 @@
 # app/api/main.py
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field
+from typing import AsyncGenerator, Dict, List, Optional
+from contextlib import asynccontextmanager
 import asyncio
-import json
-from typing import AsyncGenerator
-from datetime import datetime
-from app.core.agent import IdeaHistoryAgent
+import sqlite3
+import time
+from app.core.agent import IdeaHistoryAgent, LLM_PURPOSES, parse_model_routes
+from app.core.graph_stream import InlineSourceEvents
+from app.core.jobs import JOB_COMPLETE, JobManager, JobQueueFull, ResearchJob
+from app.core.result_store import GraphResultStore
+from app.models.base import IdeaGraph, inline_sources
 from app.services.search.search_manager import SearchManager
 from app.services.search.google_search import GoogleSearchClient
 from app.services.search.wiki_client import WikipediaClient
+from app.services.search.local_wiki import LocalWikipediaClient
+from app.services.search.cache import SearchCache
 from app.services.llm.claude_client import ClaudeChatClient
 from app.services.llm.openai_client import OpenAIChatClient
+from app.services.llm.cache import LLMCache, CachedChatClient
+from app.config.settings import settings
+from app.utils.metrics import registry, CACHE_ENTRIES, CACHE_EVENTS
+from app.utils.serialization import dumps, loads
+
+def create_wiki_client():
+    """The Wikipedia client selected by WIKI_SEARCH_BACKEND"""
+    backend = settings.WIKI_SEARCH_BACKEND
+    if backend in ("local", "local_first"):
+        try:
+            fallback = WikipediaClient() if backend == "local_first" else None
+            return LocalWikipediaClient(settings.WIKI_LOCAL_INDEX_PATH, fallback=fallback)
+        except (FileNotFoundError, sqlite3.Error) as e:
+            print(f"Local Wikipedia index unavailable, using the API: {str(e)}")
+    return WikipediaClient()
+
+def create_chat_client(model: str):
+    """A chat client for `model`: Anthropic for claude-* models, else OpenAI"""
+    if model.startswith("claude"):
+        return ClaudeChatClient(model=model)
+    return OpenAIChatClient(model=model)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Shared across requests so repeated concepts and follow-up queries hit the cache
+    search_cache = SearchCache.from_settings() if settings.SEARCH_CACHE_ENABLED else None
+
+    # One search manager (and its pooled HTTP sessions) for the app's lifetime
+    search_manager = SearchManager(
+        google_client=GoogleSearchClient(),
+        wiki_client=create_wiki_client(),
+        cache=search_cache,
+    )
+    await search_manager.start()
+    app.state.search_manager = search_manager
+    app.state.search_cache = search_cache
+    app.state.llm_cache = LLMCache.from_settings() if settings.LLM_CACHE_ENABLED else None
+    # One chat client (and HTTP connection pool) per model, shared by every job.
+    # Swappable so benchmarks and tests can run against local stand-ins
+    parse_model_routes(settings.MODEL_ROUTES)  # Fail at startup on a bad spec
+    chat_clients = {}
+
+    def chat_client_factory(model: Optional[str] = None):
+        model = model or settings.RESEARCH_MODEL
+        if model not in chat_clients:
+            chat_clients[model] = create_chat_client(model)
+        return chat_clients[model]
+
+    app.state.chat_client_factory = chat_client_factory
+    app.state.result_store = (
+        GraphResultStore.from_settings() if settings.RESULT_STORE_ENABLED else None
+    )
+    # Research runs outlive the request that started them
+    app.state.job_manager = JobManager(
+        run_research_job,
+        retention=settings.JOB_RETENTION_SECONDS,
+        max_running=settings.MAX_CONCURRENT_JOBS,
+        max_queued=settings.MAX_QUEUED_JOBS,
+    )
+    try:
+        yield
+    finally:
+        await app.state.job_manager.close()
+        await search_manager.close()
+        if search_cache is not None:
+            search_cache.close()
+        if app.state.llm_cache is not None:
+            app.state.llm_cache.close()
+        if app.state.result_store is not None:
+            app.state.result_store.close()
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+@app.exception_handler(RequestValidationError)
+async def request_validation_error(request, exc: RequestValidationError):
+    # Out-of-range or malformed fields are the caller's error, like the others
+    return JSONResponse(status_code=400, content={"detail": jsonable_encoder(exc.errors())})
 
-app = FastAPI()
 
 # Add CORS middleware
 app.add_middleware(
@@ -28,88 +115,410 @@ app.add_middleware(
 class ResearchRequest(BaseModel):
     concept: str
     stream: bool = True
+    # Send graph patches between periodic snapshots instead of the full graph
+    delta: bool = False
+    # Overlap edge extraction and the sufficiency check with the next search
+    pipelined: bool = settings.RESEARCH_PIPELINED
+    # Number of diverse queries searched concurrently per round
+    queries_per_round: int = Field(settings.QUERIES_PER_ROUND, ge=1, le=settings.MAX_QUERIES_PER_ROUND)
+    # Ignore any stored graph and research the concept again
+    refresh: bool = False
+    # Copy sources into every node and edge (the format before the source
+    # table) for non-streaming responses; streams take ?inline_sources=true
+    inline_sources: bool = False
+    # Per-purpose models for this run, over MODEL_ROUTES, e.g. {"judge": "gpt-4o-mini"}
+    models: Dict[str, str] = {}
 
-class CustomJSONEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, datetime):
-            return obj.isoformat()
-        return super().default(obj)
+class BatchResearchRequest(BaseModel):
+    concepts: List[str]
+    # Concepts of this batch researched at once
+    concurrency: int = Field(settings.BATCH_CONCURRENCY, ge=1, le=settings.BATCH_MAX_CONCURRENCY)
+    pipelined: bool = settings.RESEARCH_PIPELINED
+    queries_per_round: int = Field(settings.QUERIES_PER_ROUND, ge=1, le=settings.MAX_QUERIES_PER_ROUND)
+    refresh: bool = False
+    inline_sources: bool = False
+    models: Dict[str, str] = {}
 
-async def event_generator(queue: asyncio.Queue) -> AsyncGenerator[str, None]:
-    while True:
+def _allowed_models() -> set:
+    configured = parse_model_routes(settings.MODEL_ROUTES).values()
+    extra = (model.strip() for model in settings.ALLOWED_MODELS.split(","))
+    return {settings.RESEARCH_MODEL, *configured, *filter(None, extra)}
+
+
+def _model_routes(models: Dict[str, str]) -> Dict[str, str]:
+    """MODEL_ROUTES with a request's per-purpose overrides applied"""
+    unknown = set(models) - set(LLM_PURPOSES)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown LLM call purposes: {sorted(unknown)}; expected {list(LLM_PURPOSES)}",
+        )
+    # Each model gets a long-lived client, so only configured ones are accepted
+    allowed = _allowed_models()
+    disallowed = set(models.values()) - allowed
+    if disallowed:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Models not allowed: {sorted(disallowed)}; allowed {sorted(allowed)}",
+        )
+    routes = {**parse_model_routes(settings.MODEL_ROUTES), **models}
+    # Routes to the default model are no routes; keeps keys of unrouted runs stable
+    return {
+        purpose: model
+        for purpose, model in sorted(routes.items())
+        if model and model != settings.RESEARCH_MODEL
+    }
+
+
+def _job_options(request: ResearchRequest) -> dict:
+    """Request fields that change the run (or its event format); part of the
+    single-flight key"""
+    options = {
+        "delta": request.delta,
+        "pipelined": request.pipelined,
+        "queries_per_round": request.queries_per_round,
+    }
+    routes = _model_routes(request.models)
+    if routes:
+        options["models"] = routes
+    return options
+
+
+def _result_config(routes: Optional[Dict[str, str]] = None) -> dict:
+    """Settings that shape a finished graph; part of the result store key"""
+    config = {
+        "min_nodes": settings.RESEARCH_MIN_NODES,
+        "max_nodes": settings.RESEARCH_MAX_NODES,
+        "model": settings.RESEARCH_MODEL,
+    }
+    if routes:
+        config["routes"] = routes
+    return config
+
+
+def _create_chat_client(model: Optional[str] = None):
+    # Factories that take no model (local stand-ins) only serve unrouted runs
+    chat_client = (
+        app.state.chat_client_factory(model) if model else app.state.chat_client_factory()
+    )
+    if app.state.llm_cache is not None:
+        chat_client = CachedChatClient(chat_client, app.state.llm_cache)
+    return chat_client
+
+
+async def run_research_job(job: ResearchJob):
+    routes = job.options.get("models", {})
+    agent = IdeaHistoryAgent(
+        chat_client=_create_chat_client(),
+        routes={purpose: _create_chat_client(model) for purpose, model in routes.items()},
+        search_manager=app.state.search_manager,
+        min_nodes=settings.RESEARCH_MIN_NODES,
+        max_nodes=settings.RESEARCH_MAX_NODES,
+        on_update=job.append,
+        stream_mode="delta" if job.options.get("delta") else "full",
+        checkpoint_interval=settings.STREAM_CHECKPOINT_INTERVAL,
+        pipelined=job.options.get("pipelined", settings.RESEARCH_PIPELINED),
+        record_timings=settings.RECORD_TIMINGS,
+        queries_per_round=job.options.get(
+            "queries_per_round", settings.QUERIES_PER_ROUND
+        ),
+        search_concurrency=settings.SEARCH_CONCURRENCY,
+        summary_token_budget=settings.SUMMARY_TOKEN_BUDGET,
+        stream_tool_calls=settings.STREAM_TOOL_CALLS,
+        dedup_sources=settings.SOURCE_DEDUP_ENABLED,
+        max_duplicate_rounds=settings.MAX_DUPLICATE_ROUNDS,
+    )
+    try:
+        graph = await agent.research_concept(job.concept)
+    finally:
+        job.usage = agent.usage_totals()
+        job.routes = agent.route_stats()
+    # The agent reports failures as an error event and an empty graph
+    if not graph.nodes:
+        return None
+
+    result = graph.model_dump(mode="json")
+    if app.state.result_store is not None:
+        app.state.result_store.put(job.concept, _result_config(routes), result)
+    return result
+
+
+async def job_event_stream(
+    job: ResearchJob, last_event_id: int, inline: bool = False
+) -> AsyncGenerator[str, None]:
+    # Events are stored encoded; only the legacy format needs a re-encode
+    converter = InlineSourceEvents() if inline else None
+    async for event_id, data in job.read(last_event_id):
+        if converter is not None:
+            data = dumps(converter.convert(loads(data))).decode("utf-8")
+        yield f"id: {event_id}\ndata: {data}\n\n"
+
+
+def _get_job(job_id: str) -> ResearchJob:
+    job = app.state.job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job")
+    return job
+
+
+def _refresh_stale(concept: str, options: dict, stored):
+    if stored.stale:
+        # Single-flight: concurrent stale hits share one refresh job. Nobody
+        # reads a refresh's events, so the event format is not part of its key
         try:
-            data = await queue.get()
-            if data is None and queue.empty():  # Signal to stop streaming
-                break
-            # Use the custom encoder
-            yield f"data: {json.dumps(data, cls=CustomJSONEncoder)}\n\n"
-        except Exception as e:
-            yield f"data: {json.dumps({'type': 'error', 'data': str(e)})}\n\n"
-            break
+            app.state.job_manager.submit(concept, {**options, "delta": True})
+        except JobQueueFull:
+            pass  # The stored graph is still served; refresh on a later hit
+
+
+def _serve_stored(request: ResearchRequest, stored):
+    """Answer from the result store, refreshing stale graphs in the background"""
+    options = _job_options(request)
+    _refresh_stale(request.concept, options, stored)
+
+    headers = {"X-Result-Age": str(int(stored.age)), "X-Result-Stale": str(stored.stale).lower()}
+    if not request.stream:
+        if request.inline_sources:
+            return Response(
+                dumps(inline_sources(stored.to_dict())),
+                media_type="application/json",
+                headers=headers,
+            )
+        # Already JSON; no need to parse and re-encode
+        return Response(stored.data, media_type="application/json", headers=headers)
+
+    graph = stored.to_dict()
+    job = app.state.job_manager.replay(
+        request.concept,
+        options,
+        [{
+            "type": "complete",
+            "data": {
+                "nodes": len(graph["nodes"]),
+                "edges": len(graph["edges"]),
+                "cached": True,
+                "stale": stored.stale,
+                "stored_at": stored.stored_at,
+            },
+            "seq": 1,
+            "graph": graph,
+        }],
+        result=graph,
+    )
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "attached": False,
+        "cached": True,
+        "stale": stored.stale,
+        "events_url": f"/research/{job.id}/events",
+    }
 
 
 @app.post("/research")
 async def research_concept(request: ResearchRequest):
-    chat_client = OpenAIChatClient(model='gpt-4o-mini')
-    search_manager = SearchManager(
-        google_client=GoogleSearchClient(),
-        wiki_client=WikipediaClient(),
-    )
+    store = app.state.result_store
+    if store is not None and not request.refresh:
+        stored = store.get(request.concept, _result_config(_model_routes(request.models)))
+        if stored is not None:
+            return _serve_stored(request, stored)
+
+    try:
+        job, started = app.state.job_manager.submit(request.concept, _job_options(request))
+    except JobQueueFull as e:
+        raise HTTPException(
+            status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)}
+        )
 
     if not request.stream:
-        # Non-streaming response
+        # Non-streaming response: wait for the (possibly shared) run
+        await job.wait()
+        if job.result is None:
+            graph = IdeaGraph(concept=request.concept, nodes=[], edges=[]).model_dump()
+        else:
+            graph = job.result
+        return inline_sources(graph) if request.inline_sources else graph
+
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "attached": not started,
+        "events_url": f"/research/{job.id}/events",
+    }
+
+
+async def _submit_when_queued(concept: str, options: dict) -> ResearchJob:
+    """Submit a job, waiting for room in the queue instead of failing"""
+    while True:
         try:
-            agent = IdeaHistoryAgent(
-                chat_client=chat_client,
-                search_manager=search_manager,
-                min_nodes=3,
-                max_nodes=5,
-            )
-            graph = await agent.research_concept(request.concept)
-            return graph.model_dump()
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=str(e))
-    
-    # Streaming response
-    queue = asyncio.Queue()
-    
-    # Put initial message in queue
-    await queue.put({
-        "type": "start",
-        "data": {"message": "Starting research..."}
-    })
-    
-    def update_handler(data: dict):
-        asyncio.create_task(queue.put(data))
-    
-    async def run_research():
+            job, _ = app.state.job_manager.submit(concept, options)
+            return job
+        except JobQueueFull as e:
+            await asyncio.sleep(min(e.retry_after, 5))
+
+
+async def _research_batch_concept(
+    concept: str, request: BatchResearchRequest, semaphore: asyncio.Semaphore
+) -> dict:
+    """One NDJSON result line of a batch; failures are reported, not raised"""
+    # Nobody reads a batch job's events, so use the cheap patch encoding
+    options = {
+        "delta": True,
+        "pipelined": request.pipelined,
+        "queries_per_round": request.queries_per_round,
+    }
+    routes = _model_routes(request.models)
+    if routes:
+        options["models"] = routes
+    line = {"type": "result", "concept": concept, "cached": False, "usage": {}}
+    async with semaphore:
+        started = time.perf_counter()
         try:
-            agent = IdeaHistoryAgent(
-                chat_client=chat_client,
-                search_manager=search_manager,
-                min_nodes=3,
-                max_nodes=5,
-                on_update=update_handler
-            )
-            
-            await agent.research_concept(request.concept)
-            await queue.put(None)  # Signal completion
+            store = app.state.result_store
+            stored = None
+            if store is not None and not request.refresh:
+                stored = store.get(concept, _result_config(routes))
+            if stored is not None:
+                _refresh_stale(concept, options, stored)
+                line.update(status=JOB_COMPLETE, cached=True, graph=stored.to_dict())
+            else:
+                job = await _submit_when_queued(concept, options)
+                await job.wait()
+                line.update(status=job.status, usage=job.usage)
+                if job.result is not None:
+                    line["graph"] = job.result
+                else:
+                    line["error"] = job.error
         except Exception as e:
-            await queue.put({
-                "type": "error",
-                "data": str(e)
-            })
-            await queue.put(None)
-    
-    # Start the research process
-    asyncio.create_task(run_research())
-    
+            print(f"Batch research for {concept!r} failed: {str(e)}")
+            line.update(status="error", error=str(e))
+        line["seconds"] = round(time.perf_counter() - started, 3)
+
+    if request.inline_sources and "graph" in line:
+        line["graph"] = inline_sources(line["graph"])
+    return line
+
+
+def _batch_summary(lines: List[dict], seconds: float) -> dict:
+    latencies = sorted(line["seconds"] for line in lines)
+    failures = [line for line in lines if line["status"] != JOB_COMPLETE]
+    return {
+        "type": "summary",
+        "concepts": len(lines),
+        "completed": len(lines) - len(failures),
+        "failed": len(failures),
+        "cached": sum(line["cached"] for line in lines),
+        "seconds": round(seconds, 3),
+        "latency": {
+            "mean": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+            "p50": latencies[len(latencies) // 2] if latencies else 0.0,
+            "max": latencies[-1] if latencies else 0.0,
+        },
+        "usage": {
+            key: sum(line["usage"].get(key, 0) for line in lines)
+            for key in ("calls", "prompt_tokens", "completion_tokens")
+        },
+        "failures": [
+            {"concept": line["concept"], "error": line.get("error")} for line in failures
+        ],
+    }
+
+
+async def batch_result_stream(request: BatchResearchRequest) -> AsyncGenerator[bytes, None]:
+    semaphore = asyncio.Semaphore(request.concurrency)
+    started = time.perf_counter()
+    tasks = [
+        asyncio.create_task(_research_batch_concept(concept, request, semaphore))
+        for concept in request.concepts
+    ]
+    lines = []
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            line = await next_done
+            lines.append(line)
+            yield dumps(line) + b"\n"
+    finally:
+        # Client gone: stop waiting (started jobs still finish and get stored)
+        for task in tasks:
+            task.cancel()
+    yield dumps(_batch_summary(lines, time.perf_counter() - started)) + b"\n"
+
+
+@app.post("/research/batch")
+async def research_batch(request: BatchResearchRequest):
+    """Research many concepts, streaming each graph as an NDJSON line as it
+    finishes and a summary line last"""
+    if not request.concepts:
+        raise HTTPException(status_code=400, detail="No concepts given")
+    if len(request.concepts) > settings.BATCH_MAX_CONCEPTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.BATCH_MAX_CONCEPTS} concepts per batch",
+        )
+    _model_routes(request.models)  # Reject unknown purposes before streaming
     return StreamingResponse(
-        event_generator(queue),
+        batch_result_stream(request), media_type="application/x-ndjson"
+    )
+
+
+@app.get("/research/{job_id}")
+async def get_research_job(
+    job_id: str, inline: bool = Query(False, alias="inline_sources")
+):
+    job = _get_job(job_id)
+    result = job.result
+    if inline and result is not None:
+        result = inline_sources(result)
+    return {**job.to_dict(), "result": result}
+
+
+@app.get("/research/{job_id}/events")
+async def research_events(
+    job_id: str,
+    last_event_id: Optional[str] = Header(None),
+    after: int = 0,
+    inline: bool = Query(False, alias="inline_sources"),
+):
+    """SSE stream of a job's events; resumes after `Last-Event-ID` (or `after`)"""
+    job = _get_job(job_id)
+    try:
+        resume_from = int(last_event_id) if last_event_id else after
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid Last-Event-ID")
+
+    return StreamingResponse(
+        job_event_stream(job, resume_from, inline),
         media_type="text/event-stream"
     )
 
 @app.get("/")
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
\ No newline at end of file
+    return {"status": "healthy"}
+
+
+def _export_cache_stats(name: str, cache):
+    stats = cache.backend.stats
+    for event in ("hits", "misses", "expirations", "evictions"):
+        CACHE_EVENTS.set(getattr(stats, event), cache=name, event=event)
+    CACHE_ENTRIES.set(len(cache.backend), cache=name)
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus scrape endpoint"""
+    if getattr(app.state, "search_cache", None) is not None:
+        _export_cache_stats("search", app.state.search_cache)
+    if getattr(app.state, "llm_cache", None) is not None:
+        _export_cache_stats("llm", app.state.llm_cache)
+        CACHE_EVENTS.set(
+            app.state.llm_cache.tokens_saved, cache="llm", event="tokens_saved"
+        )
+    if getattr(app.state, "result_store", None) is not None:
+        stats = app.state.result_store.stats()
+        for event in ("hits", "stale_hits", "misses"):
+            CACHE_EVENTS.set(stats[event], cache="results", event=event)
+        CACHE_ENTRIES.set(stats["entries"], cache="results")
+    return PlainTextResponse(
+        registry.render(), media_type="text/plain; version=0.0.4"
+    )
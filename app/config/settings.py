@@ -11,10 +11,166 @@ class Settings:
     SEARCH_ENGINE_ID = os.getenv("SEARCH_ENGINE_ID", "")
 
     GOOGLE_BASE_URL = "https://www.googleapis.com/customsearch/v1"
+    WIKIPEDIA_API_URL = "https://en.wikipedia.org/w/api.php"
     USER_AGENT: str = "IdeaHistoryAgent/1.0"
 
     MAX_GOOGLE_RESULTS: int = 5
     MAX_WIKI_RESULTS: int = 3
+    WIKI_SEARCH_OVERFETCH: int = 2
+    # "api" (live MediaWiki API), "local" (FTS5 index built by
+    # app/services/search/local_wiki.py) or "local_first" (index, topped up
+    # from the API when it has too few results)
+    WIKI_SEARCH_BACKEND: str = os.getenv("WIKI_SEARCH_BACKEND", "api")
+    WIKI_LOCAL_INDEX_PATH: str = os.getenv("WIKI_LOCAL_INDEX_PATH", ".cache/wikipedia.sqlite3")
     MAX_SNIPPET_LENGTH: int = 200
 
+    # Pooled HTTP sessions used by the search clients
+    HTTP_POOL_LIMIT: int = int(os.getenv("HTTP_POOL_LIMIT", "100"))
+    HTTP_POOL_LIMIT_PER_HOST: int = int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", "20"))
+    HTTP_KEEPALIVE_TIMEOUT: float = float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", "60"))
+    HTTP_DNS_CACHE_TTL: int = int(os.getenv("HTTP_DNS_CACHE_TTL", "300"))
+    HTTP_TIMEOUT: float = float(os.getenv("HTTP_TIMEOUT", "20"))
+
+    # Search result cache (memory LRU in front of an optional SQLite tier)
+    SEARCH_CACHE_ENABLED: bool = os.getenv("SEARCH_CACHE_ENABLED", "true").lower() == "true"
+    SEARCH_CACHE_PATH: str = os.getenv("SEARCH_CACHE_PATH", ".cache/search.sqlite3")
+    SEARCH_CACHE_MEMORY_ENTRIES: int = int(os.getenv("SEARCH_CACHE_MEMORY_ENTRIES", "512"))
+    SEARCH_CACHE_DISK_ENTRIES: int = int(os.getenv("SEARCH_CACHE_DISK_ENTRIES", "50000"))
+    SEARCH_CACHE_TTL_GOOGLE: float = float(os.getenv("SEARCH_CACHE_TTL_GOOGLE", str(24 * 3600)))
+    SEARCH_CACHE_TTL_WIKIPEDIA: float = float(
+        os.getenv("SEARCH_CACHE_TTL_WIKIPEDIA", str(7 * 24 * 3600))
+    )
+
+    # LLM response cache ("memory" or "sqlite" backend). Off by default: replies
+    # are sampled, and a cache would silently replay earlier ones
+    LLM_CACHE_ENABLED: bool = os.getenv("LLM_CACHE_ENABLED", "false").lower() == "true"
+    LLM_CACHE_BACKEND: str = os.getenv("LLM_CACHE_BACKEND", "sqlite")
+    LLM_CACHE_PATH: str = os.getenv("LLM_CACHE_PATH", ".cache/llm.sqlite3")
+    LLM_CACHE_TTL: float = float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+    LLM_CACHE_MAX_ENTRIES: int = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000"))
+    LLM_CACHE_MAX_ENTRY_BYTES: int = int(os.getenv("LLM_CACHE_MAX_ENTRY_BYTES", "262144"))
+
+    # Delta streaming: send a full graph snapshot every N events
+    STREAM_CHECKPOINT_INTERVAL: int = int(os.getenv("STREAM_CHECKPOINT_INTERVAL", "10"))
+
+    # Research loop
+    RESEARCH_PIPELINED: bool = os.getenv("RESEARCH_PIPELINED", "false").lower() == "true"
+    RECORD_TIMINGS: bool = os.getenv("RECORD_TIMINGS", "false").lower() == "true"
+    QUERIES_PER_ROUND: int = int(os.getenv("QUERIES_PER_ROUND", "1"))
+    # Consecutive rounds of only already-seen sources before a run stops
+    # (four times as many while it has fewer than RESEARCH_MIN_NODES nodes)
+    MAX_DUPLICATE_ROUNDS: int = int(os.getenv("MAX_DUPLICATE_ROUNDS", "3"))
+    # Upper bound on queries_per_round a request may ask for
+    MAX_QUERIES_PER_ROUND: int = int(os.getenv("MAX_QUERIES_PER_ROUND", "5"))
+    SEARCH_CONCURRENCY: int = int(os.getenv("SEARCH_CONCURRENCY", "3"))
+    # Approximate token cap for the graph summary in prompts (0 = unlimited)
+    SUMMARY_TOKEN_BUDGET: int = int(os.getenv("SUMMARY_TOKEN_BUDGET", "0"))
+
+    # Research jobs: how long finished jobs (and their event logs) stay resumable
+    JOB_RETENTION_SECONDS: float = float(os.getenv("JOB_RETENTION_SECONDS", "600"))
+
+    # Bound on concurrently running research jobs; beyond that jobs queue, and
+    # past MAX_QUEUED_JOBS new ones are rejected with 429
+    MAX_CONCURRENT_JOBS: int = int(os.getenv("MAX_CONCURRENT_JOBS", "4"))
+    MAX_QUEUED_JOBS: int = int(os.getenv("MAX_QUEUED_JOBS", "16"))
+
+    # POST /research/batch: concepts per request, and the default number of a
+    # batch's concepts researched at once (still bounded by MAX_CONCURRENT_JOBS)
+    BATCH_MAX_CONCEPTS: int = int(os.getenv("BATCH_MAX_CONCEPTS", "100"))
+    BATCH_CONCURRENCY: int = int(os.getenv("BATCH_CONCURRENCY", "4"))
+    BATCH_MAX_CONCURRENCY: int = int(os.getenv("BATCH_MAX_CONCURRENCY", "16"))
+
+    # Per-provider limits shared by every client (0 = unlimited)
+    RATE_LIMIT_OPENAI_RPM: float = float(os.getenv("RATE_LIMIT_OPENAI_RPM", "500"))
+    RATE_LIMIT_OPENAI_TPM: float = float(os.getenv("RATE_LIMIT_OPENAI_TPM", "200000"))
+    RATE_LIMIT_OPENAI_CONCURRENCY: int = int(os.getenv("RATE_LIMIT_OPENAI_CONCURRENCY", "16"))
+    RATE_LIMIT_ANTHROPIC_RPM: float = float(os.getenv("RATE_LIMIT_ANTHROPIC_RPM", "50"))
+    RATE_LIMIT_ANTHROPIC_TPM: float = float(os.getenv("RATE_LIMIT_ANTHROPIC_TPM", "50000"))
+    RATE_LIMIT_ANTHROPIC_CONCURRENCY: int = int(os.getenv("RATE_LIMIT_ANTHROPIC_CONCURRENCY", "8"))
+    RATE_LIMIT_GOOGLE_RPM: float = float(os.getenv("RATE_LIMIT_GOOGLE_RPM", "100"))
+    RATE_LIMIT_GOOGLE_CONCURRENCY: int = int(os.getenv("RATE_LIMIT_GOOGLE_CONCURRENCY", "8"))
+    RATE_LIMIT_WIKIPEDIA_RPM: float = float(os.getenv("RATE_LIMIT_WIKIPEDIA_RPM", "200"))
+    RATE_LIMIT_WIKIPEDIA_CONCURRENCY: int = int(os.getenv("RATE_LIMIT_WIKIPEDIA_CONCURRENCY", "8"))
+
+    # Retries for transient provider errors: jittered exponential backoff that
+    # honors Retry-After, a timeout per attempt and an overall deadline per call
+    LLM_MAX_ATTEMPTS: int = int(os.getenv("LLM_MAX_ATTEMPTS", "4"))
+    LLM_BACKOFF_BASE: float = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+    LLM_BACKOFF_MAX: float = float(os.getenv("LLM_BACKOFF_MAX", "20"))
+    LLM_ATTEMPT_TIMEOUT: float = float(os.getenv("LLM_ATTEMPT_TIMEOUT", "60"))
+    LLM_CALL_DEADLINE: float = float(os.getenv("LLM_CALL_DEADLINE", "180"))
+    SEARCH_MAX_ATTEMPTS: int = int(os.getenv("SEARCH_MAX_ATTEMPTS", "3"))
+    SEARCH_BACKOFF_BASE: float = float(os.getenv("SEARCH_BACKOFF_BASE", "0.25"))
+    SEARCH_BACKOFF_MAX: float = float(os.getenv("SEARCH_BACKOFF_MAX", "5"))
+    # Search retries are owned by the search clients and fit in the call
+    # deadline, which is also the fan-out's budget per provider (see below)
+    SEARCH_ATTEMPT_TIMEOUT: float = float(os.getenv("SEARCH_ATTEMPT_TIMEOUT", "4"))
+    SEARCH_CALL_DEADLINE: float = float(os.getenv("SEARCH_CALL_DEADLINE", "8"))
+
+    # Search fan-out (app/services/search/search_manager.py): backstop deadline
+    # per provider call (0 = SEARCH_CALL_DEADLINE plus a second, so a client's
+    # own retries and deadline always run first; never set below the call
+    # deadline), and how many providers with results end the wait early
+    # (0 = wait for all), after a short grace period for the rest
+    SEARCH_PROVIDER_DEADLINE: float = float(os.getenv("SEARCH_PROVIDER_DEADLINE", "0"))
+    SEARCH_QUORUM: int = int(os.getenv("SEARCH_QUORUM", "0"))
+    SEARCH_QUORUM_GRACE: float = float(os.getenv("SEARCH_QUORUM_GRACE", "0.25"))
+    # Adaptive skipping/reduction from each provider's recent outcomes
+    SEARCH_STATS_WINDOW: int = int(os.getenv("SEARCH_STATS_WINDOW", "50"))
+    SEARCH_ADAPT_MIN_SAMPLES: int = int(os.getenv("SEARCH_ADAPT_MIN_SAMPLES", "5"))
+    SEARCH_SKIP_ERROR_RATE: float = float(os.getenv("SEARCH_SKIP_ERROR_RATE", "0.5"))
+    SEARCH_PROBE_INTERVAL: float = float(os.getenv("SEARCH_PROBE_INTERVAL", "30"))
+    SEARCH_SLOW_FRACTION: float = float(os.getenv("SEARCH_SLOW_FRACTION", "0.5"))
+
+    # Hedging for latency-critical LLM calls (next query, sufficiency check):
+    # send a duplicate once the first is slower than the recent p95
+    HEDGE_ENABLED: bool = os.getenv("HEDGE_ENABLED", "true").lower() == "true"
+    HEDGE_QUANTILE: float = float(os.getenv("HEDGE_QUANTILE", "0.95"))
+    HEDGE_MIN_SAMPLES: int = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+    # Delay used until enough samples exist (0 = don't hedge until then)
+    HEDGE_INITIAL_DELAY: float = float(os.getenv("HEDGE_INITIAL_DELAY", "0"))
+
+    # Parse node/edge tool calls from the provider stream so each node is added
+    # (and pushed to clients) as soon as its arguments close
+    STREAM_TOOL_CALLS: bool = os.getenv("STREAM_TOOL_CALLS", "true").lower() == "true"
+
+    # Node merging: nodes are pre-clustered locally and only candidate groups
+    # (as compact descriptors) go to the LLM, in batches of up to
+    # MERGE_BATCH_NODES nodes per call
+    MERGE_SIMILARITY_THRESHOLD: float = float(
+        os.getenv("MERGE_SIMILARITY_THRESHOLD", "0.45")
+    )
+    MERGE_YEAR_WINDOW: int = int(os.getenv("MERGE_YEAR_WINDOW", "100"))
+    MERGE_MAX_CLUSTER_SIZE: int = int(os.getenv("MERGE_MAX_CLUSTER_SIZE", "8"))
+    MERGE_BATCH_NODES: int = int(os.getenv("MERGE_BATCH_NODES", "40"))
+
+    # Sources already seen in a run (same canonical URL, or a snippet within
+    # this many SimHash bits of a known one) are not sent to the LLM again
+    SOURCE_DEDUP_ENABLED: bool = (
+        os.getenv("SOURCE_DEDUP_ENABLED", "true").lower() == "true"
+    )
+    SOURCE_SIMHASH_MAX_DISTANCE: int = int(
+        os.getenv("SOURCE_SIMHASH_MAX_DISTANCE", "3")
+    )
+
+    # Research configuration (also part of the stored-result key)
+    RESEARCH_MODEL: str = os.getenv("RESEARCH_MODEL", "gpt-4o-mini")
+    # Per-purpose models overriding RESEARCH_MODEL, as "purpose=model,..." with
+    # purposes nodes, edges, judge, query and merge, e.g.
+    # "judge=gpt-4o-mini,query=gpt-4o-mini,nodes=gpt-4o,merge=gpt-4o".
+    # claude-* models go to Anthropic
+    MODEL_ROUTES: str = os.getenv("MODEL_ROUTES", "")
+    # Further models requests may route to (comma-separated); RESEARCH_MODEL and
+    # the MODEL_ROUTES models are always allowed
+    ALLOWED_MODELS: str = os.getenv("ALLOWED_MODELS", "")
+    RESEARCH_MIN_NODES: int = int(os.getenv("RESEARCH_MIN_NODES", "3"))
+    RESEARCH_MAX_NODES: int = int(os.getenv("RESEARCH_MAX_NODES", "5"))
+
+    # Finished graphs: served directly while fresh, served and refreshed in the
+    # background once stale, ignored past the max age (0 = keep forever)
+    RESULT_STORE_ENABLED: bool = os.getenv("RESULT_STORE_ENABLED", "true").lower() == "true"
+    RESULT_STORE_PATH: str = os.getenv("RESULT_STORE_PATH", ".cache/results.sqlite3")
+    RESULT_FRESH_SECONDS: float = float(os.getenv("RESULT_FRESH_SECONDS", str(24 * 3600)))
+    RESULT_MAX_AGE_SECONDS: float = float(os.getenv("RESULT_MAX_AGE_SECONDS", str(30 * 24 * 3600)))
+
 settings = Settings()
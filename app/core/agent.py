@@ -1,7 +1,9 @@
 # app/core/agent.py
-from typing import List, Dict, Optional, Any, Callable
+from typing import List, Dict, Optional, Any, AsyncIterator, Callable
 import json
 from datetime import datetime
+import asyncio
+import time
 import uuid
 from app.services.search.search_manager import SearchManager
 from app.models.base import Source, Node, Edge, IdeaGraph
@@ -9,12 +11,51 @@ from app.services.llm.schemas import (
     CREATE_NODE_SCHEMA,
     CREATE_EDGE_SCHEMA,
     JUDGE_INFORMATION_SCHEMA,
-    MERGE_NODES_SCHEMA,
+    MERGE_NODE_GROUPS_SCHEMA,
     GENERATE_NEXT_QUERY_SCHEMA,
+    GENERATE_NEXT_QUERIES_SCHEMA,
 )
 from app.services.llm.base import BaseChatClient
-from app.models.responses import ChatCompletion
+from app.models.responses import ChatCompletion, FunctionCall
 from app.services.llm.prompts import *
+from app.core.clustering import NodeClusterer, batch_clusters, describe_node
+from app.core.graph_stream import GraphEventStream
+from app.core.source_registry import SourceRegistry
+from app.core.summary import GraphSummarizer
+from app.utils.metrics import (
+    LLM_REQUEST_SECONDS,
+    LLM_REQUESTS,
+    LLM_TOKENS,
+    RESEARCH_ACTIVE,
+    RESEARCH_LLM_CALLS_PER_RUN,
+    RESEARCH_RUN_SECONDS,
+    RESEARCH_RUNS,
+    STAGE_SECONDS,
+)
+from app.utils.resilience import get_latency_tracker, hedged
+from app.utils.serialization import snapshot
+from app.config.settings import settings
+
+# A run still short of min_nodes tries this many times more rounds whose
+# sources were all already seen before giving up
+DUPLICATE_ROUNDS_BELOW_MIN_FACTOR = 4
+
+# What each LLM call of a run is for; the keys of a model routing table
+LLM_PURPOSES = ("nodes", "edges", "judge", "query", "merge")
+
+
+def parse_model_routes(spec: str) -> Dict[str, str]:
+    """Parse a "purpose=model,purpose=model" routing spec, e.g. MODEL_ROUTES"""
+    routes = {}
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        purpose, sep, model = entry.partition("=")
+        purpose, model = purpose.strip(), model.strip()
+        if not sep or not model:
+            raise ValueError(f"Invalid model route: {entry!r}")
+        if purpose not in LLM_PURPOSES:
+            raise ValueError(f"Unknown LLM call purpose: {purpose!r}")
+        routes[purpose] = model
+    return routes
 
 
 class IdeaHistoryAgent:
@@ -26,19 +67,86 @@ class IdeaHistoryAgent:
         min_nodes: int = 3,
         max_nodes: int = 5,
         on_update: Optional[Callable[[Dict[str, Any]], None]] = None,
+        stream_mode: str = "full",
+        checkpoint_interval: int = 10,
+        pipelined: bool = False,
+        record_timings: bool = False,
+        queries_per_round: int = 1,
+        search_concurrency: int = 3,
+        summary_token_budget: Optional[int] = None,
+        stream_tool_calls: bool = True,
+        dedup_sources: bool = True,
+        source_registry: Optional[SourceRegistry] = None,
+        routes: Optional[Dict[str, BaseChatClient]] = None,
+        max_duplicate_rounds: int = 3,
     ):
         self.chat_client = chat_client
+        # Per-purpose clients (e.g. a small model for the judge and queries);
+        # purposes without a route use chat_client
+        self.routes = dict(routes or {})
+        unknown = set(self.routes) - set(LLM_PURPOSES)
+        if unknown:
+            raise ValueError(f"Unknown LLM call purposes: {sorted(unknown)}")
         self.search_manager = search_manager
         self.min_nodes = min_nodes
         self.max_nodes = max_nodes
         self.collected_sources: List[Source] = []
+        # Per-search provider reports, sent with the next sources_found event
+        self._search_reports: List[Dict[str, Any]] = []
         self.graph = IdeaGraph(concept="", nodes=[], edges=[])
         self.current_query = ""
         self.on_update = on_update
+        self.summarizer = GraphSummarizer(self.graph, token_budget=summary_token_budget)
+        self.pipelined = pipelined
+
+        # Number of queries planned and searched concurrently per round
+        self.queries_per_round = max(queries_per_round, 1)
+        self.search_concurrency = max(search_concurrency, 1)
+
+        # Parse node/edge calls from the provider stream and add each one as
+        # soon as its arguments close, instead of after the whole completion
+        self.stream_tool_calls = stream_tool_calls
+
+        # Drops sources already seen this run (or by a registry shared across
+        # runs) before they reach the LLM, see app/core/source_registry.py
+        if source_registry is None and dedup_sources:
+            source_registry = SourceRegistry(
+                max_distance=settings.SOURCE_SIMHASH_MAX_DISTANCE
+            )
+        self.source_registry = source_registry
+        # Consecutive rounds whose search results were all dropped as already
+        # seen; the run moves on to another query until this many
+        self.max_duplicate_rounds = max(max_duplicate_rounds, 1)
+        self.duplicate_rounds = 0
+
+        # Per-stage wall times for this run, attached to graph.metadata["timings"]
+        # when record_timings is set
+        self.record_timings = record_timings
+        self.timings: List[Dict[str, Any]] = []
+        # Per-purpose LLM call counts, latency and tokens for this run
+        self.llm_usage: Dict[str, Dict[str, float]] = {}
+        self.round = 0
+        # Speculative searches cancelled because the judge decided to stop
+        self.speculations_discarded = 0
+        self._run_started = time.perf_counter()
+
+        # "full" ships the whole graph with every event, "delta" ships patches
+        # between periodic snapshots (see app/core/graph_stream.py)
+        if stream_mode not in ("full", "delta"):
+            raise ValueError(f"Unknown stream mode: {stream_mode}")
+        self.stream_mode = stream_mode
+        self.event_stream = (
+            GraphEventStream(self.graph, checkpoint_interval)
+            if stream_mode == "delta"
+            else None
+        )
 
     async def research_concept(self, concept: str) -> IdeaGraph:
         """Main entry point for researching a concept's history"""
+        RESEARCH_ACTIVE.inc()
+        status = "error"
         try:
+            self._run_started = time.perf_counter()
             self.graph.concept = concept
             self._emit_update("start", {"concept": concept})
 
@@ -48,59 +156,32 @@ class IdeaHistoryAgent:
             self.current_query = concept
             self._emit_update("query", {"query": self.current_query})
 
-            initial_sources = await self._perform_search(self.current_query)
+            initial_sources = self._new_sources(
+                await self._timed("search", self._perform_search(self.current_query))
+            )
             if not initial_sources:
                 raise ValueError("No initial sources found")
-            self.collected_sources.extend(initial_sources)
 
-            self._emit_update(
-                "sources_found",
-                {"count": len(initial_sources), "query": self.current_query},
-            )
+            self._emit_update("sources_found", self._sources_found(initial_sources))
 
-            # Initialize the graph with first sources
-            await self._process_sources(initial_sources)
-            self._emit_update(
-                "graph_updated",
-                {"nodes": len(self.graph.nodes), "edges": len(self.graph.edges)},
-            )
-
-            while not await self._has_sufficient_information():
-                query = await self._generate_next_query()
-                if not query:
-                    raise ValueError("Failed to generate next query")
-
-                self.current_query = query
-                self._emit_update("query", {"query": query})
-
-                print(f"Searching for: {query}")
-                sources = await self._perform_search(query)
-                if sources:
-                    self.collected_sources.extend(sources)
-                    self._emit_update(
-                        "sources_found", {"count": len(sources), "query": query}
-                    )
-
-                    await self._process_sources(sources)
-                    self._emit_update(
-                        "graph_updated",
-                        {
-                            "nodes": len(self.graph.nodes),
-                            "edges": len(self.graph.edges),
-                        },
-                    )
-                else:
-                    print("No additional sources found")
-                    break
+            if self.pipelined:
+                await self._run_pipelined_rounds(initial_sources)
+            else:
+                await self._run_serial_rounds(initial_sources)
 
             # Finalize the graph
             print("Starting graph finalization...")
             print("Merging similar nodes")
-            await self._merge_similar_nodes()
+            await self._timed("merge", self._merge_similar_nodes())
             print("Merged similar nodes")
-            await self._validate_graph()
+            await self._timed("validate", self._validate_graph())
             print("Graph validated")
 
+            if self.record_timings:
+                self.graph.metadata["timings"] = self._timing_summary()
+            if self.source_registry is not None:
+                self.graph.metadata["source_dedup"] = self.source_registry.stats()
+
             print("Attempting to emit complete event...")
             self._emit_update(
                 "complete",
@@ -111,6 +192,7 @@ class IdeaHistoryAgent:
             if not self.graph.nodes:
                 raise ValueError("Failed to construct graph - no nodes created")
 
+            status = "ok"
             return self.graph
 
         except Exception as e:
@@ -119,136 +201,367 @@ class IdeaHistoryAgent:
             # Return empty graph rather than raising to avoid complete failure
             return IdeaGraph(concept=concept, nodes=[], edges=[])
 
-    def _emit_update(self, event_type: str, data: Dict[str, Any]):
-        if self.on_update:
-            # Convert to dict first to ensure all fields are serializable
-            graph_data = self.graph.model_dump()
-            self.on_update({"type": event_type, "data": data, "graph": graph_data})
+        finally:
+            RESEARCH_ACTIVE.dec()
+            RESEARCH_RUNS.inc(status=status)
+            RESEARCH_RUN_SECONDS.observe(time.perf_counter() - self._run_started)
+            RESEARCH_LLM_CALLS_PER_RUN.observe(
+                sum(usage["calls"] for usage in self.llm_usage.values())
+            )
 
-    async def _perform_search(self, query: str) -> List[Source]:
-        return await self.search_manager.search(query)
+    async def _run_serial_rounds(self, initial_sources: List[Source]):
+        """search -> nodes -> edges -> judge -> next query, one step at a time"""
+        # Initialize the graph with first sources
+        await self._timed("nodes", self._extract_nodes(initial_sources))
+        await self._timed("edges", self._extract_edges(initial_sources))
+        self._emit_update(
+            "graph_updated",
+            {"nodes": len(self.graph.nodes), "edges": len(self.graph.edges)},
+        )
 
-    async def _process_sources(self, sources: List[Source]):
-        """Extract information from the sources and update the graph"""
-        try:
-            graph_summary = self._format_graph_for_llm()
-
-            # Construct prompt with all source information
-            # Construct prompt with all source information
-            sources_text = "\n\n".join(
-                [
-                    f"Source: {source.title}\nURL: {source.url}\nContent: {source.snippet}"
-                    for source in sources
-                ]
+        while not await self._timed("judge", self._has_sufficient_information()):
+            self.round += 1
+            queries = await self._timed("query", self._generate_next_queries())
+            if not queries:
+                raise ValueError("Failed to generate next query")
+
+            self.current_query = " | ".join(queries)
+            self._emit_update(
+                "query", {"query": self.current_query, "queries": queries}
             )
 
-            node_prompt = PROCESS_SOURCES_PROMPT["nodes"].format(
-                concept=self.graph.concept,
-                graph_summary=graph_summary,
-                sources_text=sources_text,
+            print(f"Searching for: {self.current_query}")
+            found = await self._timed("search", self._perform_searches(queries))
+            sources = self._new_sources(found)
+            if sources:
+                self.duplicate_rounds = 0
+                self._emit_update("sources_found", self._sources_found(sources))
+
+                await self._timed("nodes", self._extract_nodes(sources))
+                await self._timed("edges", self._extract_edges(sources))
+                self._emit_update(
+                    "graph_updated",
+                    {
+                        "nodes": len(self.graph.nodes),
+                        "edges": len(self.graph.edges),
+                    },
+                )
+            elif not found or self._stop_after_duplicate_round():
+                print("No additional sources found")
+                break
+
+    async def _run_pipelined_rounds(self, sources: List[Source]):
+        """Overlap each round's edge extraction and sufficiency check with the
+        next round's query generation and search.
+
+        The next query is generated speculatively from the graph as it stands
+        right after node extraction. If the judge then decides to stop, the
+        speculative query/search is cancelled and discarded. The judge runs
+        alongside edge extraction, so the edge count in its prompt is the one
+        from before this round's edges; its decision rests on the nodes.
+        """
+        while True:
+            # Empty after a round of only already-seen sources: just plan again
+            if sources:
+                await self._timed("nodes", self._extract_nodes(sources))
+                self._emit_update(
+                    "graph_updated",
+                    {"nodes": len(self.graph.nodes), "edges": len(self.graph.edges)},
+                )
+
+            edges_task = asyncio.create_task(self._round_edges(sources))
+            judge_task = asyncio.create_task(
+                self._timed("judge", self._has_sufficient_information())
             )
+            speculative_task = asyncio.create_task(self._speculative_search())
 
-            # Call openai client
-            node_response = await self._call_llm(
-                messages=[{"role": "user", "content": node_prompt}],
-                functions=[CREATE_NODE_SCHEMA],
-                function_call="auto",
+            try:
+                sufficient = await judge_task
+                if sufficient:
+                    speculative_task.cancel()
+                    await asyncio.gather(speculative_task, return_exceptions=True)
+                    self.speculations_discarded += 1
+                    await edges_task
+                    self._emit_update(
+                        "graph_updated",
+                        {
+                            "nodes": len(self.graph.nodes),
+                            "edges": len(self.graph.edges),
+                        },
+                    )
+                    return
+
+                await edges_task
+                self._emit_update(
+                    "graph_updated",
+                    {"nodes": len(self.graph.nodes), "edges": len(self.graph.edges)},
+                )
+                queries, found = await speculative_task
+            except BaseException:
+                for task in (edges_task, judge_task, speculative_task):
+                    task.cancel()
+                raise
+
+            self.round += 1
+            if not queries:
+                raise ValueError("Failed to generate next query")
+
+            self.current_query = " | ".join(queries)
+            self._emit_update(
+                "query", {"query": self.current_query, "queries": queries}
             )
-            for choice in node_response.choices:  # Access as dictionary
-                if choice.message.function_call:
-                    try:
-                        if choice.message.function_call.name == "create_node":
-                            node_data = json.loads(
-                                choice.message.function_call.arguments
-                            )
-                            node = Node(**node_data, sources=sources)
-                            self.graph.nodes.append(node)
-                    except json.JSONDecodeError as e:
-                        print(f"Error parsing function arguments: {str(e)}")
-                        continue
-                    except ValueError as e:
-                        print(f"Error creating node: {str(e)}")
-                        continue
+            sources = self._new_sources(found)
+            if sources:
+                self.duplicate_rounds = 0
+                self._emit_update("sources_found", self._sources_found(sources))
+            elif not found or self._stop_after_duplicate_round():
+                print("No additional sources found")
+                return
 
-            graph_summary = self._format_graph_for_llm()
+    async def _round_edges(self, sources: List[Source]):
+        if sources:
+            await self._timed("edges", self._extract_edges(sources))
+
+    def _stop_after_duplicate_round(self) -> bool:
+        """Count a round whose results were all already seen; True once the run
+        should stop rather than try another query"""
+        self.duplicate_rounds += 1
+        limit = self.max_duplicate_rounds
+        if len(self.graph.nodes) < self.min_nodes:
+            limit *= DUPLICATE_ROUNDS_BELOW_MIN_FACTOR
+        if self.duplicate_rounds < limit:
+            print("Only already seen sources found, trying another query")
+            return False
+        return True
+
+    async def _speculative_search(self):
+        queries = await self._timed("query", self._generate_next_queries())
+        if not queries:
+            return queries, []
+        print(f"Searching for: {' | '.join(queries)}")
+        return queries, await self._timed("search", self._perform_searches(queries))
+
+    async def _timed(self, stage: str, coro):
+        """Await `coro`, recording its wall time under `stage`"""
+        start = time.perf_counter()
+        try:
+            return await coro
+        finally:
+            duration = time.perf_counter() - start
+            STAGE_SECONDS.observe(duration, stage=stage)
+            self._record_timing(stage, duration, start)
+
+    def _record_timing(
+        self, stage: str, duration: float, start: Optional[float] = None
+    ):
+        start = start if start is not None else time.perf_counter()
+        self.timings.append(
+            {
+                "stage": stage,
+                "round": self.round,
+                "start": round(start - self._run_started, 4),
+                "duration": round(duration, 4),
+            }
+        )
 
-            # TODO: maybe add extra info on what nodes are newly created, LLM should pay extra attention
-            edge_prompt = PROCESS_SOURCES_PROMPT["edges"].format(
-                concept=self.graph.concept,
-                graph_summary=graph_summary,
-                sources_text=sources_text,
+    def _timing_summary(self) -> Dict[str, Any]:
+        """Per-stage totals plus how much stage time overlapped wall time"""
+        wall_time = time.perf_counter() - self._run_started
+        stage_totals: Dict[str, float] = {}
+        for timing in self.timings:
+            stage_totals[timing["stage"]] = (
+                stage_totals.get(timing["stage"], 0.0) + timing["duration"]
             )
+        stage_time = sum(stage_totals.values())
+        return {
+            "mode": "pipelined" if self.pipelined else "serial",
+            "wall_time": round(wall_time, 4),
+            "stage_time": round(stage_time, 4),
+            "overlap_saved": round(max(stage_time - wall_time, 0.0), 4),
+            "stage_totals": {k: round(v, 4) for k, v in stage_totals.items()},
+            "llm": self.route_stats(),
+            "rounds": self.round + 1,
+            "speculations_discarded": self.speculations_discarded,
+            "stages": self.timings,
+        }
 
-            # Call openai client
-            edge_response = await self._call_llm(
-                messages=[{"role": "user", "content": edge_prompt}],
-                functions=[CREATE_EDGE_SCHEMA],
-                function_call="auto",
+    def _emit_update(self, event_type: str, data: Dict[str, Any]):
+        if self.on_update:
+            if self.event_stream is not None:
+                self.on_update(self.event_stream.next_event(event_type, data))
+                return
+            # Encoded now, straight from the models, as the graph keeps changing
+            self.on_update(
+                {"type": event_type, "data": data, "graph": snapshot(self.graph)}
             )
-            for choice in edge_response.choices:  # Access as dictionary
-                if choice.message.function_call:
-                    try:
-                        if choice.message.function_call.name == "create_edge":
-                            edge_data = json.loads(
-                                choice.message.function_call.arguments
-                            )
-                            if (
-                                edge_data["source_node_id"]
-                                != edge_data["target_node_id"]
-                            ):
-
-                                """
-                                for edge in edges:
-                                    source_node = self._get_node_by_id(edge.source_node_id)
-                                    target_node = self._get_node_by_id(edge.target_node_id)
-
-                                    if source_node and target_node:
-                                        if source_node.year <= target_node.year:
-                                            correct_edges.append(edge)
-                                        else:
-                                            # Swap source and target if chronologically backwards
-                                            swapped_edge = Edge(
-                                                source_node_id=edge.target_node_id,
-                                                target_node_id=edge.source_node_id,
-                                                change_description=edge.change_description,
-                                                weight=edge.weight,
-                                                sources=edge.sources
-                                            )
-                                            correct_edges.append(swapped_edge)
-                                """
-                                # Check if edge is chronologically correct
-                                source_node = self._get_node_by_id(
-                                    edge_data["source_node_id"]
-                                )
-                                target_node = self._get_node_by_id(
-                                    edge_data["target_node_id"]
-                                )
-                                if source_node and target_node:
-                                    if source_node.year <= target_node.year:
-                                        edge = Edge(**edge_data, sources=sources)
-                                        self.graph.edges.append(edge)
-                                    else:
-                                        # Swap source and target if chronologically backwards
-                                        swapped_edge = Edge(
-                                            source_node_id=edge_data["target_node_id"],
-                                            target_node_id=edge_data["source_node_id"],
-                                            change_description=edge_data[
-                                                "change_description"
-                                            ],
-                                            weight=edge_data["weight"],
-                                            sources=edge_data["sources"],
-                                        )
-                                        self.graph.edges.append(swapped_edge)
-                    except json.JSONDecodeError as e:
-                        print(f"Error parsing function arguments: {str(e)}")
-                        continue
-                    except ValueError as e:
-                        print(f"Error creating edge: {str(e)}")
-                        continue
 
-        except Exception as e:
-            print(f"Error processing sources: {str(e)}")
-            raise
+    def _emit_streamed_update(self):
+        # Batch mode reports once per stage; streaming reports every addition
+        if self.stream_tool_calls:
+            self._emit_update(
+                "graph_updated",
+                {"nodes": len(self.graph.nodes), "edges": len(self.graph.edges)},
+            )
+
+    def _new_sources(self, sources: List[Source]) -> List[Source]:
+        """Drop sources seen earlier in the run and collect the rest"""
+        if self.source_registry is not None:
+            found = len(sources)
+            sources = self.source_registry.filter(sources)
+            if len(sources) < found:
+                print(f"Dropped {found - len(sources)} already seen sources")
+        self.collected_sources.extend(sources)
+        return sources
+
+    def _sources_found(self, sources: List[Source]) -> Dict[str, Any]:
+        reports, self._search_reports = self._search_reports, []
+        return {"count": len(sources), "query": self.current_query, "search": reports}
+
+    async def _perform_search(self, query: str) -> List[Source]:
+        results = await self.search_manager.search(query)
+        # Which providers answered, timed out, were skipped or asked for less
+        report = getattr(results, "report", None)
+        if report:
+            self._search_reports.append({"query": query, "providers": report})
+        return results
+
+    async def _perform_searches(self, queries: List[str]) -> List[Source]:
+        """Run several searches concurrently and merge their results by URL"""
+        if len(queries) == 1:
+            return await self._perform_search(queries[0])
+
+        semaphore = asyncio.Semaphore(self.search_concurrency)
+
+        async def search(query: str) -> List[Source]:
+            async with semaphore:
+                return await self._perform_search(query)
+
+        results = await asyncio.gather(
+            *(search(query) for query in queries), return_exceptions=True
+        )
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if len(errors) == len(results):
+            raise errors[0]
+
+        all_sources = []
+        seen_urls = set()
+        for query, result in zip(queries, results):
+            if isinstance(result, BaseException):
+                print(f"Search failed for '{query}': {str(result)}")
+                continue
+            for source in result:
+                if source.url not in seen_urls:
+                    seen_urls.add(source.url)
+                    all_sources.append(source)
+        return all_sources
+
+    def _format_sources_for_llm(self, sources: List[Source]) -> str:
+        # Construct prompt with all source information
+        return "\n\n".join(
+            [
+                f"Source: {source.title}\nURL: {source.url}\nContent: {source.snippet}"
+                for source in sources
+            ]
+        )
+
+    async def _extract_nodes(self, sources: List[Source]):
+        """Ask the LLM for new nodes supported by the sources"""
+        graph_summary = self._format_graph_for_llm()
+        sources_text = self._format_sources_for_llm(sources)
+
+        node_prompt = PROCESS_SOURCES_PROMPT["nodes"].format(
+            concept=self.graph.concept,
+            graph_summary=graph_summary,
+            sources_text=sources_text,
+        )
+
+        # Call openai client
+        async for function_call in self._function_calls(
+            messages=[{"role": "user", "content": node_prompt}],
+            functions=[CREATE_NODE_SCHEMA],
+            function_call="auto",
+            purpose="nodes",
+        ):
+            try:
+                if function_call.name == "create_node":
+                    node_data = json.loads(function_call.arguments)
+                    node = Node(**node_data, sources=sources)
+                    self.graph.add_node(node)
+                    self._emit_streamed_update()
+            except json.JSONDecodeError as e:
+                print(f"Error parsing function arguments: {str(e)}")
+                continue
+            except ValueError as e:
+                print(f"Error creating node: {str(e)}")
+                continue
+
+    async def _extract_edges(self, sources: List[Source]):
+        """Ask the LLM for edges between existing nodes supported by the sources"""
+        sources_text = self._format_sources_for_llm(sources)
+        graph_summary = self._format_graph_for_llm()
+
+        # TODO: maybe add extra info on what nodes are newly created, LLM should pay extra attention
+        edge_prompt = PROCESS_SOURCES_PROMPT["edges"].format(
+            concept=self.graph.concept,
+            graph_summary=graph_summary,
+            sources_text=sources_text,
+        )
+
+        # Call openai client
+        async for function_call in self._function_calls(
+            messages=[{"role": "user", "content": edge_prompt}],
+            functions=[CREATE_EDGE_SCHEMA],
+            function_call="auto",
+            purpose="edges",
+        ):
+            try:
+                if function_call.name == "create_edge":
+                    edge_data = json.loads(function_call.arguments)
+                    if edge_data["source_node_id"] != edge_data["target_node_id"]:
+
+                        """
+                        for edge in edges:
+                            source_node = self.graph.get_node(edge.source_node_id)
+                            target_node = self.graph.get_node(edge.target_node_id)
+
+                            if source_node and target_node:
+                                if source_node.year <= target_node.year:
+                                    correct_edges.append(edge)
+                                else:
+                                    # Swap source and target if chronologically backwards
+                                    swapped_edge = Edge(
+                                        source_node_id=edge.target_node_id,
+                                        target_node_id=edge.source_node_id,
+                                        change_description=edge.change_description,
+                                        weight=edge.weight,
+                                        sources=edge.sources
+                                    )
+                                    correct_edges.append(swapped_edge)
+                        """
+                        # Check if edge is chronologically correct
+                        source_node = self.graph.get_node(edge_data["source_node_id"])
+                        target_node = self.graph.get_node(edge_data["target_node_id"])
+                        if source_node and target_node:
+                            if source_node.year <= target_node.year:
+                                edge = Edge(**edge_data, sources=sources)
+                                self.graph.add_edge(edge)
+                            else:
+                                # Swap source and target if chronologically backwards
+                                swapped_edge = Edge(
+                                    source_node_id=edge_data["target_node_id"],
+                                    target_node_id=edge_data["source_node_id"],
+                                    change_description=edge_data["change_description"],
+                                    weight=edge_data.get("weight", 1.0),
+                                    sources=sources,
+                                )
+                                self.graph.add_edge(swapped_edge)
+                            self._emit_streamed_update()
+            except json.JSONDecodeError as e:
+                print(f"Error parsing function arguments: {str(e)}")
+                continue
+            except ValueError as e:
+                print(f"Error creating edge: {str(e)}")
+                continue
 
     async def _has_sufficient_information(self) -> bool:
         "Determine if the graph has sufficient information"
@@ -271,6 +584,8 @@ class IdeaHistoryAgent:
                 messages=[{"role": "user", "content": prompt}],
                 functions=[JUDGE_INFORMATION_SCHEMA],
                 function_call={"name": JUDGE_INFORMATION_SCHEMA["name"]},
+                purpose="judge",
+                hedge=True,
             )
 
             try:
@@ -301,6 +616,8 @@ class IdeaHistoryAgent:
                 messages=[{"role": "user", "content": prompt}],
                 functions=[GENERATE_NEXT_QUERY_SCHEMA],
                 function_call={"name": "generate_next_query"},
+                purpose="query",
+                hedge=True,
             )
 
             # Get the query from the response
@@ -324,66 +641,145 @@ class IdeaHistoryAgent:
             # Return a basic fallback query using the original concept
             return f"History and development of {self.graph.concept}"
 
-    async def _merge_similar_nodes(self):
-        """Identify and merge nodes that represent the same conceptual development"""
+    async def _generate_next_queries(self) -> List[str]:
+        """Generate up to `queries_per_round` diverse queries for the next round"""
+        if self.queries_per_round == 1:
+            query = await self._generate_next_query()
+            return [query] if query else []
+
         try:
-            nodes_data = [node.model_dump() for node in self.graph.nodes]
+            summary = self._format_graph_for_llm()
+            prompt = QUERY_FANOUT_PROMPT.format(
+                num_queries=self.queries_per_round,
+                concept=self.graph.concept,
+                summary=summary,
+                previous_query=self.current_query,
+            )
 
-            prompt = f"""
-            Analyze these nodes representing developments in the concept of '{self.graph.concept}'.
-            Identify any nodes that represent the same conceptual development and should be merged.
-            Consider:
-            - Temporal proximity
-            - Geographic overlap
-            - Similar key contributors
-            - Similar main ideas
-            
-            Nodes: {nodes_data}
-            """
+            response: ChatCompletion = await self._call_llm(
+                messages=[{"role": "user", "content": prompt}],
+                functions=[GENERATE_NEXT_QUERIES_SCHEMA],
+                function_call={"name": "generate_next_queries"},
+                purpose="query",
+                hedge=True,
+            )
 
             try:
-                # Get ChatCompletion response
-                print("Calling LLM for node merging")
-                response: ChatCompletion = await self._call_llm(
-                    messages=[{"role": "user", "content": prompt}],
-                    functions=[MERGE_NODES_SCHEMA],
-                    function_call={"name": "merge_nodes"},
-                )
-            except Exception as e:
-                print(f"Error calling LLM for node merging: {str(e)}")
-                return
+                queries = json.loads(
+                    response.choices[0].message.function_call.arguments
+                )["queries"]
+            except (json.JSONDecodeError, KeyError, IndexError, AttributeError) as e:
+                print(f"Error parsing LLM response for next queries: {str(e)}")
+                queries = []
+
+            # Drop blanks and near-identical repeats, keeping the LLM's order
+            unique = {}
+            for query in queries:
+                if isinstance(query, str) and query.strip():
+                    unique.setdefault(" ".join(query.lower().split()), query.strip())
+            queries = list(unique.values())[: self.queries_per_round]
+            if queries:
+                return queries
 
-            try:
-                print("Parsing LLM response for node merging")
-                # Check if we have a valid function call in the first choice
-                if response.choices and response.choices[0].message.function_call:
-                    merge_data = json.loads(
-                        response.choices[0].message.function_call.arguments
-                    )
-                else:
-                    print("No function call found in response")
-                    return
-            except (json.JSONDecodeError, AttributeError, IndexError) as e:
-                print(f"Error parsing LLM response for node merging: {str(e)}")
+        except Exception as e:
+            print(f"Error generating next queries: {str(e)}")
+
+        # Fall back to the single-query planner
+        query = await self._generate_next_query()
+        return [query] if query else []
+
+    async def _merge_similar_nodes(self):
+        """Identify and merge nodes that represent the same conceptual development.
+
+        Candidate groups are found locally (see app/core/clustering.py) and the
+        LLM only sees compact descriptors of them, deciding any number of
+        merges per call.
+        """
+        try:
+            clusters = NodeClusterer.from_settings().clusters(self.graph.nodes)
+            if not clusters:
+                print("No merge candidates found")
                 return
+            batches = batch_clusters(clusters, settings.MERGE_BATCH_NODES)
 
-            # Execute merge if we have node IDs
-            if merge_data.get("node_ids"):
-                try:
-                    print("Executing node merge")
-                    await self._execute_node_merge(
-                        node_ids=merge_data["node_ids"],
-                        reasoning=merge_data.get("reasoning", "No reasoning provided"),
-                        merged_summary=merge_data.get(
-                            "merged_summary", "No summary provided"
-                        ),
-                    )
-                except Exception as e:
-                    print(f"Error executing node merge: {str(e)}")
+            print(
+                f"Calling LLM for node merging ({len(clusters)} candidate groups, "
+                f"{len(batches)} calls)"
+            )
+            results = await asyncio.gather(
+                *(self._decide_merges(batch) for batch in batches),
+                return_exceptions=True,
+            )
+
+            # Batches hold disjoint nodes, so their merges can't conflict
+            for merges in results:
+                if isinstance(merges, Exception):
+                    print(f"Error calling LLM for node merging: {str(merges)}")
+                    continue
+                for merge in merges:
+                    try:
+                        print("Executing node merge")
+                        await self._execute_node_merge(**merge)
+                    except Exception as e:
+                        print(f"Error executing node merge: {str(e)}")
 
         except Exception as e:
             print(f"Error in merge_similar_nodes: {str(e)}")
 
+    async def _decide_merges(self, clusters: List[List[Node]]) -> List[Dict[str, Any]]:
+        """Ask the LLM which nodes within these candidate groups to merge"""
+        groups = [
+            {"group": number, "nodes": [describe_node(node) for node in cluster]}
+            for number, cluster in enumerate(clusters, start=1)
+        ]
+        prompt = MERGE_CLUSTERS_PROMPT.format(
+            concept=self.graph.concept,
+            clusters=json.dumps(groups, ensure_ascii=False, indent=1),
+        )
+        response: ChatCompletion = await self._call_llm(
+            messages=[{"role": "user", "content": prompt}],
+            functions=[MERGE_NODE_GROUPS_SCHEMA],
+            function_call={"name": MERGE_NODE_GROUPS_SCHEMA["name"]},
+            purpose="merge",
+        )
+
+        print("Parsing LLM response for node merging")
+        group_of = {
+            node.id: number
+            for number, cluster in enumerate(clusters)
+            for node in cluster
+        }
+        claimed = set()
+        merges = []
+        for choice in response.choices:
+            for call in choice.message.tool_calls:
+                try:
+                    proposed = json.loads(call.arguments).get("merges") or []
+                except (json.JSONDecodeError, AttributeError) as e:
+                    print(f"Error parsing LLM response for node merging: {str(e)}")
+                    continue
+                for merge in proposed:
+                    node_ids = [
+                        node_id
+                        for node_id in dict.fromkeys(merge.get("node_ids") or [])
+                        if node_id in group_of and node_id not in claimed
+                    ]
+                    # Only merge within a candidate group, and each node once
+                    if len(node_ids) < 2 or len({group_of[i] for i in node_ids}) > 1:
+                        print(f"Skipping merge of {merge.get('node_ids')}")
+                        continue
+                    claimed.update(node_ids)
+                    merges.append(
+                        {
+                            "node_ids": node_ids,
+                            "reasoning": merge.get("reasoning")
+                            or "No reasoning provided",
+                            "merged_summary": merge.get("merged_summary")
+                            or "No summary provided",
+                        }
+                    )
+        return merges
+
     async def _execute_node_merge(
         self, node_ids: List[str], reasoning: str, merged_summary: str
     ):
@@ -398,9 +794,12 @@ class IdeaHistoryAgent:
                 raise ValueError("No merged summary provided")
 
             # Find all nodes to be merged
-            # TODO: store nodes in a hashmap instead {id: Node}, can index quicker.
             print("Finding nodes to merge")
-            nodes_to_merge = [node for node in self.graph.nodes if node.id in node_ids]
+            nodes_to_merge = [
+                self.graph.get_node(node_id)
+                for node_id in dict.fromkeys(node_ids)
+                if self.graph.has_node(node_id)
+            ]
             if not nodes_to_merge:
                 raise ValueError(f"No nodes found matching provided IDs: {node_ids}")
 
@@ -413,21 +812,10 @@ class IdeaHistoryAgent:
             except Exception as e:
                 raise ValueError(f"Failed to create merged node: {str(e)}")
 
-            try:
-                # Update edges
-                print("Updating edges")
-                self._update_edges_for_merged_node(
-                    old_node_ids=node_ids, merged_node_id=merged_node.id
-                )
-            except Exception as e:
-                raise ValueError(f"Failed to update edges: {str(e)}")
-
-            # Remove old nodes and add merged node
-            print("Removing old nodes and adding merged node")
-            self.graph.nodes = [
-                node for node in self.graph.nodes if node.id not in node_ids
-            ]
-            self.graph.nodes.append(merged_node)
+            # Rewire edges to the merged node (dropping self-loops and
+            # duplicate connections), then swap the nodes
+            print("Replacing merged nodes")
+            self.graph.merge_nodes(node_ids, merged_node)
 
             # Add merge info to graph metadata
             try:
@@ -474,10 +862,10 @@ class IdeaHistoryAgent:
         for node in nodes:
             key_contributors.update(node.key_contributors)
 
-        # Combine sources
-        merged_sources = []
-        for node in nodes:
-            merged_sources.extend(node.sources)
+        # Combine source references without duplicates
+        merged_source_ids = list(
+            dict.fromkeys(key for node in nodes for key in node.source_ids)
+        )
 
         # Create new node
         return Node(
@@ -487,7 +875,7 @@ class IdeaHistoryAgent:
             region=merged_region,
             key_contributors=list(key_contributors),
             main_idea_summary=merged_summary,
-            sources=merged_sources,
+            source_ids=merged_source_ids,
             metadata={
                 "merged_from": [node.id for node in nodes],
                 "merge_reasoning": reasoning,
@@ -497,56 +885,14 @@ class IdeaHistoryAgent:
             },
         )
 
-    def _update_edges_for_merged_node(
-        self, old_node_ids: List[str], merged_node_id: str
-    ):
-        """Update all edges affected by the node merge"""
-
-        new_edges = []
-        seen_connections = set()  # Track unique connections to avoid duplicates
-
-        for edge in self.graph.edges:
-            # Handle source node updates
-            if edge.source_node_id in old_node_ids:
-                source_id = merged_node_id
-            else:
-                source_id = edge.source_node_id
-
-            # Handle target node updates
-            if edge.target_node_id in old_node_ids:
-                target_id = merged_node_id
-            else:
-                target_id = edge.target_node_id
-
-            # Skip self-loops created by merge
-            if source_id == target_id:
-                continue
-
-            # Skip duplicate connections
-            connection = (source_id, target_id)
-            if connection in seen_connections:
-                continue
-
-            seen_connections.add(connection)
-
-            # Create updated edge
-            new_edge = Edge(
-                source_node_id=source_id,
-                target_node_id=target_id,
-                change_description=edge.change_description,
-                weight=edge.weight,
-                sources=edge.sources,
-            )
-            new_edges.append(new_edge)
-
-        # Replace old edges with updated ones
-        self.graph.edges = new_edges
-
     async def _validate_graph(self):
         """Validate and clean the graph's edges for consistency."""
         try:
-            self.graph.edges = self._remove_duplicate_edges(self.graph.edges)
-            self.graph.edges = self._enforce_temporal_order(self.graph.edges)
+            self.graph.set_edges(
+                self._enforce_temporal_order(
+                    self._remove_duplicate_edges(self.graph.edges)
+                )
+            )
         except Exception as e:
             print(f"Error validating graph: {str(e)}")
             raise
@@ -574,8 +920,8 @@ class IdeaHistoryAgent:
             correct_edges = []
 
             for edge in edges:
-                source_node = self._get_node_by_id(edge.source_node_id)
-                target_node = self._get_node_by_id(edge.target_node_id)
+                source_node = self.graph.get_node(edge.source_node_id)
+                target_node = self.graph.get_node(edge.target_node_id)
 
                 if source_node and target_node:
                     if source_node.year <= target_node.year:
@@ -587,7 +933,7 @@ class IdeaHistoryAgent:
                             target_node_id=edge.source_node_id,
                             change_description=edge.change_description,
                             weight=edge.weight,
-                            sources=edge.sources,
+                            source_ids=edge.source_ids,
                         )
                         correct_edges.append(swapped_edge)
 
@@ -596,68 +942,177 @@ class IdeaHistoryAgent:
             print(f"Error enforcing temporal order: {str(e)}")
             raise
 
-    def _get_node_by_id(self, node_id):
-        """Helper method to find a node by its ID."""
-        try:
-            return next((node for node in self.graph.nodes if node.id == node_id), None)
-        except Exception as e:
-            print(f"Error getting node by ID: {str(e)}")
-            raise
-
     def _format_graph_for_llm(self) -> str:
         """Format graph information in a clear, concise way for the LLM"""
+        # Fragments are cached per node/edge and condensed to fit the token
+        # budget, see app/core/summary.py
+        return self.summarizer.render()
 
-        # Format each node's essential information
-        nodes_info = []
-        for node in self.graph.nodes:
-            node_str = (
-                f"Node ID: {node.id}\n"
-                f"Time: {node.time_period}\n"
-                f"Region: {node.region}\n"
-                f"Key figures: {', '.join(node.key_contributors)}\n"
-                f"Summary: {node.main_idea_summary}\n"
-            )
-            nodes_info.append(node_str)
-
-        # Format edges if they exist
-        edges_info = []
-        for edge in self.graph.edges:
-            edge_str = (
-                f"From: {edge.source_node_id}\n"
-                f"To: {edge.target_node_id}\n"
-                f"Evolution: {edge.change_description}\n"
-            )
-            edges_info.append(edge_str)
-
-        # Combine into final format
-        node_info = (
-            "\n" + "-" * 50 + "\n".join(nodes_info)
-            if nodes_info
-            else "No developments recorded yet"
+    async def _function_calls(
+        self,
+        messages: List[Dict[str, str]],
+        functions: List[Dict],
+        function_call: Optional[Any] = None,
+        purpose: str = "other",
+    ) -> AsyncIterator[FunctionCall]:
+        """Yield the function calls in the LLM's reply, streamed as they
+        complete when `stream_tool_calls` is set"""
+        if self.stream_tool_calls:
+            async for call in self._stream_llm(
+                messages, functions, function_call, purpose
+            ):
+                yield call
+            return
+
+        response = await self._call_llm(
+            messages=messages,
+            functions=functions,
+            function_call=function_call,
+            purpose=purpose,
+        )
+        for choice in response.choices:
+            for call in choice.message.tool_calls:
+                yield call
+
+    def _client_for(self, purpose: str) -> BaseChatClient:
+        return self.routes.get(purpose, self.chat_client)
+
+    def _llm_model(self, purpose: str) -> str:
+        client = self._client_for(purpose)
+        return getattr(client, "model", type(client).__name__)
+
+    def route_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Model, calls, latency and tokens of each purpose's LLM calls so far"""
+        stats = {}
+        for purpose, usage in self.llm_usage.items():
+            stats[purpose] = {
+                "model": self._llm_model(purpose),
+                **{key: round(value, 4) for key, value in usage.items()},
+                "mean_seconds": (
+                    round(usage["seconds"] / usage["calls"], 4)
+                    if usage["calls"]
+                    else 0.0
+                ),
+            }
+        return stats
+
+    def usage_totals(self) -> Dict[str, int]:
+        """LLM calls and tokens of the run so far, summed over purposes"""
+        return {
+            key: int(sum(usage[key] for usage in self.llm_usage.values()))
+            for key in ("calls", "prompt_tokens", "completion_tokens")
+        }
+
+    def _llm_usage_for(self, purpose: str) -> Dict[str, float]:
+        return self.llm_usage.setdefault(
+            purpose,
+            {
+                "calls": 0,
+                "errors": 0,
+                "seconds": 0.0,
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+            },
         )
-        edge_info = (
-            "\n".join(edges_info) if edges_info else "No evolution paths recorded yet"
+
+    def _record_llm_tokens(self, purpose: str, token_usage: Any):
+        model = self._llm_model(purpose)
+        usage = self._llm_usage_for(purpose)
+        usage["prompt_tokens"] += token_usage.prompt_tokens
+        usage["completion_tokens"] += token_usage.completion_tokens
+        LLM_TOKENS.inc(
+            token_usage.prompt_tokens, purpose=purpose, model=model, kind="prompt"
         )
-        summary = SUMMARY_TEMPLATE.format(
-            concept=self.graph.concept, node_info=node_info, edge_info=edge_info
+        LLM_TOKENS.inc(
+            token_usage.completion_tokens,
+            purpose=purpose,
+            model=model,
+            kind="completion",
         )
-        return summary
+
+    def _record_llm_call(self, purpose: str, start: float, status: str):
+        model = self._llm_model(purpose)
+        usage = self._llm_usage_for(purpose)
+        duration = time.perf_counter() - start
+        usage["calls"] += 1
+        usage["seconds"] += duration
+        if status != "ok":
+            usage["errors"] += 1
+        LLM_REQUEST_SECONDS.observe(duration, purpose=purpose, model=model)
+        LLM_REQUESTS.inc(purpose=purpose, model=model, status=status)
+
+    async def _stream_llm(
+        self,
+        messages: List[Dict[str, str]],
+        functions: List[Dict],
+        function_call: Optional[Any],
+        purpose: str,
+    ) -> AsyncIterator[FunctionCall]:
+        """Streaming counterpart of _call_llm, with the same accounting"""
+        start = time.perf_counter()
+        status = "error"
+        try:
+            async for call in self._client_for(purpose).stream_function_calls(
+                messages=messages,
+                functions=functions,
+                function_call=function_call,
+                on_usage=lambda token_usage: self._record_llm_tokens(
+                    purpose, token_usage
+                ),
+            ):
+                yield call
+            status = "ok"
+        except Exception as e:
+            print(f"LLM API error: {str(e)}")
+            raise
+        finally:
+            self._record_llm_call(purpose, start, status)
 
     async def _call_llm(
         self,
         messages: List[Dict[str, str]],
         functions: Optional[List[Dict]] = None,
         function_call: Optional[Dict] = None,
+        purpose: str = "other",
+        hedge: bool = False,
     ) -> Any:
-        """Generic wrapper for LLM calls"""
-        try:
-            response = await self.chat_client.chat_completion(
+        """Generic wrapper for LLM calls, tagged by `purpose` for metrics.
+
+        With `hedge`, a duplicate request is sent if the call runs longer than
+        the recent p95 for this purpose (see app/utils/resilience.py).
+        """
+        start = time.perf_counter()
+        status = "error"
+        client = self._client_for(purpose)
+
+        def request():
+            return client.chat_completion(
                 messages=messages, functions=functions, function_call=function_call
             )
+
+        try:
+            if hedge and settings.HEDGE_ENABLED:
+                response = await hedged(
+                    request,
+                    # Each route's model has its own latency profile
+                    get_latency_tracker(f"llm:{purpose}:{self._llm_model(purpose)}"),
+                    name=purpose,
+                    quantile=settings.HEDGE_QUANTILE,
+                    min_samples=settings.HEDGE_MIN_SAMPLES,
+                    initial_delay=settings.HEDGE_INITIAL_DELAY or None,
+                )
+            else:
+                response = await request()
+            status = "ok"
+            token_usage = getattr(response, "usage", None)
+            if token_usage is not None:
+                self._record_llm_tokens(purpose, token_usage)
             return response
         except Exception as e:
             print(f"LLM API error: {str(e)}")
             raise
+        finally:
+            self._record_llm_call(purpose, start, status)
 
     async def test_chat_client_connection(self):
         """Test basic Chat Client API connectivity"""
@@ -0,0 +1,238 @@
+# app/core/clustering.py
+"""
+Local candidate clustering for node merging.
+
+Rather than showing the LLM every node (with all its sources) and asking for
+one merge group, the agent first groups nodes that look alike and only sends
+compact descriptors of those groups. Candidate pairs come from MinHash LSH
+over word shingles of `main_idea_summary` plus an index of shared
+contributors. Each pair is then scored on summary similarity, contributor
+overlap, year proximity and region match, and pairs above the threshold are
+joined into clusters.
+"""
+
+import random
+import re
+import zlib
+from collections import defaultdict
+from typing import Dict, Iterable, List, NamedTuple, Set, Tuple
+
+from app.config.settings import settings
+from app.models.base import Node
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in",
+    "into", "is", "it", "its", "of", "on", "or", "that", "the", "this", "to",
+    "was", "were", "which", "with",
+}  # fmt: skip
+
+
+def normalize_name(name: str) -> str:
+    return " ".join(_TOKEN_PATTERN.findall(name.casefold()))
+
+
+def shingles(text: str, size: int = 2) -> Set[str]:
+    """Word `size`-grams of the text, ignoring case and stopwords"""
+    tokens = [
+        token
+        for token in _TOKEN_PATTERN.findall(text.casefold())
+        if token not in _STOPWORDS
+    ]
+    if len(tokens) < size:
+        return set(tokens)
+    return {" ".join(tokens[i : i + size]) for i in range(len(tokens) - size + 1)}
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class MinHasher:
+    """MinHash signatures with `num_perm` universal hash functions"""
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self._params = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+
+    def signature(self, features: Iterable[str]) -> Tuple[int, ...]:
+        hashes = [zlib.crc32(feature.encode("utf-8")) for feature in features]
+        if not hashes:
+            return (_MAX_HASH,) * self.num_perm
+        return tuple(
+            min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+            for a, b in self._params
+        )
+
+    @staticmethod
+    def similarity(a: Tuple[int, ...], b: Tuple[int, ...]) -> float:
+        """Estimated Jaccard similarity of the two feature sets"""
+        return sum(x == y for x, y in zip(a, b)) / len(a)
+
+
+class _NodeFeatures(NamedTuple):
+    node: Node
+    signature: Tuple[int, ...]
+    contributors: Set[str]
+    region: str
+
+
+class NodeClusterer:
+    """Proposes groups of nodes that may describe the same development.
+
+    A pair's score is a weighted mix of estimated summary similarity,
+    contributor Jaccard, year proximity (1 at the same year, 0 at
+    `year_window` apart) and exact region match; pairs scoring at least
+    `threshold` are linked and linked nodes form a cluster.
+    """
+
+    WEIGHTS = {"summary": 0.45, "contributors": 0.3, "year": 0.15, "region": 0.1}
+
+    def __init__(
+        self,
+        threshold: float = 0.45,
+        num_perm: int = 64,
+        bands: int = 16,
+        year_window: int = 100,
+        max_cluster_size: int = 8,
+        seed: int = 1,
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.hasher = MinHasher(num_perm, seed)
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.year_window = year_window
+        self.max_cluster_size = max_cluster_size
+
+    @classmethod
+    def from_settings(cls) -> "NodeClusterer":
+        return cls(
+            threshold=settings.MERGE_SIMILARITY_THRESHOLD,
+            year_window=settings.MERGE_YEAR_WINDOW,
+            max_cluster_size=settings.MERGE_MAX_CLUSTER_SIZE,
+        )
+
+    def _features(self, node: Node) -> _NodeFeatures:
+        return _NodeFeatures(
+            node=node,
+            signature=self.hasher.signature(shingles(node.main_idea_summary)),
+            contributors={normalize_name(c) for c in node.key_contributors} - {""},
+            region=normalize_name(node.region),
+        )
+
+    def candidate_pairs(self, features: List[_NodeFeatures]) -> Set[Tuple[int, int]]:
+        """Index pairs sharing an LSH band or a contributor"""
+        buckets: Dict[Tuple, List[int]] = defaultdict(list)
+        for i, feature in enumerate(features):
+            for band in range(self.bands):
+                start = band * self.rows
+                key = (band,) + feature.signature[start : start + self.rows]
+                buckets[key].append(i)
+            for contributor in feature.contributors:
+                buckets[("contributor", contributor)].append(i)
+
+        pairs = set()
+        for members in buckets.values():
+            for x in range(len(members)):
+                for y in range(x + 1, len(members)):
+                    pairs.add((members[x], members[y]))
+        return pairs
+
+    def score(self, a: _NodeFeatures, b: _NodeFeatures) -> float:
+        year_gap = abs(a.node.year - b.node.year)
+        parts = {
+            "summary": MinHasher.similarity(a.signature, b.signature),
+            "contributors": jaccard(a.contributors, b.contributors),
+            "year": max(0.0, 1.0 - year_gap / self.year_window),
+            "region": 1.0 if a.region and a.region == b.region else 0.0,
+        }
+        return sum(self.WEIGHTS[name] * value for name, value in parts.items())
+
+    def scored_pairs(self, nodes: List[Node]) -> List[Tuple[float, str, str]]:
+        """(score, id, id) for every candidate pair at or above the threshold"""
+        features = [self._features(node) for node in nodes]
+        scored = []
+        for i, j in self.candidate_pairs(features):
+            score = self.score(features[i], features[j])
+            if score >= self.threshold:
+                scored.append((score, nodes[i].id, nodes[j].id))
+        scored.sort(reverse=True)
+        return scored
+
+    def clusters(self, nodes: List[Node]) -> List[List[Node]]:
+        """Candidate merge clusters of two or more nodes, largest first.
+
+        Pairs are linked strongest first and a link that would grow a cluster
+        past `max_cluster_size` is skipped, so one popular contributor cannot
+        chain the whole graph together.
+        """
+        parent = {node.id: node.id for node in nodes}
+        size = {node.id: 1 for node in nodes}
+
+        def find(node_id: str) -> str:
+            while parent[node_id] != node_id:
+                parent[node_id] = parent[parent[node_id]]
+                node_id = parent[node_id]
+            return node_id
+
+        for _, a, b in self.scored_pairs(nodes):
+            root_a, root_b = find(a), find(b)
+            if root_a == root_b:
+                continue
+            if size[root_a] + size[root_b] > self.max_cluster_size:
+                continue
+            if size[root_a] < size[root_b]:
+                root_a, root_b = root_b, root_a
+            parent[root_b] = root_a
+            size[root_a] += size[root_b]
+
+        groups: Dict[str, List[Node]] = defaultdict(list)
+        for node in nodes:
+            groups[find(node.id)].append(node)
+        clusters = [group for group in groups.values() if len(group) > 1]
+        clusters.sort(key=len, reverse=True)
+        return clusters
+
+
+def describe_node(node: Node, summary_chars: int = 240) -> Dict:
+    """Compact descriptor of a node for merge prompts (no sources)"""
+    summary = node.main_idea_summary
+    if len(summary) > summary_chars:
+        summary = summary[:summary_chars].rsplit(" ", 1)[0] + "..."
+    return {
+        "id": node.id,
+        "year": node.year,
+        "time_period": node.time_period,
+        "region": node.region,
+        "key_contributors": node.key_contributors,
+        "summary": summary,
+    }
+
+
+def batch_clusters(
+    clusters: List[List[Node]], max_nodes: int
+) -> List[List[List[Node]]]:
+    """Split clusters into batches of whole clusters with at most `max_nodes`
+    nodes each (a single larger cluster gets a batch of its own)"""
+    batches: List[List[List[Node]]] = []
+    current: List[List[Node]] = []
+    current_nodes = 0
+    for cluster in clusters:
+        if current and current_nodes + len(cluster) > max_nodes:
+            batches.append(current)
+            current, current_nodes = [], 0
+        current.append(cluster)
+        current_nodes += len(cluster)
+    if current:
+        batches.append(current)
+    return batches
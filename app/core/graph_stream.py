@@ -0,0 +1,202 @@
+# app/core/graph_stream.py
+"""
+Delta-encoded graph events for streaming research progress.
+
+Every event carries a `seq` number, starting at 1 and increasing by one per
+event. An event is either
+
+* a snapshot: `{"type", "data", "seq", "graph": <full IdeaGraph dump>}`
+  (in process the dump is already encoded, see app/utils/serialization.py), or
+* a patch: `{"type", "data", "seq", "patch": [<op>, ...]}` to be applied to
+  the graph as of event `seq - 1`.
+
+Patch operations, applied in order:
+
+* `{"op": "add_sources", "sources": {id: {...}}}` - add entries to the graph's
+  source table; sent before the nodes and edges referring to them
+* `{"op": "add_node", "node": {...}}` - append the node
+* `{"op": "remove_nodes", "ids": [...]}` - drop the nodes and every edge
+  touching them
+* `{"op": "add_edge", "edge": {...}}` - append the edge unless one with the
+  same (source_node_id, target_node_id) already exists
+* `{"op": "redirect_edges", "old_ids": [...], "new_id": "..."}` - point every
+  edge endpoint in `old_ids` at `new_id`, then drop self-loops and all but the
+  first edge per (source_node_id, target_node_id), keeping order
+* `{"op": "set_edges", "edges": [...]}` - replace the edge list
+* `{"op": "set_metadata", "metadata": {...}}` - replace the graph metadata
+
+A node merge is sent as `redirect_edges`, `remove_nodes` and `add_node` in
+the same patch. The first event, every `checkpoint_interval`-th event and the
+terminal `complete`/`error` events are snapshots. A client that misses an
+event (its last seq is not `seq - 1`) must ignore patches until the next
+snapshot. `apply_event` below is the reference reducer; the frontend mirrors
+it in `frontend/src/components/HistoryGraph/graphPatch.ts`.
+
+Nodes and edges refer to the graph's source table by id. `InlineSourceEvents`
+rewrites a stream into the older form, with sources copied into every node
+and edge, for clients that predate the table.
+"""
+
+import copy
+from typing import Any, Dict, List, Optional
+
+from app.models.base import IdeaGraph, inline_sources
+from app.utils.serialization import decode_graph, snapshot
+
+SNAPSHOT_EVENT_TYPES = ("complete", "error")
+
+
+class GraphEventStream:
+    """Turns graph mutations into sequence-numbered snapshot/patch events"""
+
+    def __init__(self, graph: IdeaGraph, checkpoint_interval: int = 10):
+        self.graph = graph
+        self.checkpoint_interval = max(checkpoint_interval, 1)
+        self.seq = 0
+        self._last_metadata: Optional[Dict] = None
+        graph.record_changes()
+
+    def next_event(self, event_type: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        self.seq += 1
+        changes = self.graph.drain_changes()
+
+        if (
+            self.seq == 1
+            or self.seq % self.checkpoint_interval == 0
+            or event_type in SNAPSHOT_EVENT_TYPES
+            or any(op["op"] == "reset" for op in changes)
+        ):
+            self._last_metadata = copy.deepcopy(self.graph.metadata)
+            return {
+                "type": event_type,
+                "data": data,
+                "seq": self.seq,
+                # Encoded now: the graph keeps changing after the event
+                "graph": snapshot(self.graph),
+            }
+
+        if self.graph.metadata != self._last_metadata:
+            self._last_metadata = copy.deepcopy(self.graph.metadata)
+            changes.append({"op": "set_metadata", "metadata": self._last_metadata})
+
+        return {"type": event_type, "data": data, "seq": self.seq, "patch": changes}
+
+
+def _edge_key(edge: Dict) -> tuple:
+    return (edge["source_node_id"], edge["target_node_id"])
+
+
+def _dedup_edges(edges: List[Dict]) -> List[Dict]:
+    seen = set()
+    unique = []
+    for edge in edges:
+        if _edge_key(edge) not in seen:
+            seen.add(_edge_key(edge))
+            unique.append(edge)
+    return unique
+
+
+def apply_patch(graph: Dict[str, Any], patch: List[Dict]) -> Dict[str, Any]:
+    """Apply patch operations to a graph dict in place and return it"""
+    for op in patch:
+        kind = op["op"]
+        if kind == "add_sources":
+            graph.setdefault("sources", {}).update(op["sources"])
+        elif kind == "add_node":
+            graph["nodes"].append(op["node"])
+        elif kind == "remove_nodes":
+            ids = set(op["ids"])
+            graph["nodes"] = [node for node in graph["nodes"] if node["id"] not in ids]
+            graph["edges"] = [
+                edge
+                for edge in graph["edges"]
+                if edge["source_node_id"] not in ids
+                and edge["target_node_id"] not in ids
+            ]
+        elif kind == "add_edge":
+            if _edge_key(op["edge"]) not in {_edge_key(e) for e in graph["edges"]}:
+                graph["edges"].append(op["edge"])
+        elif kind == "redirect_edges":
+            old_ids = set(op["old_ids"])
+            rewritten = []
+            for edge in graph["edges"]:
+                edge = dict(edge)
+                if edge["source_node_id"] in old_ids:
+                    edge["source_node_id"] = op["new_id"]
+                if edge["target_node_id"] in old_ids:
+                    edge["target_node_id"] = op["new_id"]
+                if edge["source_node_id"] != edge["target_node_id"]:
+                    rewritten.append(edge)
+            graph["edges"] = _dedup_edges(rewritten)
+        elif kind == "set_edges":
+            graph["edges"] = list(op["edges"])
+        elif kind == "set_metadata":
+            graph["metadata"] = op["metadata"]
+        else:
+            raise ValueError(f"Unknown patch op: {kind}")
+    return graph
+
+
+def apply_event(
+    state: Optional[Dict[str, Any]], last_seq: int, event: Dict[str, Any]
+) -> tuple:
+    """Reference reducer: returns the new (graph, last_seq) after `event`.
+
+    Patches that don't follow `last_seq` directly are skipped until the next
+    snapshot resynchronizes the client.
+    """
+    if "graph" in event:
+        graph = event["graph"]
+        graph = (
+            decode_graph(graph) if isinstance(graph, bytes) else copy.deepcopy(graph)
+        )
+        return graph, event.get("seq", last_seq)
+    if "patch" not in event:
+        return state, last_seq
+    if state is None or event["seq"] != last_seq + 1:
+        return state, last_seq
+    return apply_patch(state, event["patch"]), event["seq"]
+
+
+class InlineSourceEvents:
+    """Rewrites one client's events into the inlined-sources form.
+
+    Snapshots go through `inline_sources()`. In patches, `add_sources` ops are
+    dropped and their entries copied into the nodes and edges of later ops,
+    so an instance must see a connection's events in order. A stream resumed
+    mid-way lacks the sources announced before the resume point until the
+    next snapshot.
+    """
+
+    def __init__(self):
+        self.table: Dict[str, Dict] = {}
+
+    def _inline(self, item: Dict) -> Dict:
+        item = dict(item)
+        item["sources"] = [
+            self.table[key] for key in item.pop("source_ids", []) if key in self.table
+        ]
+        return item
+
+    def convert(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        if "graph" in event:
+            graph = decode_graph(event["graph"])
+            self.table = dict(graph.get("sources", {}))
+            return {**event, "graph": inline_sources(graph)}
+        if "patch" not in event:
+            return event
+
+        patch = []
+        for op in event["patch"]:
+            kind = op["op"]
+            if kind == "add_sources":
+                self.table.update(op["sources"])
+                continue
+            if kind == "add_node":
+                op = {**op, "node": self._inline(op["node"])}
+            elif kind == "add_edge":
+                op = {**op, "edge": self._inline(op["edge"])}
+            elif kind == "set_edges":
+                op = {**op, "edges": [self._inline(edge) for edge in op["edges"]]}
+            patch.append(op)
+        return {**event, "patch": patch}
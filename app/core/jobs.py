@@ -0,0 +1,314 @@
+# app/core/jobs.py
+"""
+Research jobs decoupled from HTTP connections.
+
+A job owns one research run and an append-only log of its events. Any number
+of clients can read the log from any point (SSE `Last-Event-ID`), so a
+browser that reconnects resumes where it left off instead of losing the run.
+Concurrent submissions for the same normalized concept and options attach to
+the job already in flight (single-flight) rather than starting another LLM
+pipeline.
+
+Event ids are 1-based positions in the log. Every job ends with a `done`
+event carrying its final status; the log is closed after that.
+"""
+
+import asyncio
+import math
+import re
+import time
+import uuid
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.utils.metrics import registry
+from app.utils.serialization import dumps, encode_event
+
+JOB_QUEUE_DEPTH = registry.gauge(
+    "research_job_queue_depth", "Research jobs waiting for a run slot"
+)
+JOB_QUEUE_WAIT_SECONDS = registry.histogram(
+    "research_job_queue_wait_seconds",
+    "Time a research job waited for a run slot",
+    buckets=(0.01, 0.1, 1, 5, 15, 30, 60, 120, 300),
+)
+JOBS_REJECTED = registry.counter(
+    "research_jobs_rejected_total", "Research jobs refused because the queue was full"
+)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETE = "complete"
+JOB_FAILED = "error"
+
+
+class JobQueueFull(Exception):
+    """Raised by JobManager.submit when no more jobs can be queued"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Research queue is full, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+def normalize_concept(concept: str) -> str:
+    """Case- and whitespace-insensitive form of a concept, used for dedup"""
+    return re.sub(r"\s+", " ", concept).strip().casefold()
+
+
+class ResearchJob:
+    """One research run and its event log"""
+
+    def __init__(self, concept: str, options: Dict[str, Any], key: Tuple):
+        self.id = uuid.uuid4().hex
+        self.concept = concept
+        self.options = options
+        self.key = key
+        self.status = JOB_QUEUED
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        # LLM calls and tokens spent by the run, filled in by the runner
+        self.usage: Dict[str, int] = {}
+        # Model, latency and tokens per LLM call purpose, see the agent's
+        # route_stats()
+        self.routes: Dict[str, Dict[str, Any]] = {}
+        self.subscribers = 1
+        # Events are serialized once on append and shared by every reader
+        self.events: List[str] = []
+        self._changed = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status not in (JOB_QUEUED, JOB_RUNNING)
+
+    def append(self, event: Dict[str, Any]) -> int:
+        """Add an event to the log and wake readers; returns its id"""
+        if self.done:
+            raise RuntimeError(f"Job {self.id} is finished")
+        self.events.append(encode_event(event).decode("utf-8"))
+        self._notify()
+        return len(self.events)
+
+    def finish(self, status: str, result=None, error: Optional[str] = None):
+        if self.done:
+            return
+        self.result = result
+        self.error = error
+        self.events.append(
+            dumps({"type": "done", "data": {"status": status, "error": error}}).decode(
+                "utf-8"
+            )
+        )
+        self.status = status
+        self.finished_at = time.time()
+        self._notify()
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def read(self, last_event_id: int = 0) -> AsyncIterator[Tuple[int, str]]:
+        """Yield (id, json) for every event after `last_event_id`, following the
+        log until the job finishes"""
+        index = max(last_event_id, 0)
+        while True:
+            while index < len(self.events):
+                index += 1
+                yield index, self.events[index - 1]
+            if self.done:
+                return
+            await self._changed.wait()
+
+    async def wait(self):
+        """Block until the job has finished"""
+        while not self.done:
+            await self._changed.wait()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "concept": self.concept,
+            "status": self.status,
+            "events": len(self.events),
+            "subscribers": self.subscribers,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+            "usage": self.usage,
+            "routes": self.routes,
+        }
+
+
+JobRunner = Callable[[ResearchJob], Awaitable[Optional[Dict[str, Any]]]]
+
+
+class JobManager:
+    """Starts research jobs, deduplicates concurrent ones and expires old ones.
+
+    `runner` performs the research for a job, appending events via
+    `job.append`, and returns the result (or raises). A job whose runner
+    returns None is marked failed.
+
+    At most `max_running` jobs run at once; others wait in a queue of up to
+    `max_queued` jobs, past which `submit` raises JobQueueFull. Attaching to
+    an in-flight job is always allowed.
+    """
+
+    def __init__(
+        self,
+        runner: JobRunner,
+        retention: float = 600.0,
+        max_running: int = 0,
+        max_queued: Optional[int] = None,
+    ):
+        self.runner = runner
+        self.retention = retention
+        self.max_running = max_running
+        self.max_queued = max_queued
+        self.jobs: Dict[str, ResearchJob] = {}
+        self._in_flight: Dict[Tuple, ResearchJob] = {}
+        self._slots = asyncio.Semaphore(max_running) if max_running else None
+        self.queued = 0
+        self.started = 0
+        self.attached = 0
+        self.rejected = 0
+        # Moving average of run time, used for Retry-After hints
+        self.average_duration = 30.0
+
+    @staticmethod
+    def make_key(concept: str, options: Dict[str, Any]) -> Tuple:
+        # Dict options (e.g. per-purpose models) are flattened to be hashable
+        return (normalize_concept(concept),) + tuple(
+            (name, tuple(sorted(value.items())) if isinstance(value, dict) else value)
+            for name, value in sorted(options.items())
+        )
+
+    def submit(
+        self, concept: str, options: Optional[Dict[str, Any]] = None
+    ) -> Tuple[ResearchJob, bool]:
+        """Return the in-flight job for this concept/options, or start one.
+
+        The boolean is True when a new job was started.
+        """
+        self.expire()
+        options = options or {}
+        key = self.make_key(concept, options)
+
+        job = self._in_flight.get(key)
+        if job is not None and not job.done:
+            job.subscribers += 1
+            self.attached += 1
+            return job, False
+
+        # Every in-flight job is either running or queued
+        if (
+            self.max_running
+            and self.max_queued is not None
+            and len(self._in_flight) >= self.max_running + self.max_queued
+        ):
+            self.rejected += 1
+            JOBS_REJECTED.inc()
+            raise JobQueueFull(self.retry_after())
+
+        job = ResearchJob(concept, options, key)
+        self.jobs[job.id] = job
+        self._in_flight[key] = job
+        self.started += 1
+        job._task = asyncio.create_task(self._run(job))
+        return job, True
+
+    def replay(
+        self,
+        concept: str,
+        options: Dict[str, Any],
+        events: List[Dict[str, Any]],
+        result: Dict[str, Any],
+    ) -> ResearchJob:
+        """Register an already-finished job whose log is `events`, e.g. to
+        serve a stored result through the same events API"""
+        self.expire()
+        job = ResearchJob(concept, options, self.make_key(concept, options))
+        for event in events:
+            job.append(event)
+        job.finish(JOB_COMPLETE, result=result)
+        self.jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[ResearchJob]:
+        return self.jobs.get(job_id)
+
+    def retry_after(self) -> int:
+        """Rough seconds until a queue slot frees up"""
+        waves = (len(self._in_flight) + 1) / max(self.max_running, 1)
+        return max(1, math.ceil(self.average_duration * waves))
+
+    async def _run(self, job: ResearchJob):
+        if self._slots is None:
+            await self._execute(job)
+            return
+
+        self.queued += 1
+        JOB_QUEUE_DEPTH.inc()
+        queued_at = time.perf_counter()
+        try:
+            await self._slots.acquire()
+        except asyncio.CancelledError:
+            job.finish(JOB_FAILED, error="Job cancelled")
+            self._forget(job)
+            raise
+        finally:
+            self.queued -= 1
+            JOB_QUEUE_DEPTH.dec()
+            JOB_QUEUE_WAIT_SECONDS.observe(time.perf_counter() - queued_at)
+        try:
+            await self._execute(job)
+        finally:
+            self._slots.release()
+
+    async def _execute(self, job: ResearchJob):
+        job.status = JOB_RUNNING
+        started = time.perf_counter()
+        try:
+            result = await self.runner(job)
+            if result is None:
+                job.finish(JOB_FAILED, error="Research produced no result")
+            else:
+                job.finish(JOB_COMPLETE, result=result)
+        except asyncio.CancelledError:
+            job.finish(JOB_FAILED, error="Job cancelled")
+            raise
+        except Exception as e:
+            print(f"Research job {job.id} failed: {str(e)}")
+            job.finish(JOB_FAILED, error=str(e))
+        finally:
+            duration = time.perf_counter() - started
+            self.average_duration = 0.8 * self.average_duration + 0.2 * duration
+            self._forget(job)
+
+    def _forget(self, job: ResearchJob):
+        if self._in_flight.get(job.key) is job:
+            del self._in_flight[job.key]
+
+    def expire(self):
+        """Forget finished jobs older than the retention period"""
+        cutoff = time.time() - self.retention
+        for job_id, job in list(self.jobs.items()):
+            if job.done and job.finished_at < cutoff:
+                del self.jobs[job_id]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "jobs": len(self.jobs),
+            "running": len(self._in_flight) - self.queued,
+            "queued": self.queued,
+            "started": self.started,
+            "attached": self.attached,
+            "rejected": self.rejected,
+        }
+
+    async def close(self):
+        tasks = [job._task for job in self.jobs.values() if job._task and not job.done]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,170 @@
+# app/core/result_store.py
+"""
+Persistent store of finished research graphs.
+
+Graphs are kept zlib-compressed in SQLite, keyed by the normalized concept
+plus the configuration that shaped them (min/max nodes, model). A stored
+graph is *fresh* for `fresh_for` seconds and may be served as-is; after that
+it is *stale* - still served, but callers should refresh it in the
+background. Past `max_age` it is treated as missing. Writing a refreshed
+graph replaces the row in a single statement, so readers see either the old
+graph or the new one, never a mix.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from app.config.settings import settings
+from app.core.jobs import normalize_concept
+from app.utils.serialization import dumps
+
+
+@dataclass
+class StoredGraph:
+    concept: str
+    config: Dict[str, Any]
+    data: bytes  # the graph as compact JSON
+    stored_at: float
+    stale: bool
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.stored_at
+
+    def to_dict(self) -> Dict[str, Any]:
+        return json.loads(self.data)
+
+
+class GraphResultStore:
+    def __init__(
+        self,
+        path: str,
+        fresh_for: float = 24 * 3600,
+        max_age: Optional[float] = None,
+        compression_level: int = 6,
+    ):
+        self.path = path
+        self.fresh_for = fresh_for
+        self.max_age = max_age
+        self.compression_level = compression_level
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS graph_results (
+                key TEXT PRIMARY KEY,
+                concept TEXT NOT NULL,
+                config TEXT NOT NULL,
+                data BLOB NOT NULL,
+                stored_at REAL NOT NULL
+            )
+            """)
+        self._conn.commit()
+
+    @classmethod
+    def from_settings(cls) -> "GraphResultStore":
+        return cls(
+            settings.RESULT_STORE_PATH,
+            fresh_for=settings.RESULT_FRESH_SECONDS,
+            max_age=settings.RESULT_MAX_AGE_SECONDS or None,
+        )
+
+    @staticmethod
+    def make_key(concept: str, config: Dict[str, Any]) -> str:
+        canonical = json.dumps(
+            {"concept": normalize_concept(concept), "config": config},
+            sort_keys=True,
+            separators=(",", ":"),
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def get(self, concept: str, config: Dict[str, Any]) -> Optional[StoredGraph]:
+        key = self.make_key(concept, config)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT concept, config, data, stored_at FROM graph_results "
+                "WHERE key = ?",
+                (key,),
+            ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+
+        stored_concept, stored_config, data, stored_at = row
+        age = time.time() - stored_at
+        if self.max_age is not None and age > self.max_age:
+            self.misses += 1
+            return None
+
+        stale = age > self.fresh_for
+        if stale:
+            self.stale_hits += 1
+        else:
+            self.hits += 1
+        return StoredGraph(
+            concept=stored_concept,
+            config=json.loads(stored_config),
+            data=zlib.decompress(data),
+            stored_at=stored_at,
+            stale=stale,
+        )
+
+    def put(self, concept: str, config: Dict[str, Any], graph: Dict[str, Any]):
+        """Store (or atomically replace) the graph for this concept/config"""
+        data = dumps(graph)
+        compressed = zlib.compress(data, self.compression_level)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO graph_results "
+                "(key, concept, config, data, stored_at) VALUES (?, ?, ?, ?, ?)",
+                (
+                    self.make_key(concept, config),
+                    concept,
+                    json.dumps(config, sort_keys=True),
+                    compressed,
+                    time.time(),
+                ),
+            )
+            self._conn.commit()
+
+    def delete(self, concept: str, config: Dict[str, Any]):
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM graph_results WHERE key = ?",
+                (self.make_key(concept, config),),
+            )
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._conn.execute(
+                "SELECT COUNT(*) FROM graph_results"
+            ).fetchone()
+        return count
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,204 @@
+# app/core/source_registry.py
+"""
+Deduplication of search results across research rounds.
+
+Later rounds often return sources the agent has already read: the same
+Wikipedia article through its mobile host, a Google result with tracking
+parameters, or a mirror of a page with a slightly different snippet. The
+registry canonicalizes each URL and fingerprints each snippet with a 64-bit
+SimHash, and only lets through sources that are neither a known URL nor
+within `max_distance` bits of a known snippet.
+
+A registry normally lives for one research run; sharing an instance (or
+seeding one with earlier sources) extends the dedup across runs.
+"""
+
+import hashlib
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import parse_qsl, quote, unquote, urlencode, urlsplit, urlunsplit
+
+from app.models.base import Source
+from app.utils.metrics import registry
+
+SOURCES_SEEN = registry.counter(
+    "research_sources_total", "Search results checked by the source registry"
+)
+SOURCES_DROPPED = registry.counter(
+    "research_sources_dropped_total",
+    "Search results dropped as already seen",
+    ["reason"],
+)
+
+TRACKING_PARAMS = {
+    "fbclid",
+    "gclid",
+    "dclid",
+    "msclkid",
+    "mc_cid",
+    "mc_eid",
+    "ref",
+    "ref_src",
+    "igshid",
+    "_ga",
+}
+_WIKIPEDIA_HOST = re.compile(r"^([a-z\-]+)\.(?:m\.)?wikipedia\.org$")
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def canonicalize_url(url: str) -> str:
+    """Normalize a URL so that trivially different forms compare equal.
+
+    Lowercases scheme and host, treats http as https, drops `www.`, default
+    ports, fragments, tracking parameters and trailing slashes, sorts the
+    query and maps mobile/index.php Wikipedia URLs to `/wiki/Title`.
+    """
+    try:
+        parts = urlsplit(url.strip())
+    except ValueError:
+        return url.strip()
+    if not parts.netloc:
+        return url.strip()
+
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+
+    path = parts.path or "/"
+    query = [
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    ]
+
+    wikipedia = _WIKIPEDIA_HOST.match(host)
+    if wikipedia:
+        host = f"{wikipedia.group(1)}.wikipedia.org"
+        params = dict(query)
+        if path in ("/w/index.php", "/index.php") and "title" in params:
+            path = "/wiki/" + params["title"]
+            query = []
+        if path.startswith("/wiki/"):
+            title = unquote(path[len("/wiki/") :]).replace(" ", "_")
+            path = "/wiki/" + quote(title, safe="_():,'!*-.~/")
+            query = []
+
+    if len(path) > 1:
+        path = path.rstrip("/")
+    return urlunsplit(("https", host, path, urlencode(sorted(query)), ""))
+
+
+def simhash(text: str, bits: int = 64) -> int:
+    """Charikar SimHash over word tokens and word bigrams"""
+    tokens = [token.casefold() for token in _TOKEN_PATTERN.findall(text)]
+    features = Counter(tokens)
+    features.update(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+
+    weights = [0] * bits
+    for feature, count in features.items():
+        digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+        value = int.from_bytes(digest, "big")
+        for bit in range(bits):
+            weights[bit] += count if value >> bit & 1 else -count
+    return sum(1 << bit for bit in range(bits) if weights[bit] > 0)
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class SourceRegistry:
+    """Remembers the sources of a run and filters out ones already seen.
+
+    Near-duplicate lookup splits fingerprints into `max_distance + 1` bands:
+    two fingerprints within `max_distance` bits must agree on at least one
+    band, so only sources sharing a band are compared.
+    """
+
+    BITS = 64
+
+    def __init__(
+        self,
+        max_distance: int = 3,
+        min_tokens: int = 8,
+        seen: Optional[Iterable[Source]] = None,
+    ):
+        self.max_distance = max_distance
+        # Very short snippets collide too easily to fingerprint
+        self.min_tokens = min_tokens
+        self.urls: Set[str] = set()
+        self._fingerprints: List[int] = []
+        self._bands: Dict[Tuple[int, int], List[int]] = {}
+        self._band_count = max_distance + 1
+        self._band_width = -(-self.BITS // self._band_count)
+        self.accepted = 0
+        self.dropped: Counter = Counter()
+        for source in seen or []:
+            self._add(canonicalize_url(source.url), self._fingerprint(source))
+
+    def _fingerprint(self, source: Source) -> Optional[int]:
+        text = source.snippet or ""
+        if len(_TOKEN_PATTERN.findall(text)) < self.min_tokens:
+            return None
+        return simhash(text, self.BITS)
+
+    def _band_keys(self, fingerprint: int) -> List[Tuple[int, int]]:
+        mask = (1 << self._band_width) - 1
+        return [
+            (band, fingerprint >> (band * self._band_width) & mask)
+            for band in range(self._band_count)
+        ]
+
+    def _near_duplicate(self, fingerprint: int) -> bool:
+        checked = set()
+        for key in self._band_keys(fingerprint):
+            for index in self._bands.get(key, ()):
+                if index in checked:
+                    continue
+                checked.add(index)
+                distance = hamming_distance(fingerprint, self._fingerprints[index])
+                if distance <= self.max_distance:
+                    return True
+        return False
+
+    def _add(self, url: str, fingerprint: Optional[int]):
+        self.urls.add(url)
+        if fingerprint is None:
+            return
+        index = len(self._fingerprints)
+        self._fingerprints.append(fingerprint)
+        for key in self._band_keys(fingerprint):
+            self._bands.setdefault(key, []).append(index)
+
+    def filter(self, sources: Iterable[Source]) -> List[Source]:
+        """Return the sources not seen before, remembering them"""
+        fresh = []
+        for source in sources:
+            SOURCES_SEEN.inc()
+            url = canonicalize_url(source.url)
+            if url in self.urls:
+                reason = "url"
+            else:
+                fingerprint = self._fingerprint(source)
+                if fingerprint is not None and self._near_duplicate(fingerprint):
+                    reason = "near_duplicate"
+                    # Still remember the URL, so a repeat is cheaper to reject
+                    self.urls.add(url)
+                else:
+                    self._add(url, fingerprint)
+                    self.accepted += 1
+                    fresh.append(source)
+                    continue
+            self.dropped[reason] += 1
+            SOURCES_DROPPED.inc(reason=reason)
+        return fresh
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "accepted": self.accepted,
+            "dropped_url": self.dropped["url"],
+            "dropped_near_duplicate": self.dropped["near_duplicate"],
+        }
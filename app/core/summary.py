@@ -0,0 +1,197 @@
+# app/core/summary.py
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+
+from app.models.base import Edge, IdeaGraph, Node
+from app.services.llm.prompts import SUMMARY_TEMPLATE
+
+try:
+    import tiktoken
+except ImportError:  # optional dependency
+    tiktoken = None
+
+
+def make_token_counter(encoding_name: str = "o200k_base") -> Callable[[str], int]:
+    """Token counter backed by tiktoken when available, else ~4 chars/token"""
+    if tiktoken is not None:
+        try:
+            encoding = tiktoken.get_encoding(encoding_name)
+            return lambda text: len(encoding.encode(text, disallowed_special=()))
+        except Exception as e:
+            print(f"Falling back to approximate token counts: {str(e)}")
+    return lambda text: (len(text) + 3) // 4
+
+
+class _Fragment(NamedTuple):
+    item: Any  # the Node or Edge this was rendered from
+    full: str
+    full_tokens: int
+    condensed: str
+    condensed_tokens: int
+
+
+class GraphSummarizer:
+    """Renders the graph summary used in prompts, incrementally.
+
+    Each node and edge is rendered once into a cached fragment (with its
+    token count); a fragment is re-rendered only when the node/edge object
+    behind its id changes, e.g. after a merge. The assembled summary is reused
+    until the graph's version changes.
+
+    With a `token_budget`, nodes are condensed to a single line - lowest
+    degree first, then oldest - until the estimated size fits. If condensing
+    every node is not enough, edges are condensed too.
+    """
+
+    CONDENSED_SUMMARY_WORDS = 12
+
+    def __init__(
+        self,
+        graph: IdeaGraph,
+        token_budget: Optional[int] = None,
+        count_tokens: Optional[Callable[[str], int]] = None,
+    ):
+        self.graph = graph
+        self.token_budget = token_budget or None
+        self.count_tokens = count_tokens or make_token_counter()
+        self._node_fragments: Dict[str, _Fragment] = {}
+        self._edge_fragments: Dict[Tuple[str, str], _Fragment] = {}
+        self._template_tokens = self.count_tokens(
+            SUMMARY_TEMPLATE.format(concept="", node_info="", edge_info="")
+        )
+        self._cached_key: Optional[Tuple[int, str]] = None
+        self._cached_summary = ""
+        self.last_token_estimate = 0
+        self.condensed_nodes = 0
+        self.condensed_edges = 0
+
+    def render(self) -> str:
+        key = (self.graph.version, self.graph.concept)
+        if key == self._cached_key:
+            return self._cached_summary
+
+        node_fragments = [self._node_fragment(node) for node in self.graph.nodes]
+        edge_fragments = [self._edge_fragment(edge) for edge in self.graph.edges]
+        self._prune()
+
+        use_full_node = [True] * len(node_fragments)
+        use_full_edge = [True] * len(edge_fragments)
+        total = (
+            self._template_tokens
+            + self.count_tokens(self.graph.concept)
+            + sum(fragment.full_tokens for fragment in node_fragments)
+            + sum(fragment.full_tokens for fragment in edge_fragments)
+        )
+
+        if self.token_budget and total > self.token_budget:
+            order = sorted(
+                range(len(node_fragments)),
+                key=lambda i: (
+                    self.graph.degree(self.graph.nodes[i].id),
+                    self.graph.nodes[i].year,
+                ),
+            )
+            for i in order:
+                if total <= self.token_budget:
+                    break
+                use_full_node[i] = False
+                total -= (
+                    node_fragments[i].full_tokens - node_fragments[i].condensed_tokens
+                )
+            for i in range(len(edge_fragments)):
+                if total <= self.token_budget:
+                    break
+                use_full_edge[i] = False
+                total -= (
+                    edge_fragments[i].full_tokens - edge_fragments[i].condensed_tokens
+                )
+
+        nodes_info = [
+            fragment.full if full else fragment.condensed
+            for fragment, full in zip(node_fragments, use_full_node)
+        ]
+        edges_info = [
+            fragment.full if full else fragment.condensed
+            for fragment, full in zip(edge_fragments, use_full_edge)
+        ]
+        self.condensed_nodes = use_full_node.count(False)
+        self.condensed_edges = use_full_edge.count(False)
+        self.last_token_estimate = total
+
+        # Combine into final format
+        node_info = (
+            "\n" + "-" * 50 + "\n".join(nodes_info)
+            if nodes_info
+            else "No developments recorded yet"
+        )
+        edge_info = (
+            "\n".join(edges_info) if edges_info else "No evolution paths recorded yet"
+        )
+        self._cached_summary = SUMMARY_TEMPLATE.format(
+            concept=self.graph.concept, node_info=node_info, edge_info=edge_info
+        )
+        self._cached_key = key
+        return self._cached_summary
+
+    def _node_fragment(self, node: Node) -> _Fragment:
+        cached = self._node_fragments.get(node.id)
+        if cached is not None and cached.item is node:
+            return cached
+
+        full = (
+            f"Node ID: {node.id}\n"
+            f"Time: {node.time_period}\n"
+            f"Region: {node.region}\n"
+            f"Key figures: {', '.join(node.key_contributors)}\n"
+            f"Summary: {node.main_idea_summary}\n"
+        )
+        words = node.main_idea_summary.split()
+        gist = " ".join(words[: self.CONDENSED_SUMMARY_WORDS])
+        if len(words) > self.CONDENSED_SUMMARY_WORDS:
+            gist += "..."
+        condensed = (
+            f"Node ID: {node.id} | {node.time_period} | {node.region} | {gist}\n"
+        )
+
+        fragment = _Fragment(
+            node,
+            full,
+            self.count_tokens(full),
+            condensed,
+            self.count_tokens(condensed),
+        )
+        self._node_fragments[node.id] = fragment
+        return fragment
+
+    def _edge_fragment(self, edge: Edge) -> _Fragment:
+        key = (edge.source_node_id, edge.target_node_id)
+        cached = self._edge_fragments.get(key)
+        if cached is not None and cached.item is edge:
+            return cached
+
+        full = (
+            f"From: {edge.source_node_id}\n"
+            f"To: {edge.target_node_id}\n"
+            f"Evolution: {edge.change_description}\n"
+        )
+        condensed = f"{edge.source_node_id} -> {edge.target_node_id}\n"
+
+        fragment = _Fragment(
+            edge,
+            full,
+            self.count_tokens(full),
+            condensed,
+            self.count_tokens(condensed),
+        )
+        self._edge_fragments[key] = fragment
+        return fragment
+
+    def _prune(self):
+        """Forget fragments for nodes and edges no longer in the graph"""
+        if len(self._node_fragments) > len(self.graph.nodes):
+            for node_id in list(self._node_fragments):
+                if not self.graph.has_node(node_id):
+                    del self._node_fragments[node_id]
+        if len(self._edge_fragments) > len(self.graph.edges):
+            for key in list(self._edge_fragments):
+                if not self.graph.has_edge(*key):
+                    del self._edge_fragments[key]
@@ -1,9 +1,12 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 from datetime import datetime
+import hashlib
 import uuid
-from typing import List, Dict
+from typing import Any, Iterable, List, Dict, Optional, Set, Tuple, Union
 import json
 
+from app.utils.serialization import model_to_json
+
 
 class Source(BaseModel):
     url: str
@@ -13,6 +16,11 @@ class Source(BaseModel):
     retrieved_at: datetime = Field(default_factory=datetime.now)
 
 
+def source_id(source: Source) -> str:
+    """Stable id of a source in an IdeaGraph's source table, derived from its URL"""
+    return hashlib.sha1(source.url.encode("utf-8")).hexdigest()[:12]
+
+
 class Node(BaseModel):
     """Represents a snapshot of an idea at a particular time and place"""
 
@@ -22,7 +30,9 @@ class Node(BaseModel):
     region: str
     key_contributors: List[str]
     main_idea_summary: str
-    sources: List[Source] = Field(default_factory=list)
+    source_ids: List[str] = Field(default_factory=list)
+    # Inline sources, moved into the graph's source table by IdeaGraph
+    sources: List[Source] = Field(default_factory=list, exclude=True)
 
     class Config:
         json_schema_extra = {
@@ -31,7 +41,7 @@ class Node(BaseModel):
                 "region": "Ancient Greece",
                 "key_contributors": ["Aristotle"],
                 "main_idea_summary": "Concept of individual moral agency...",
-                "sources": [],
+                "source_ids": [],
             }
         }
 
@@ -43,25 +53,308 @@ class Edge(BaseModel):
     target_node_id: str
     change_description: str
     weight: float = 1.0
-    sources: List[Source] = Field(default_factory=list)
+    source_ids: List[str] = Field(default_factory=list)
+    # Inline sources, moved into the graph's source table by IdeaGraph
+    sources: List[Source] = Field(default_factory=list, exclude=True)
+
+
+EdgeKey = Tuple[str, str]
 
 
 class IdeaGraph(BaseModel):
-    """Represents the complete evolution of an idea"""
+    """Represents the complete evolution of an idea
+
+    `nodes` and `edges` are the serialized form. Alongside them the graph keeps
+    an id -> node index, in/out adjacency maps and the set of edge keys, which
+    the mutation methods below keep consistent. Assigning `nodes` or `edges`
+    directly rebuilds the indexes.
+
+    Sources live once in the `sources` table, keyed by `source_id()`; nodes
+    and edges refer to them through `source_ids`. A node or edge built with
+    inline `sources` (or loaded from the older inlined JSON form) has them
+    moved into the table when it joins the graph. `inline_sources()` turns a
+    dump back into the inlined form for clients that still expect it.
+
+    When change recording is enabled, every mutation method also appends a
+    patch operation (see app/core/graph_stream.py) that can be drained and
+    replayed by clients holding an earlier copy of the graph.
+    """
 
     concept: str
     nodes: List[Node] = Field(default_factory=list)
     edges: List[Edge] = Field(default_factory=list)
+    sources: Dict[str, Source] = Field(default_factory=dict)
     metadata: Dict = Field(default_factory=dict)  # For future extensibility
 
-    def to_json(self) -> str:
-        """Serialize the graph to JSON string"""
-        return json.dumps(
-            self.model_dump(), indent=2, default=str  # Handles datetime serialization
+    _node_index: Dict[str, Node] = PrivateAttr(default_factory=dict)
+    _out_edges: Dict[str, Dict[str, Edge]] = PrivateAttr(default_factory=dict)
+    _in_edges: Dict[str, Dict[str, Edge]] = PrivateAttr(default_factory=dict)
+    _edge_keys: Set[EdgeKey] = PrivateAttr(default_factory=set)
+    _changes: Optional[List[Dict]] = PrivateAttr(default=None)
+    _version: int = PrivateAttr(default=0)
+
+    def model_post_init(self, __context: Any):
+        self.reindex()
+
+    def __setattr__(self, name: str, value: Any):
+        super().__setattr__(name, value)
+        if name in ("nodes", "edges"):
+            self.reindex()
+            # Wholesale replacement can't be expressed as a patch
+            self._record({"op": "reset"})
+
+    @property
+    def version(self) -> int:
+        """Incremented on every structural change to nodes or edges"""
+        return self._version
+
+    def reindex(self):
+        """Rebuild all indexes from the node and edge lists"""
+        self._version += 1
+        self._node_index = {node.id: node for node in self.nodes}
+        self._out_edges = {}
+        self._in_edges = {}
+        self._edge_keys = set()
+        for node in self.nodes:
+            self._adopt_sources(node)
+        for edge in self.edges:
+            self._adopt_sources(edge)
+            self._index_edge(edge)
+
+    def record_changes(self):
+        """Start recording patch operations for subsequent mutations"""
+        self._changes = []
+
+    def drain_changes(self) -> List[Dict]:
+        """Return and clear the operations recorded since the last drain"""
+        changes = self._changes or []
+        if self._changes is not None:
+            self._changes = []
+        return changes
+
+    def _record(self, op: Dict):
+        if self._changes is not None:
+            self._changes.append(op)
+
+    def _index_edge(self, edge: Edge):
+        self._edge_keys.add((edge.source_node_id, edge.target_node_id))
+        self._out_edges.setdefault(edge.source_node_id, {})[edge.target_node_id] = edge
+        self._in_edges.setdefault(edge.target_node_id, {})[edge.source_node_id] = edge
+
+    # Sources
+
+    def add_sources(self, sources: Iterable[Source]) -> List[str]:
+        """Register sources in the table and return their ids, in order"""
+        ids = []
+        added = {}
+        for source in sources:
+            key = source_id(source)
+            if key not in self.sources:
+                self.sources[key] = source
+                added[key] = source.model_dump()
+            ids.append(key)
+        if added:
+            self._record({"op": "add_sources", "sources": added})
+        return list(dict.fromkeys(ids))
+
+    def get_sources(self, item: Union[Node, Edge]) -> List[Source]:
+        """The sources a node or edge refers to"""
+        return [self.sources[key] for key in item.source_ids if key in self.sources]
+
+    def _adopt_sources(self, item: Union[Node, Edge]):
+        if not item.sources:
+            return
+        ids = self.add_sources(item.sources)
+        item.source_ids = list(dict.fromkeys(item.source_ids + ids))
+        item.sources = []
+
+    # Nodes
+
+    def get_node(self, node_id: str) -> Optional[Node]:
+        return self._node_index.get(node_id)
+
+    def has_node(self, node_id: str) -> bool:
+        return node_id in self._node_index
+
+    def add_node(self, node: Node):
+        if node.id in self._node_index:
+            raise ValueError(f"Node {node.id} already exists")
+        self._adopt_sources(node)
+        self.nodes.append(node)
+        self._node_index[node.id] = node
+        self._version += 1
+        self._record({"op": "add_node", "node": node.model_dump()})
+
+    def remove_nodes(self, node_ids: Iterable[str]):
+        """Remove nodes and every edge touching them"""
+        node_ids = set(node_ids) & self._node_index.keys()
+        if not node_ids:
+            return
+        self.nodes[:] = [node for node in self.nodes if node.id not in node_ids]
+        for node_id in node_ids:
+            del self._node_index[node_id]
+        self._version += 1
+
+        incident = self._incident_edge_keys(node_ids)
+        if incident:
+            self._drop_edges(incident)
+        self._record({"op": "remove_nodes", "ids": sorted(node_ids)})
+
+    # Edges
+
+    def has_edge(self, source_node_id: str, target_node_id: str) -> bool:
+        return (source_node_id, target_node_id) in self._edge_keys
+
+    def out_edges(self, node_id: str) -> List[Edge]:
+        return list(self._out_edges.get(node_id, {}).values())
+
+    def in_edges(self, node_id: str) -> List[Edge]:
+        return list(self._in_edges.get(node_id, {}).values())
+
+    def degree(self, node_id: str) -> int:
+        return len(self._out_edges.get(node_id, {})) + len(
+            self._in_edges.get(node_id, {})
+        )
+
+    def add_edge(self, edge: Edge) -> bool:
+        """Append an edge unless one with the same endpoints already exists"""
+        if self.has_edge(edge.source_node_id, edge.target_node_id):
+            return False
+        self._adopt_sources(edge)
+        self.edges.append(edge)
+        self._index_edge(edge)
+        self._version += 1
+        self._record({"op": "add_edge", "edge": edge.model_dump()})
+        return True
+
+    def set_edges(self, edges: Iterable[Edge]):
+        """Replace all edges, keeping the first of any duplicate (source, target)"""
+        if self._changes is None:
+            self._replace_edges(edges)
+            return
+
+        before = [edge.model_dump() for edge in self.edges]
+        self._replace_edges(edges)
+        after = [edge.model_dump() for edge in self.edges]
+        if after != before:
+            self._record({"op": "set_edges", "edges": after})
+
+    def _replace_edges(self, edges: Iterable[Edge]):
+        self._version += 1
+        self._out_edges = {}
+        self._in_edges = {}
+        self._edge_keys = set()
+        unique = []
+        for edge in edges:
+            if (edge.source_node_id, edge.target_node_id) in self._edge_keys:
+                continue
+            self._adopt_sources(edge)
+            unique.append(edge)
+            self._index_edge(edge)
+        self.edges[:] = unique
+
+    def _incident_edge_keys(self, node_ids: Set[str]) -> Set[EdgeKey]:
+        keys = set()
+        for node_id in node_ids:
+            for target_id in self._out_edges.get(node_id, {}):
+                keys.add((node_id, target_id))
+            for source_id in self._in_edges.get(node_id, {}):
+                keys.add((source_id, node_id))
+        return keys
+
+    def _drop_edges(self, keys: Set[EdgeKey]):
+        self.edges[:] = [
+            edge
+            for edge in self.edges
+            if (edge.source_node_id, edge.target_node_id) not in keys
+        ]
+        for source_id, target_id in keys:
+            self._edge_keys.discard((source_id, target_id))
+            self._out_edges.get(source_id, {}).pop(target_id, None)
+            self._in_edges.get(target_id, {}).pop(source_id, None)
+
+    def redirect_edges(self, old_node_ids: Iterable[str], new_node_id: str):
+        """Point every edge touching `old_node_ids` at `new_node_id`.
+
+        Self-loops created by the rewrite are dropped, as are rewritten edges
+        duplicating an existing connection. Edge order is preserved.
+        """
+        old_node_ids = set(old_node_ids)
+        if not self._incident_edge_keys(old_node_ids):
+            return
+
+        rewritten = []
+        for edge in self.edges:
+            source_id = (
+                new_node_id
+                if edge.source_node_id in old_node_ids
+                else edge.source_node_id
+            )
+            target_id = (
+                new_node_id
+                if edge.target_node_id in old_node_ids
+                else edge.target_node_id
+            )
+            if source_id == target_id:
+                continue
+            if source_id != edge.source_node_id or target_id != edge.target_node_id:
+                edge = Edge(
+                    source_node_id=source_id,
+                    target_node_id=target_id,
+                    change_description=edge.change_description,
+                    weight=edge.weight,
+                    source_ids=edge.source_ids,
+                )
+            rewritten.append(edge)
+        self._replace_edges(rewritten)
+        self._record(
+            {
+                "op": "redirect_edges",
+                "old_ids": sorted(old_node_ids),
+                "new_id": new_node_id,
+            }
         )
 
+    def merge_nodes(self, node_ids: Iterable[str], merged_node: Node):
+        """Replace `node_ids` with `merged_node`, rewiring their edges to it"""
+        node_ids = list(node_ids)
+        self.redirect_edges(node_ids, merged_node.id)
+        self.remove_nodes(node_ids)
+        self.add_node(merged_node)
+
+    def model_dump_inline(self, **kwargs) -> Dict[str, Any]:
+        """model_dump() in the older form, with sources copied into each item"""
+        return inline_sources(self.model_dump(**kwargs))
+
+    def to_json(self, indent: Optional[int] = None) -> str:
+        """Serialize the graph to JSON string"""
+        return model_to_json(self, indent=indent).decode("utf-8")
+
     @classmethod
     def from_json(cls, json_str: str) -> "IdeaGraph":
         """Create an IdeaGraph instance from a JSON string"""
         data = json.loads(json_str)
         return cls(**data)
+
+
+def inline_sources(graph: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a graph dump with a source table to the inlined form.
+
+    Each node and edge gets `sources: [...]` in place of `source_ids` and the
+    table is dropped. Dumps already in the inlined form are returned as is.
+    """
+    if "sources" not in graph:
+        return graph
+    table = graph["sources"]
+
+    def inline(item: Dict[str, Any]) -> Dict[str, Any]:
+        item = dict(item)
+        item["sources"] = [
+            table[key] for key in item.pop("source_ids", []) if key in table
+        ]
+        return item
+
+    inlined = {key: value for key, value in graph.items() if key != "sources"}
+    inlined["nodes"] = [inline(node) for node in graph.get("nodes", [])]
+    inlined["edges"] = [inline(edge) for edge in graph.get("edges", [])]
+    return inlined
@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict, field
 from typing import Optional, List, Dict, Any
 from enum import Enum
 
@@ -29,7 +29,16 @@ class TokenUsageDetails:
 class ChatMessage:
     role: str
     content: Optional[str]
+    # The first call, for callers that expect exactly one
     function_call: Optional[FunctionCall] = None
+    # Every call in the message, in order
+    tool_calls: List[FunctionCall] = field(default_factory=list)
+
+    def __post_init__(self):
+        if self.function_call and not self.tool_calls:
+            self.tool_calls = [self.function_call]
+        elif self.tool_calls and not self.function_call:
+            self.function_call = self.tool_calls[0]
 
 
 @dataclass
@@ -46,6 +55,43 @@ class ChatCompletion:
     created: int
     model: str
     usage: TokenUsageDetails
+    # Served from the LLM cache; usage is then zero, as no tokens were spent
+    cached: bool = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ChatCompletion":
+        """Inverse of to_dict()"""
+        choices = []
+        for choice in data["choices"]:
+            message = choice["message"]
+            function_call = message.get("function_call")
+            # Entries written before tool_calls existed only have function_call
+            tool_calls = message.get("tool_calls") or []
+            choices.append(
+                Choice(
+                    finish_reason=choice["finish_reason"],
+                    index=choice["index"],
+                    message=ChatMessage(
+                        role=message["role"],
+                        content=message["content"],
+                        function_call=(
+                            FunctionCall(**function_call) if function_call else None
+                        ),
+                        tool_calls=[FunctionCall(**call) for call in tool_calls],
+                    ),
+                )
+            )
+        return cls(
+            id=data["id"],
+            choices=choices,
+            created=data["created"],
+            model=data["model"],
+            usage=TokenUsageDetails(**data["usage"]),
+            cached=data.get("cached", False),
+        )
 
     @classmethod
     def from_openai_response(cls, response: Any) -> "ChatCompletion":
@@ -58,11 +104,20 @@ class ChatCompletion:
                     name=choice.message.function_call.name,
                     arguments=choice.message.function_call.arguments,
                 )
+            tool_calls = [
+                FunctionCall(
+                    name=tool_call.function.name,
+                    arguments=tool_call.function.arguments,
+                )
+                for tool_call in getattr(choice.message, "tool_calls", None) or []
+                if tool_call.type == "function"
+            ]
 
             message = ChatMessage(
                 role=choice.message.role,
                 content=choice.message.content,
                 function_call=function_call,
+                tool_calls=tool_calls,
             )
 
             choices.append(
@@ -99,10 +154,16 @@ class ChatCompletion:
                     arguments=choice["message"]["function_call"]["arguments"],
                 )
 
+            tool_calls = [
+                FunctionCall(name=call["name"], arguments=call["arguments"])
+                for call in choice["message"].get("tool_calls") or []
+            ]
+
             message = ChatMessage(
                 role=choice["message"]["role"],
                 content=choice["message"]["content"],
                 function_call=function_call,
+                tool_calls=tool_calls,
             )
 
             choices.append(
@@ -1,6 +1,8 @@
 # app/services/llm/base.py
 from abc import ABC, abstractmethod
-from typing import List, Dict, Optional, Any
+from typing import AsyncIterator, Callable, List, Dict, Optional, Any
+
+from app.models.responses import FunctionCall, TokenUsageDetails
 
 
 class BaseChatClient(ABC):
@@ -16,3 +18,28 @@ class BaseChatClient(ABC):
     ) -> Any:
         """Generate chat completion"""
         pass
+
+    async def stream_function_calls(
+        self,
+        messages: List[Dict[str, str]],
+        functions: Optional[List[Dict]] = None,
+        function_call: Optional[Dict] = None,
+        on_usage: Optional[Callable[[TokenUsageDetails], None]] = None,
+        **kwargs
+    ) -> AsyncIterator[FunctionCall]:
+        """Yield each function call in the reply as soon as it is complete.
+
+        This default waits for the whole completion; clients that can parse
+        the provider's stream override it.
+        """
+        response = await self.chat_completion(
+            messages=messages,
+            functions=functions,
+            function_call=function_call,
+            **kwargs,
+        )
+        if on_usage is not None and getattr(response, "usage", None) is not None:
+            on_usage(response.usage)
+        for choice in response.choices:
+            for call in choice.message.tool_calls:
+                yield call
@@ -0,0 +1,214 @@
+# services/llm/cache.py
+from typing import AsyncIterator, Callable, List, Dict, Optional, Any
+import dataclasses
+import hashlib
+import json
+import time
+import uuid
+
+from app.services.llm.base import BaseChatClient
+from app.models.responses import (
+    ChatCompletion,
+    ChatMessage,
+    Choice,
+    FunctionCall,
+    TokenUsageDetails,
+)
+from app.config.settings import settings
+from app.utils.cache import CacheBackend, MemoryCacheBackend, SQLiteCacheBackend
+
+
+class LLMCache:
+    """Content-addressed store of normalized ChatCompletions"""
+
+    def __init__(
+        self,
+        backend: CacheBackend,
+        ttl: Optional[float] = None,
+        max_entry_bytes: Optional[int] = None,
+    ):
+        self.backend = backend
+        self.ttl = ttl
+        self.max_entry_bytes = max_entry_bytes
+        self.tokens_saved = 0
+        self.skipped_oversize = 0
+
+    @classmethod
+    def from_settings(cls) -> "LLMCache":
+        if settings.LLM_CACHE_BACKEND == "sqlite":
+            backend = SQLiteCacheBackend(
+                settings.LLM_CACHE_PATH,
+                max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+                table="llm_cache",
+            )
+        elif settings.LLM_CACHE_BACKEND == "memory":
+            backend = MemoryCacheBackend(max_entries=settings.LLM_CACHE_MAX_ENTRIES)
+        else:
+            raise ValueError(f"Unknown LLM cache backend: {settings.LLM_CACHE_BACKEND}")
+        return cls(
+            backend=backend,
+            ttl=settings.LLM_CACHE_TTL,
+            max_entry_bytes=settings.LLM_CACHE_MAX_ENTRY_BYTES,
+        )
+
+    @staticmethod
+    def make_key(
+        model: str,
+        messages: List[Dict[str, str]],
+        functions: Optional[List[Dict]] = None,
+        function_call: Optional[Any] = None,
+        **kwargs,
+    ) -> str:
+        """Stable hash of everything that determines the completion"""
+        payload = {
+            "model": model,
+            "messages": messages,
+            "functions": functions,
+            "function_call": function_call,
+            "kwargs": kwargs,
+        }
+        canonical = json.dumps(
+            payload,
+            sort_keys=True,
+            separators=(",", ":"),
+            ensure_ascii=False,
+            default=str,
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[ChatCompletion]:
+        value = self.backend.get(key)
+        if value is None:
+            return None
+        completion = ChatCompletion.from_dict(json.loads(value))
+        self.tokens_saved += completion.usage.total_tokens
+        return completion
+
+    def set(self, key: str, completion: ChatCompletion):
+        value = json.dumps(dataclasses.replace(completion, cached=False).to_dict())
+        if self.max_entry_bytes and len(value) > self.max_entry_bytes:
+            self.skipped_oversize += 1
+            return
+        self.backend.set(key, value, ttl=self.ttl)
+
+    def stats(self) -> Dict:
+        return {
+            **self.backend.stats.to_dict(),
+            "entries": len(self.backend),
+            "tokens_saved": self.tokens_saved,
+            "skipped_oversize": self.skipped_oversize,
+        }
+
+    def close(self):
+        self.backend.close()
+
+
+class CachedChatClient(BaseChatClient):
+    """Serves repeated identical requests from an LLMCache instead of the provider.
+
+    Hits are marked `cached` and report zero usage, so callers only count
+    tokens actually spent; the tokens saved are in LLMCache.stats().
+    """
+
+    def __init__(self, client: BaseChatClient, cache: LLMCache):
+        self.client = client
+        self.cache = cache
+        self.model = getattr(client, "model", type(client).__name__)
+
+    async def chat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        functions: Optional[List[Dict]] = None,
+        function_call: Optional[Dict] = None,
+        **kwargs,
+    ) -> ChatCompletion:
+        key = self.cache.make_key(
+            self.model, messages, functions, function_call, **kwargs
+        )
+        cached = self.cache.get(key)
+        if cached is not None:
+            return self._as_hit(cached)
+
+        response = await self.client.chat_completion(
+            messages=messages,
+            functions=functions,
+            function_call=function_call,
+            **kwargs,
+        )
+        if not isinstance(response, ChatCompletion):
+            response = ChatCompletion.from_openai_response(response)
+        self.cache.set(key, response)
+        return response
+
+    async def stream_function_calls(
+        self,
+        messages: List[Dict[str, str]],
+        functions: Optional[List[Dict]] = None,
+        function_call: Optional[Dict] = None,
+        on_usage: Optional[Callable[[TokenUsageDetails], None]] = None,
+        **kwargs,
+    ) -> AsyncIterator[FunctionCall]:
+        # Same key as chat_completion: a streamed reply is stored as a
+        # regular completion, so either path can reuse it
+        key = self.cache.make_key(
+            self.model, messages, functions, function_call, **kwargs
+        )
+        cached = self.cache.get(key)
+        if cached is not None:
+            # No usage reported: no tokens were spent
+            for choice in cached.choices:
+                for call in choice.message.tool_calls:
+                    yield call
+            return
+
+        calls: List[FunctionCall] = []
+        usages: List[TokenUsageDetails] = []
+
+        def record_usage(usage: TokenUsageDetails):
+            usages.append(usage)
+            if on_usage is not None:
+                on_usage(usage)
+
+        async for call in self.client.stream_function_calls(
+            messages=messages,
+            functions=functions,
+            function_call=function_call,
+            on_usage=record_usage,
+            **kwargs,
+        ):
+            calls.append(call)
+            yield call
+
+        self.cache.set(key, self._completion_from_calls(calls, usages))
+
+    @staticmethod
+    def _as_hit(completion: ChatCompletion) -> ChatCompletion:
+        return dataclasses.replace(
+            completion,
+            usage=TokenUsageDetails(
+                prompt_tokens=0, completion_tokens=0, total_tokens=0
+            ),
+            cached=True,
+        )
+
+    def _completion_from_calls(
+        self, calls: List[FunctionCall], usages: List[TokenUsageDetails]
+    ) -> ChatCompletion:
+        choice = Choice(
+            finish_reason="tool_calls" if calls else "stop",
+            index=0,
+            message=ChatMessage(role="assistant", content=None, tool_calls=calls),
+        )
+        prompt_tokens = sum(usage.prompt_tokens for usage in usages)
+        completion_tokens = sum(usage.completion_tokens for usage in usages)
+        return ChatCompletion(
+            id=f"stream-{uuid.uuid4().hex}",
+            choices=[choice],
+            created=int(time.time()),
+            model=self.model,
+            usage=TokenUsageDetails(
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                total_tokens=prompt_tokens + completion_tokens,
+            ),
+        )
@@ -1,18 +1,30 @@
 # services/llm/claude_client.py
-from typing import List, Dict, Optional, Any
+from contextlib import AsyncExitStack
+from typing import AsyncIterator, Callable, List, Dict, Optional, Any, Tuple
 import json
 from anthropic import AsyncAnthropic
 import time
 
 from app.services.llm.base import BaseChatClient
+from app.services.llm.streaming import ToolCallAssembler
 from app.config.settings import settings
-from app.models.responses import ChatCompletion
+from app.models.responses import ChatCompletion, FunctionCall, TokenUsageDetails
+from app.utils.rate_limit import estimate_request_tokens, get_limiter
+from app.utils.resilience import (
+    RetryPolicy,
+    call_with_retry,
+    classify_error,
+    iterate_with_deadline,
+)
 
 
 class ClaudeChatClient(BaseChatClient):
     def __init__(self, model: str = "claude-3-5-haiku-20241022"):
-        self.client = AsyncAnthropic(api_key=settings.CLAUDE_API_KEY)
+        # Retries are handled by call_with_retry, not the SDK
+        self.client = AsyncAnthropic(api_key=settings.CLAUDE_API_KEY, max_retries=0)
         self.model = model
+        self.limiter = get_limiter("anthropic")
+        self.retry_policy = RetryPolicy.from_settings("LLM")
 
     def _convert_functions_to_tools(self, functions: List[Dict]) -> List[Dict]:
         """Convert OpenAI function format to Claude tools format"""
@@ -31,8 +43,8 @@ class ClaudeChatClient(BaseChatClient):
 
     def _convert_claude_response_to_openai(self, claude_response) -> Dict:
         """Convert Claude response format to match OpenAI's structure"""
-        # Extract tool use if present
-        function_call = None
+        # Extract every tool use block; Claude may call tools in parallel
+        tool_calls = []
         content = None
         finish_reason = claude_response.stop_reason
 
@@ -40,10 +52,12 @@ class ClaudeChatClient(BaseChatClient):
             if isinstance(claude_response.content, list):
                 for block in claude_response.content:
                     if block.type == "tool_use":
-                        function_call = {
-                            "name": block.name,
-                            "arguments": json.dumps(block.input),
-                        }
+                        tool_calls.append(
+                            {
+                                "name": block.name,
+                                "arguments": json.dumps(block.input),
+                            }
+                        )
                     elif block.type == "text":
                         content = block.text
             else:
@@ -56,7 +70,8 @@ class ClaudeChatClient(BaseChatClient):
             "message": {
                 "role": claude_response.role,
                 "content": content,
-                "function_call": function_call,
+                "function_call": tool_calls[0] if tool_calls else None,
+                "tool_calls": tool_calls,
             },
         }
 
@@ -85,21 +100,147 @@ class ClaudeChatClient(BaseChatClient):
     ) -> ChatCompletion:
         """Generate chat completion using Claude API"""
         try:
-            request_params = {
-                "model": self.model,
-                "messages": messages,
-                "max_tokens": kwargs.get("max_tokens", 1024),
-            }
+            request_params = self._build_request(
+                messages, functions, function_call, **kwargs
+            )
+            return await call_with_retry(
+                lambda: self._create(request_params),
+                self.retry_policy,
+                name="anthropic",
+            )
+
+        except Exception as e:
+            print(f"Claude API error: {str(e)}")
+            raise
+
+    def _convert_function_call(self, function_call: Optional[Any]) -> Dict:
+        """Map a function_call value ("auto", {"name": ...}) to tool_choice"""
+        if isinstance(function_call, dict):
+            return {"type": "tool", "name": function_call["name"]}
+        return {"type": "auto"}
+
+    def _build_request(
+        self,
+        messages: List[Dict[str, str]],
+        functions: Optional[List[Dict]] = None,
+        function_call: Optional[Any] = None,
+        **kwargs,
+    ) -> Dict:
+        request_params = {
+            "model": self.model,
+            "messages": messages,
+            "max_tokens": kwargs.get("max_tokens", 1024),
+        }
 
-            if functions:
-                tools = self._convert_functions_to_tools(functions)
-                request_params["tools"] = tools
-                # Fix this later, default to auto
-                request_params["tool_choice"] = {"type": "auto"}
+        if functions:
+            tools = self._convert_functions_to_tools(functions)
+            request_params["tools"] = tools
+            # Forced calls (judge, next query, merge) must come back as a tool use
+            request_params["tool_choice"] = self._convert_function_call(function_call)
+        return request_params
 
+    async def _create(self, request_params: Dict) -> ChatCompletion:
+        async with self.limiter.limit(
+            tokens=estimate_request_tokens(
+                request_params["messages"],
+                request_params.get("tools"),
+                request_params["max_tokens"],
+            )
+        ) as permit:
             response = await self.client.messages.create(**request_params)
-            return self._convert_claude_response_to_openai(response)
+            completion = self._convert_claude_response_to_openai(response)
+            permit.record_tokens(completion.usage.total_tokens)
+        return completion
 
+    async def stream_function_calls(
+        self,
+        messages: List[Dict[str, str]],
+        functions: Optional[List[Dict]] = None,
+        function_call: Optional[Dict] = None,
+        on_usage: Optional[Callable[[TokenUsageDetails], None]] = None,
+        **kwargs,
+    ) -> AsyncIterator[FunctionCall]:
+        """Yield tool_use blocks as soon as their input JSON closes"""
+        request_params = self._build_request(
+            messages, functions, function_call, **kwargs
+        )
+        assembler = ToolCallAssembler()
+        prompt_tokens = completion_tokens = 0
+        started = time.monotonic()
+        opened = yielded = False
+        try:
+            # Only opening the stream is retried; once calls have been
+            # yielded a retry would hand them out twice
+            permit_scope, permit, stream = await call_with_retry(
+                lambda: self._open_stream(request_params),
+                self.retry_policy,
+                name="anthropic",
+            )
+            opened = True
+            async with permit_scope:
+                async for event in iterate_with_deadline(
+                    stream, self.retry_policy, started, name="anthropic"
+                ):
+                    if event.type == "message_start":
+                        prompt_tokens = event.message.usage.input_tokens
+                    elif event.type == "content_block_start":
+                        if event.content_block.type == "tool_use":
+                            assembler.feed(event.index, name=event.content_block.name)
+                    elif event.type == "content_block_delta":
+                        if event.delta.type == "input_json_delta":
+                            for call in assembler.feed(
+                                event.index, arguments=event.delta.partial_json
+                            ):
+                                yielded = True
+                                yield call
+                    elif event.type == "content_block_stop":
+                        for call in assembler.finish(event.index):
+                            yielded = True
+                            yield call
+                    elif event.type == "message_delta":
+                        completion_tokens = event.usage.output_tokens
+
+                usage = TokenUsageDetails(
+                    prompt_tokens=prompt_tokens,
+                    completion_tokens=completion_tokens,
+                    total_tokens=prompt_tokens + completion_tokens,
+                )
+                permit.record_tokens(usage.total_tokens)
+                if on_usage is not None:
+                    on_usage(usage)
         except Exception as e:
             print(f"Claude API error: {str(e)}")
+            # A stream that stalled or broke before any call was handed out
+            # is redone as one non-streamed completion
+            if yielded or not opened or classify_error(e)[0] is None:
+                raise
+            async for call in super().stream_function_calls(
+                messages, functions, function_call, on_usage, **kwargs
+            ):
+                yield call
+            return
+
+        for call in assembler.finish():
+            yield call
+
+    async def _open_stream(
+        self, request_params: Dict
+    ) -> Tuple[AsyncExitStack, Any, Any]:
+        """One attempt at opening a stream. As in _create, each attempt takes its
+        own limiter permit, held until the returned scope is closed"""
+        permit_scope = AsyncExitStack()
+        permit = await permit_scope.enter_async_context(
+            self.limiter.limit(
+                tokens=estimate_request_tokens(
+                    request_params["messages"],
+                    request_params.get("tools"),
+                    request_params["max_tokens"],
+                )
+            )
+        )
+        try:
+            stream = await self.client.messages.create(**request_params, stream=True)
+        except BaseException:
+            await permit_scope.aclose()
             raise
+        return permit_scope, permit, stream
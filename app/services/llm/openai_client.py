@@ -1,13 +1,30 @@
-from typing import List, Dict, Optional, Any
+import time
+from contextlib import AsyncExitStack
+from typing import AsyncIterator, Callable, List, Dict, Optional, Any, Tuple
 from openai import AsyncOpenAI
 from app.services.llm.base import BaseChatClient
+from app.services.llm.streaming import ToolCallAssembler
 from app.config.settings import settings
+from app.models.responses import ChatCompletion, FunctionCall, TokenUsageDetails
+from app.utils.rate_limit import estimate_request_tokens, get_limiter
+from app.utils.resilience import (
+    RetryPolicy,
+    call_with_retry,
+    classify_error,
+    iterate_with_deadline,
+)
+
+# Reasoning models reject the parallel_tool_calls parameter
+NO_PARALLEL_TOOL_CALLS_PREFIXES = ("o1", "o3", "o4")
 
 
 class OpenAIChatClient(BaseChatClient):
     def __init__(self, model: str = "gpt-4o-mini"):
-        self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        # Retries are handled by call_with_retry, not the SDK
+        self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY, max_retries=0)
         self.model = model
+        self.limiter = get_limiter("openai")
+        self.retry_policy = RetryPolicy.from_settings("LLM")
 
     async def chat_completion(
         self,
@@ -15,15 +32,146 @@ class OpenAIChatClient(BaseChatClient):
         functions: Optional[List[Dict]] = None,
         function_call: Optional[Dict] = None,
         **kwargs,
-    ) -> Any:
+    ) -> ChatCompletion:
         try:
+            return await call_with_retry(
+                lambda: self._create(messages, functions, function_call),
+                self.retry_policy,
+                name="openai",
+            )
+        except Exception as e:
+            print(f"OpenAI API error: {str(e)}")
+            raise
+
+    def _convert_functions_to_tools(self, functions: List[Dict]) -> List[Dict]:
+        """Wrap function schemas in the tools format"""
+        return [{"type": "function", "function": function} for function in functions]
+
+    def _convert_function_call(self, function_call: Optional[Any]) -> Any:
+        """Map a legacy function_call value ("auto", {"name": ...}) to tool_choice"""
+        if function_call is None:
+            return "auto"
+        if isinstance(function_call, dict):
+            return {"type": "function", "function": {"name": function_call["name"]}}
+        return function_call
+
+    def _build_request(
+        self,
+        messages: List[Dict[str, str]],
+        functions: Optional[List[Dict]],
+        function_call: Optional[Any],
+    ) -> Dict:
+        request = {"model": self.model, "messages": messages}
+        if functions:
+            tool_choice = self._convert_function_call(function_call)
+            request["tools"] = self._convert_functions_to_tools(functions)
+            request["tool_choice"] = tool_choice
+            # Let "auto" calls (node/edge extraction) return many calls at
+            # once; forced calls (judge, next query, merge) get one call
+            # anyway. Only sent when needed, as some models reject it
+            if tool_choice == "auto" and not self.model.startswith(
+                NO_PARALLEL_TOOL_CALLS_PREFIXES
+            ):
+                request["parallel_tool_calls"] = True
+        return request
+
+    async def _create(
+        self,
+        messages: List[Dict[str, str]],
+        functions: Optional[List[Dict]],
+        function_call: Optional[Dict],
+    ) -> ChatCompletion:
+        async with self.limiter.limit(
+            tokens=estimate_request_tokens(messages, functions)
+        ) as permit:
             response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                functions=functions,
-                function_call=function_call,
+                **self._build_request(messages, functions, function_call)
+            )
+            completion = ChatCompletion.from_openai_response(response)
+            permit.record_tokens(completion.usage.total_tokens)
+        return completion
+
+    async def stream_function_calls(
+        self,
+        messages: List[Dict[str, str]],
+        functions: Optional[List[Dict]] = None,
+        function_call: Optional[Dict] = None,
+        on_usage: Optional[Callable[[TokenUsageDetails], None]] = None,
+        **kwargs,
+    ) -> AsyncIterator[FunctionCall]:
+        """Yield function/tool calls as soon as their arguments close"""
+        assembler = ToolCallAssembler()
+        started = time.monotonic()
+        opened = yielded = False
+        try:
+            # Only opening the stream is retried; once calls have been
+            # yielded a retry would hand them out twice
+            permit_scope, permit, stream = await call_with_retry(
+                lambda: self._open_stream(messages, functions, function_call),
+                self.retry_policy,
+                name="openai",
             )
-            return response
+            opened = True
+            async with permit_scope:
+                async for chunk in iterate_with_deadline(
+                    stream, self.retry_policy, started, name="openai"
+                ):
+                    for choice in chunk.choices:
+                        for tool_call in choice.delta.tool_calls or []:
+                            if tool_call.function is None:
+                                continue
+                            for call in assembler.feed(
+                                (choice.index, tool_call.index),
+                                tool_call.function.name,
+                                tool_call.function.arguments,
+                            ):
+                                yielded = True
+                                yield call
+
+                    # Sent on the final chunk, which has no choices
+                    if chunk.usage is not None:
+                        usage = TokenUsageDetails(
+                            prompt_tokens=chunk.usage.prompt_tokens,
+                            completion_tokens=chunk.usage.completion_tokens,
+                            total_tokens=chunk.usage.total_tokens,
+                        )
+                        permit.record_tokens(usage.total_tokens)
+                        if on_usage is not None:
+                            on_usage(usage)
         except Exception as e:
             print(f"OpenAI API error: {str(e)}")
+            # A stream that stalled or broke before any call was handed out
+            # is redone as one non-streamed completion
+            if yielded or not opened or classify_error(e)[0] is None:
+                raise
+            async for call in super().stream_function_calls(
+                messages, functions, function_call, on_usage, **kwargs
+            ):
+                yield call
+            return
+
+        for call in assembler.finish():
+            yield call
+
+    async def _open_stream(
+        self,
+        messages: List[Dict[str, str]],
+        functions: Optional[List[Dict]],
+        function_call: Optional[Dict],
+    ) -> Tuple[AsyncExitStack, Any, Any]:
+        """One attempt at opening a stream. As in _create, each attempt takes its
+        own limiter permit, held until the returned scope is closed"""
+        permit_scope = AsyncExitStack()
+        permit = await permit_scope.enter_async_context(
+            self.limiter.limit(tokens=estimate_request_tokens(messages, functions))
+        )
+        try:
+            stream = await self.client.chat.completions.create(
+                **self._build_request(messages, functions, function_call),
+                stream=True,
+                stream_options={"include_usage": True},
+            )
+        except BaseException:
+            await permit_scope.aclose()
             raise
+        return permit_scope, permit, stream
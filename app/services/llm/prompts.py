@@ -18,6 +18,39 @@ If there is not a lot of knowledge about the concept, try to write a query that
 ### New Search Query ###
 """
 
+QUERY_FANOUT_PROMPT = """
+Your task is to suggest the next {num_queries} search queries to expand our understanding of {concept}.
+
+### Current Knowledge ###
+{summary}
+
+### Previous Search Query ###
+{previous_query}
+
+Based on this information, formulate {num_queries} different search queries that will be run in parallel. Together they should help us discover:
+1. New time periods or regions we haven't covered
+2. Important transitions or influences we're missing
+3. Key figures or developments that should be included
+
+Each query should target a different gap, so that their results overlap as little as possible. Do not be too specific! The emphasis should be on finding new information across different time periods and regions, not getting super specific about just one version of the concept.
+
+### New Search Queries ###
+"""
+
+MERGE_CLUSTERS_PROMPT = """
+Below are groups of nodes from a graph of how the concept '{concept}' evolved. Nodes within a group look similar, but may still be distinct developments.
+For each group, decide which nodes (if any) describe the same conceptual development and should be merged. Consider:
+- Temporal proximity
+- Geographic overlap
+- Similar key contributors
+- Similar main ideas
+
+Only merge nodes from the same group. A group may yield several merges or none; leave distinct developments separate.
+
+### Candidate Groups ###
+{clusters}
+"""
+
 SUMMARY_TEMPLATE = """
 Current Understanding of {concept}:
 
@@ -38,6 +71,7 @@ PROCESS_SOURCES_PROMPT = {
     Given these new sources, update the graph structure to reflect the new information. You can only add nodes, not remove or modify existing ones.
     If a source is not relevant to the concept, ignore it. If a source is relevant, but does not provide new information (i.e. a node is already present), ignore it.
     That being said, you should be very liberal with your use of the 'create_node' function.
+    Call 'create_node' once for every new node, all in this single response.
 
     Sources:
     {sources_text}
@@ -53,6 +87,7 @@ PROCESS_SOURCES_PROMPT = {
     You are not required to add new edges! If there is only one node, do not add an edge. Only add edges if there is a meaningful connection between two distinct nodes. If there is an edge between two nodes, do not add a new edge between them!
 
     If a source is not relevant to the concept, ignore it. If a source is relevant, but does not provide new information (i.e. an edge is already present), ignore it. 
+    Call 'create_edge' once for every new edge, all in this single response.
     Sources:
     {sources_text}
 """,
@@ -106,6 +106,22 @@ MERGE_NODES_SCHEMA = {
     },
 }
 
+MERGE_NODE_GROUPS_SCHEMA = {
+    "name": "merge_node_groups",
+    "description": "Decide which nodes in the candidate groups represent the same conceptual development",
+    "parameters": {
+        "type": "object",
+        "properties": {
+            "merges": {
+                "type": "array",
+                "description": "One entry per set of nodes to merge into a single node. Empty if nothing should be merged.",
+                "items": MERGE_NODES_SCHEMA["parameters"],
+            },
+        },
+        "required": ["merges"],
+    },
+}
+
 GENERATE_NEXT_QUERY_SCHEMA = {
     "name": "generate_next_query",
     "description": "Generate next search query based on current information gaps",
@@ -124,3 +140,23 @@ GENERATE_NEXT_QUERY_SCHEMA = {
         "required": ["query", "reasoning"],
     },
 }
+
+GENERATE_NEXT_QUERIES_SCHEMA = {
+    "name": "generate_next_queries",
+    "description": "Generate a set of diverse search queries that together cover the current information gaps",
+    "parameters": {
+        "type": "object",
+        "properties": {
+            "queries": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "Search queries, each concise and in the style of a Google query. Each should target a different gap (time period, region or transition) so their results overlap as little as possible.",
+            },
+            "reasoning": {
+                "type": "string",
+                "description": "Explanation of which gap each query targets. Can be a single sentence or a few sentences.",
+            },
+        },
+        "required": ["queries", "reasoning"],
+    },
+}
@@ -0,0 +1,111 @@
+# services/llm/streaming.py
+"""
+Incremental parsing of streamed function/tool-call arguments.
+
+Providers stream call arguments as arbitrary JSON fragments. `JSONObjectScanner`
+tracks nesting (ignoring braces inside strings) so it can tell the moment a
+top-level object closes, and `ToolCallAssembler` uses one scanner per call to
+hand each finished invocation to the caller while the rest of the completion
+is still being generated.
+"""
+
+from typing import Dict, Hashable, List, Optional
+
+from app.models.responses import FunctionCall
+
+
+class JSONObjectScanner:
+    """Splits a stream of characters into complete top-level JSON objects.
+
+    Text outside objects (whitespace, stray separators) is dropped. Several
+    objects in a row - which some models emit inside a single arguments
+    string - are returned separately.
+    """
+
+    def __init__(self):
+        self._buffer: List[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    @property
+    def pending(self) -> str:
+        """The partial object received so far"""
+        return "".join(self._buffer)
+
+    def feed(self, text: str) -> List[str]:
+        completed = []
+        for char in text:
+            if self._depth == 0:
+                if char != "{":
+                    continue
+                self._buffer = []
+
+            self._buffer.append(char)
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    completed.append("".join(self._buffer))
+                    self._buffer = []
+        return completed
+
+
+class _PartialCall:
+    def __init__(self):
+        self.name = ""
+        self.scanner = JSONObjectScanner()
+        self.emitted = 0
+
+
+class ToolCallAssembler:
+    """Collects streamed call fragments, keyed by the provider's call index
+    (any hashable, e.g. (choice, tool call) pairs)"""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _PartialCall] = {}
+
+    def feed(
+        self,
+        index: Hashable,
+        name: Optional[str] = None,
+        arguments: Optional[str] = None,
+    ) -> List[FunctionCall]:
+        """Add a fragment; returns the calls whose arguments just closed"""
+        call = self._calls.setdefault(index, _PartialCall())
+        if name:
+            call.name += name
+        if not arguments:
+            return []
+        completed = call.scanner.feed(arguments)
+        call.emitted += len(completed)
+        return [FunctionCall(name=call.name, arguments=text) for text in completed]
+
+    def finish(self, index: Optional[Hashable] = None) -> List[FunctionCall]:
+        """Close one call (or all of them).
+
+        A call that never received arguments is returned with "{}"; a
+        truncated object is returned as-is so the caller can report it.
+        """
+        indexes = [index] if index is not None else list(self._calls)
+        leftovers = []
+        for i in indexes:
+            call = self._calls.pop(i, None)
+            if call is None or not call.name:
+                continue
+            pending = call.scanner.pending
+            if pending:
+                leftovers.append(FunctionCall(name=call.name, arguments=pending))
+            elif not call.emitted:
+                leftovers.append(FunctionCall(name=call.name, arguments="{}"))
+        return leftovers
@@ -10,3 +10,11 @@ class BaseSearchClient(ABC):
     def search(self, query: str, **kwargs) -> List[Source]:
         """Search for information related to the query"""
         pass
+
+    async def start(self):
+        """Acquire long-lived resources (e.g. pooled HTTP sessions)"""
+        pass
+
+    async def close(self):
+        """Release resources acquired in start()"""
+        pass
@@ -0,0 +1,116 @@
+# services/search/cache.py
+from typing import Dict, List, Optional
+import hashlib
+import json
+import re
+
+from app.models.base import Source
+from app.services.search.base import BaseSearchClient
+from app.config.settings import settings
+from app.utils.cache import (
+    CacheBackend,
+    MemoryCacheBackend,
+    SQLiteCacheBackend,
+    TieredCache,
+)
+
+
+def normalize_query(query: str) -> str:
+    """Collapse case and whitespace so trivially different queries share a key"""
+    return re.sub(r"\s+", " ", query).strip().lower()
+
+
+class SearchCache:
+    """Caches search results per provider with provider-specific TTLs"""
+
+    def __init__(
+        self,
+        backend: CacheBackend,
+        ttls: Optional[Dict[str, float]] = None,
+        default_ttl: Optional[float] = None,
+    ):
+        self.backend = backend
+        self.ttls = ttls or {}
+        self.default_ttl = default_ttl
+
+    @classmethod
+    def from_settings(cls) -> "SearchCache":
+        tiers: List[CacheBackend] = [
+            MemoryCacheBackend(max_entries=settings.SEARCH_CACHE_MEMORY_ENTRIES)
+        ]
+        if settings.SEARCH_CACHE_PATH:
+            tiers.append(
+                SQLiteCacheBackend(
+                    settings.SEARCH_CACHE_PATH,
+                    max_entries=settings.SEARCH_CACHE_DISK_ENTRIES,
+                    table="search_cache",
+                )
+            )
+        return cls(
+            backend=TieredCache(tiers),
+            ttls={
+                "google": settings.SEARCH_CACHE_TTL_GOOGLE,
+                "wikipedia": settings.SEARCH_CACHE_TTL_WIKIPEDIA,
+            },
+        )
+
+    def make_key(self, provider: str, query: str, num_results: int) -> str:
+        raw = f"{provider}\x00{normalize_query(query)}\x00{num_results}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(
+        self, provider: str, query: str, num_results: int
+    ) -> Optional[List[Source]]:
+        value = self.backend.get(self.make_key(provider, query, num_results))
+        if value is None:
+            return None
+        return [Source.model_validate(item) for item in json.loads(value)]
+
+    def set(self, provider: str, query: str, num_results: int, sources: List[Source]):
+        value = json.dumps([source.model_dump(mode="json") for source in sources])
+        self.backend.set(
+            self.make_key(provider, query, num_results),
+            value,
+            ttl=self.ttls.get(provider, self.default_ttl),
+        )
+
+    def stats(self) -> Dict:
+        stats = {"overall": self.backend.stats.to_dict()}
+        if isinstance(self.backend, TieredCache):
+            stats["tiers"] = self.backend.tier_stats()
+        return stats
+
+    def close(self):
+        self.backend.close()
+
+
+class CachedSearchClient(BaseSearchClient):
+    """Wraps a search client so repeated queries are answered from a SearchCache"""
+
+    def __init__(self, client: BaseSearchClient, cache: SearchCache, provider: str):
+        self.client = client
+        self.cache = cache
+        self.provider = provider
+
+    async def search(self, query: str, num_results: int = 5) -> List[Source]:
+        cached = self.cache.get(self.provider, query, num_results)
+        if cached is not None:
+            return cached
+
+        sources = await self.client.search(query, num_results)
+        # Empty result lists are usually transient failures; don't pin them.
+        if sources:
+            self.cache.set(self.provider, query, num_results, sources)
+        return sources
+
+    async def start(self):
+        await self.client.start()
+
+    async def close(self):
+        await self.client.close()
+
+    def __getattr__(self, name):
+        # Delegate anything else (session lifecycle, config) to the wrapped client
+        if name == "client":
+            raise AttributeError(name)
+        return getattr(self.client, name)
@@ -1,21 +1,48 @@
 # app/services/search/google_search.py
-from typing import List
+from typing import List, Optional
 import aiohttp
 from datetime import datetime
-import ssl
-import certifi
 from app.models.base import Source
 from app.services.search.base import BaseSearchClient
 from app.config.settings import settings
+from app.utils.http import create_client_session
+from app.utils.rate_limit import get_limiter
+from app.utils.resilience import (
+    RETRYABLE_STATUSES,
+    RetryPolicy,
+    TransientHTTPError,
+    call_with_retry,
+    parse_retry_after,
+)
 
 
 class GoogleSearchClient(BaseSearchClient):
     """Google search client"""
 
-    def __init__(self):
+    def __init__(self, base_url: Optional[str] = None):
         self.api_key = settings.GOOGLE_API_KEY
         self.custom_search_id = settings.SEARCH_ENGINE_ID
-        self.base_url = settings.GOOGLE_BASE_URL
+        self.base_url = base_url or settings.GOOGLE_BASE_URL
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.limiter = get_limiter("google")
+        self.retry_policy = RetryPolicy.from_settings("SEARCH")
+
+    async def start(self):
+        """Open the pooled session. Called from the app lifespan."""
+        if self._session is None or self._session.closed:
+            self._session = create_client_session()
+
+    async def close(self):
+        """Close the pooled session and its keep-alive connections"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        # Lazily open for callers that don't manage the lifecycle (scripts, tests)
+        if self._session is None or self._session.closed:
+            await self.start()
+        return self._session
 
     async def search(self, query: str, num_results: int = 5) -> List[Source]:
         """
@@ -33,28 +60,34 @@ class GoogleSearchClient(BaseSearchClient):
             "num": min(num_results, 10),
         }
 
-        # Create SSL context with verified certificates
-        ssl_context = ssl.create_default_context(cafile=certifi.where())
+        data = await call_with_retry(
+            lambda: self._fetch(params), self.retry_policy, name="google"
+        )
+
+        sources = []
+        for item in data.get("items", []):
+            sources.append(
+                Source(
+                    url=item.get("link"),
+                    title=item.get("title"),
+                    snippet=item.get("snippet"),
+                    source_type="google",
+                    retrieved_at=datetime.now(),
+                )
+            )
+
+        return sources
 
-        async with aiohttp.ClientSession(
-            connector=aiohttp.TCPConnector(ssl=ssl_context)
-        ) as session:
+    async def _fetch(self, params: dict) -> dict:
+        session = await self._get_session()
+        async with self.limiter.limit():
             async with session.get(self.base_url, params=params) as response:
+                if response.status in RETRYABLE_STATUSES:
+                    raise TransientHTTPError(
+                        response.status,
+                        f"Google search failed: {await response.text()}",
+                        parse_retry_after(response.headers.get("Retry-After")),
+                    )
                 if response.status != 200:
                     raise Exception(f"Google search failed: {await response.text()}")
-
-                data = await response.json()
-
-                sources = []
-                for item in data.get("items", []):
-                    sources.append(
-                        Source(
-                            url=item.get("link"),
-                            title=item.get("title"),
-                            snippet=item.get("snippet"),
-                            source_type="google",
-                            retrieved_at=datetime.now(),
-                        )
-                    )
-
-                return sources
+                return await response.json()
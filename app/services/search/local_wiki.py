@@ -0,0 +1,278 @@
+# app/services/search/local_wiki.py
+"""
+Offline Wikipedia search over a local SQLite FTS5 index.
+
+The index is built once from a dump, either the abstracts dump
+(`enwiki-latest-abstract.xml[.gz]`, `<doc><title/><url/><abstract/></doc>`)
+or a JSON Lines extract dump with `title`, `url` and `text`/`abstract` fields
+(e.g. WikiExtractor's --json output). Both are read as streams and inserted
+in fixed-size batches, so memory stays bounded on multi-GB inputs.
+
+Queries are ranked with FTS5's BM25, weighting title matches over body
+matches, and returned as the same `Source` objects as WikipediaClient, so
+the index can replace the live API or answer first and let the API fill in.
+
+Build an index with:
+    python -m app.services.search.local_wiki <dump> [<index path>]
+"""
+
+import argparse
+import asyncio
+import bz2
+import gzip
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import xml.etree.ElementTree as ET
+from datetime import datetime
+from typing import IO, Dict, Iterator, List, Optional
+
+from app.config.settings import settings
+from app.models.base import Source
+from app.services.search.base import BaseSearchClient
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+# Too common to narrow a search; matching them makes BM25 score most pages
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the "
+    "their this to was were which with".split()
+)
+# Title matches count this much more than body matches in BM25
+TITLE_WEIGHT = 10.0
+
+
+def open_dump(path: str) -> IO[bytes]:
+    """Open a possibly gzip/bz2-compressed dump for streaming reads"""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    if path.endswith(".bz2"):
+        return bz2.open(path, "rb")
+    return open(path, "rb")
+
+
+def iter_abstract_xml(stream: IO[bytes]) -> Iterator[Dict[str, str]]:
+    """Pages of an abstracts dump, clearing each parsed element"""
+    context = ET.iterparse(stream, events=("start", "end"))
+    _, root = next(context)
+    for event, elem in context:
+        if event != "end" or elem.tag != "doc":
+            continue
+        title = elem.findtext("title") or ""
+        yield {
+            "title": (
+                title[len("Wikipedia: ") :]
+                if title.startswith("Wikipedia: ")
+                else title
+            ),
+            "url": elem.findtext("url") or "",
+            "text": elem.findtext("abstract") or "",
+        }
+        # Parsed docs otherwise stay attached to the root
+        root.clear()
+
+
+def iter_jsonl(stream: IO[bytes]) -> Iterator[Dict[str, str]]:
+    for line in stream:
+        if not line.strip():
+            continue
+        page = json.loads(line)
+        yield {
+            "title": page.get("title", ""),
+            "url": page.get("url", ""),
+            "text": page.get("abstract") or page.get("text", ""),
+        }
+
+
+def iter_dump(path: str) -> Iterator[Dict[str, str]]:
+    name = re.sub(r"\.(gz|bz2)$", "", path)
+    with open_dump(path) as stream:
+        if name.endswith((".jsonl", ".json", ".ndjson")):
+            yield from iter_jsonl(stream)
+        else:
+            yield from iter_abstract_xml(stream)
+
+
+def _first_paragraph(text: str, max_chars: int) -> str:
+    paragraph = text.strip().split("\n")[0].strip()
+    return paragraph[:max_chars]
+
+
+def build_index(
+    dump_path: str,
+    index_path: str,
+    batch_size: int = 5000,
+    max_chars: int = 2000,
+) -> int:
+    """Build (or replace) the FTS5 index at `index_path`; returns the page count.
+
+    Disambiguation pages and pages without text are skipped. The index is
+    written to a temporary file and moved into place when complete, so a
+    running server never sees a half-built index.
+    """
+    directory = os.path.dirname(index_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = index_path + ".building"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    conn = sqlite3.connect(tmp_path)
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute(
+        "CREATE VIRTUAL TABLE pages USING fts5("
+        "title, body, url UNINDEXED, tokenize='porter unicode61')"
+    )
+
+    count = 0
+    batch = []
+    for page in iter_dump(dump_path):
+        body = _first_paragraph(page["text"], max_chars)
+        if not page["title"] or not body or body.endswith("may refer to:"):
+            continue
+        url = page["url"] or (
+            "https://en.wikipedia.org/wiki/" + page["title"].replace(" ", "_")
+        )
+        batch.append((page["title"], body, url))
+        if len(batch) >= batch_size:
+            conn.executemany("INSERT INTO pages VALUES (?, ?, ?)", batch)
+            conn.commit()
+            count += len(batch)
+            batch = []
+    if batch:
+        conn.executemany("INSERT INTO pages VALUES (?, ?, ?)", batch)
+        count += len(batch)
+
+    # Merge the per-batch b-trees for faster queries
+    conn.execute("INSERT INTO pages(pages) VALUES ('optimize')")
+    conn.commit()
+    conn.close()
+    os.replace(tmp_path, index_path)
+    return count
+
+
+def query_terms(query: str) -> List[str]:
+    """Distinct lowercase words of a query, without stopwords unless that
+    would leave nothing"""
+    tokens = list(
+        dict.fromkeys(token.lower() for token in _TOKEN_PATTERN.findall(query))
+    )
+    return [token for token in tokens if token not in STOPWORDS] or tokens
+
+
+def match_expression(terms: List[str], operator: str = "AND") -> str:
+    return f" {operator} ".join(f'"{term}"' for term in terms)
+
+
+class LocalWikipediaClient(BaseSearchClient):
+    """Wikipedia search against a local FTS5 index built by `build_index`.
+
+    With a `fallback` client (normally WikipediaClient), queries the index
+    returns too few results for are topped up from the fallback.
+    """
+
+    def __init__(
+        self,
+        index_path: Optional[str] = None,
+        fallback: Optional[BaseSearchClient] = None,
+    ):
+        self.index_path = index_path or settings.WIKI_LOCAL_INDEX_PATH
+        if not os.path.exists(self.index_path):
+            raise FileNotFoundError(f"No Wikipedia index at {self.index_path}")
+        self.fallback = fallback
+        self._conn = sqlite3.connect(
+            f"file:{self.index_path}?mode=ro", uri=True, check_same_thread=False
+        )
+        self._lock = threading.Lock()
+
+    async def start(self):
+        if self.fallback is not None:
+            await self.fallback.start()
+
+    async def close(self):
+        if self.fallback is not None:
+            await self.fallback.close()
+
+    def _match(self, expression: str, limit: int) -> List[tuple]:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT title, body, url FROM pages WHERE pages MATCH ? "
+                "ORDER BY bm25(pages, ?, 1.0) LIMIT ?",
+                (expression, TITLE_WEIGHT, limit),
+            ).fetchall()
+
+    def query(self, query: str, num_results: int) -> List[Source]:
+        """Synchronous index lookup; search() runs it in a worker thread, as
+        any-term lookups on a full index can take a while.
+
+        Pages containing every term come first; only if there are too few
+        does the (much larger) any-term match fill the rest.
+        """
+        terms = query_terms(query)
+        if not terms:
+            return []
+        rows = self._match(match_expression(terms, "AND"), num_results)
+        if len(rows) < num_results and len(terms) > 1:
+            found = {row[2] for row in rows}
+            for row in self._match(match_expression(terms, "OR"), num_results * 2):
+                if len(rows) >= num_results:
+                    break
+                if row[2] not in found:
+                    found.add(row[2])
+                    rows.append(row)
+
+        retrieved_at = datetime.now()
+        return [
+            Source(
+                url=url,
+                title=title,
+                snippet=(
+                    body[: settings.MAX_SNIPPET_LENGTH] + "..."
+                    if len(body) > settings.MAX_SNIPPET_LENGTH
+                    else body
+                ),
+                source_type="wikipedia",
+                retrieved_at=retrieved_at,
+            )
+            for title, body, url in rows
+        ]
+
+    async def search(self, query: str, num_results: int = 3) -> List[Source]:
+        sources = await asyncio.to_thread(self.query, query, num_results)
+        if self.fallback is None or len(sources) >= num_results:
+            return sources
+
+        try:
+            extra = await self.fallback.search(query, num_results)
+        except Exception as e:
+            print(f"Wikipedia fallback search failed: {str(e)}")
+            return sources
+        seen = {source.url for source in sources}
+        for source in extra:
+            if len(sources) >= num_results:
+                break
+            if source.url not in seen:
+                seen.add(source.url)
+                sources.append(source)
+        return sources
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a local Wikipedia index")
+    parser.add_argument("dump", help="abstracts XML or JSON Lines dump (.gz/.bz2 ok)")
+    parser.add_argument("index", nargs="?", default=settings.WIKI_LOCAL_INDEX_PATH)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    count = build_index(args.dump, args.index, batch_size=args.batch_size)
+    print(
+        f"Indexed {count} pages into {args.index} in {time.perf_counter() - start:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,42 +1,314 @@
-from typing import List
+# app/services/search/search_manager.py
+"""
+Fan-out of one query to every registered search provider.
+
+Each provider call has its own deadline. Retries and backoff belong to the
+search clients (call_with_retry under the SEARCH_* retry settings); the
+manager's deadline is only a backstop above the clients' call deadline, so it
+never cuts a retry short. The fan-out returns once every provider has
+answered, or `quorum` providers have returned results and a short grace
+period has passed; stragglers are cancelled and whatever arrived is returned. A failing or timed-out provider no longer fails the
+whole search unless no provider succeeds.
+
+Rolling per-provider stats (latency percentiles, error/timeout rate) drive
+two adaptations before each fan-out:
+
+* a provider that is mostly failing, or whose p90 latency exceeds its
+  deadline, is skipped, except for one probe per cooldown period; a
+  successful probe resets its stats
+* a provider whose median latency is past `slow_fraction` of its deadline is
+  asked for half as many results
+
+What happened to each provider is attached to the returned list as
+`SearchResults.report`.
+"""
+
 import asyncio
-from app.services.search.google_search import GoogleSearchClient
-from app.services.search.wiki_client import WikipediaClient
-from app.services.search.base import Source
+import time
+from collections import Counter, deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional
 
-class SearchManager:
+from app.config.settings import settings
+from app.services.search.base import BaseSearchClient, Source
+from app.services.search.cache import CachedSearchClient, SearchCache
+from app.utils.metrics import SEARCH_REQUEST_SECONDS, SEARCH_REQUESTS, SEARCH_RESULTS
+from app.utils.resilience import LatencyTracker
+
+FAILED_STATUSES = ("error", "timeout")
+# Headroom over the clients' call deadline, so their own timeout fires first
+DEADLINE_MARGIN = 1.0
+
+
+def default_provider_deadline() -> float:
+    """SEARCH_PROVIDER_DEADLINE, never below the clients' retry deadline"""
+    backstop = settings.SEARCH_CALL_DEADLINE + DEADLINE_MARGIN
+    if not settings.SEARCH_PROVIDER_DEADLINE:
+        return backstop
+    if settings.SEARCH_PROVIDER_DEADLINE < backstop:
+        print(
+            f"SEARCH_PROVIDER_DEADLINE={settings.SEARCH_PROVIDER_DEADLINE}s would "
+            f"cut off search retries; using {backstop}s"
+        )
+        return backstop
+    return settings.SEARCH_PROVIDER_DEADLINE
+
+
+class SearchResults(List[Source]):
+    """Sources of one fan-out, plus what each provider did"""
+
+    def __init__(self, sources=(), report: Optional[Dict[str, Dict]] = None):
+        super().__init__(sources)
+        self.report: Dict[str, Dict] = report or {}
+
+
+@dataclass
+class SearchProvider:
+    name: str
+    client: BaseSearchClient
+    num_results: int
+    deadline: float
+
+
+class ProviderStats:
+    """Sliding window of a provider's recent outcomes and latencies"""
+
+    def __init__(self, window: int = 50):
+        self.latency = LatencyTracker(window)
+        self.outcomes: Deque[str] = deque(maxlen=window)
+        self.totals: Counter = Counter()
+        self.next_probe = 0.0
+
+    def record(self, status: str, seconds: Optional[float] = None):
+        self.totals[status] += 1
+        if status == "cancelled":
+            return  # Says nothing about the provider's health
+        self.outcomes.append(status)
+        if seconds is not None:
+            self.latency.record(seconds)
+
+    def reset(self):
+        self.latency.samples.clear()
+        self.outcomes.clear()
 
-    def __init__(self, google_client: GoogleSearchClient, wiki_client: WikipediaClient):
+    @property
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        failed = sum(1 for status in self.outcomes if status in FAILED_STATUSES)
+        return failed / len(self.outcomes)
+
+    def snapshot(self) -> Dict:
+        p50 = self.latency.percentile(0.5)
+        p90 = self.latency.percentile(0.9)
+        return {
+            "samples": len(self.outcomes),
+            "error_rate": round(self.error_rate, 3),
+            "p50": round(p50, 4) if p50 is not None else None,
+            "p90": round(p90, 4) if p90 is not None else None,
+            "totals": dict(self.totals),
+        }
+
+
+class SearchManager:
+    def __init__(
+        self,
+        google_client: BaseSearchClient,
+        wiki_client: BaseSearchClient,
+        cache: Optional[SearchCache] = None,
+        quorum: Optional[int] = None,
+        quorum_grace: Optional[float] = None,
+    ):
+        self.cache = cache
+        if cache is not None:
+            google_client = CachedSearchClient(google_client, cache, provider="google")
+            wiki_client = CachedSearchClient(wiki_client, cache, provider="wikipedia")
         self.google_client = google_client
         self.wiki_client = wiki_client
 
+        # Providers with results before returning early (0 = wait for all)
+        self.quorum = settings.SEARCH_QUORUM if quorum is None else quorum
+        self.quorum_grace = (
+            settings.SEARCH_QUORUM_GRACE if quorum_grace is None else quorum_grace
+        )
+        self.min_samples = settings.SEARCH_ADAPT_MIN_SAMPLES
+        self.skip_error_rate = settings.SEARCH_SKIP_ERROR_RATE
+        self.probe_interval = settings.SEARCH_PROBE_INTERVAL
+        self.slow_fraction = settings.SEARCH_SLOW_FRACTION
+
+        self.providers: Dict[str, SearchProvider] = {}
+        self.stats: Dict[str, ProviderStats] = {}
+        self.register("google", google_client, settings.MAX_GOOGLE_RESULTS)
+        self.register("wikipedia", wiki_client, settings.MAX_WIKI_RESULTS)
+
+    def register(
+        self,
+        name: str,
+        client: BaseSearchClient,
+        num_results: int,
+        deadline: Optional[float] = None,
+    ):
+        """Add (or replace) a provider; results are combined in registration order"""
+        self.providers[name] = SearchProvider(
+            name=name,
+            client=client,
+            num_results=num_results,
+            deadline=deadline or default_provider_deadline(),
+        )
+        self.stats[name] = ProviderStats(settings.SEARCH_STATS_WINDOW)
+
+    def provider_stats(self) -> Dict[str, Dict]:
+        return {name: stats.snapshot() for name, stats in self.stats.items()}
+
+    async def start(self):
+        await asyncio.gather(
+            *(provider.client.start() for provider in self.providers.values())
+        )
+
+    async def close(self):
+        await asyncio.gather(
+            *(provider.client.close() for provider in self.providers.values())
+        )
+
     async def search(
         self, query: str, google_results: int = 5, wiki_results: int = 3
-    ) -> List[Source]:
+    ) -> SearchResults:
         """
-        Perform searches across all sources and combine results
+        Perform searches across all providers and combine results
 
         Args:
             query: Search query string
             google_results: Number of Google results to retrieve
             wiki_results: Number of Wikipedia results to retrieve
         """
-        # Run searches in parallel
-        google_task = self.google_client.search(query, google_results)
-        wiki_task = self.wiki_client.search(query, wiki_results)
-        results = await asyncio.gather(google_task, wiki_task)
+        requested = {"google": google_results, "wikipedia": wiki_results}
+        report: Dict[str, Dict] = {}
+        plans = {}
+        for name, provider in self.providers.items():
+            count = requested.get(name, provider.num_results)
+            plans[name] = self._plan(provider, count)
+            report[name] = {"requested": count, "decision": plans[name][1]}
+        if not any(count for count, _ in plans.values()):
+            # Never skip everything: try every provider anyway
+            for name, provider in self.providers.items():
+                plans[name] = (report[name]["requested"], "forced")
+                report[name]["decision"] = "forced"
 
-        # # Just Wikipedia for now
-        
-        # results = await asyncio.gather(wiki_task)
+        tasks = {
+            name: asyncio.create_task(
+                self._search_provider(self.providers[name], query, count, report[name])
+            )
+            for name, (count, _) in plans.items()
+            if count
+        }
+        for name, (count, _) in plans.items():
+            if not count:
+                report[name]["status"] = "skipped"
+                SEARCH_REQUESTS.inc(provider=name, status="skipped")
 
-        all_sources = []
-        seen_urls = set()
+        try:
+            await self._wait_for_quorum(list(tasks.values()))
+        finally:
+            for task in tasks.values():
+                task.cancel()
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+
+        results = {
+            name: task.result()
+            for name, task in tasks.items()
+            if not task.cancelled() and task.exception() is None
+        }
+        succeeded = [name for name, sources in results.items() if sources is not None]
+        if not succeeded:
+            errors = [entry.get("error") for entry in report.values()]
+            raise RuntimeError(
+                f"All search providers failed: {'; '.join(filter(None, errors))}"
+            )
 
-        for source_list in results:
-            for source in source_list:
+        all_sources = SearchResults(report=report)
+        seen_urls = set()
+        for name in self.providers:
+            for source in results.get(name) or []:
                 if source.url not in seen_urls:
                     seen_urls.add(source.url)
                     all_sources.append(source)
-
         return all_sources
+
+    def _plan(self, provider: SearchProvider, requested: int) -> tuple:
+        """(results to ask for, decision) from the provider's recent stats"""
+        stats = self.stats[provider.name]
+        if len(stats.outcomes) < self.min_samples:
+            return requested, "normal"
+
+        p50 = stats.latency.percentile(0.5) or 0.0
+        p90 = stats.latency.percentile(0.9) or 0.0
+        if stats.error_rate >= self.skip_error_rate or p90 >= provider.deadline:
+            now = time.monotonic()
+            if now < stats.next_probe:
+                return 0, "skipped"
+            stats.next_probe = now + self.probe_interval
+            return requested, "probe"
+        if p50 >= self.slow_fraction * provider.deadline and requested > 1:
+            return max(1, requested // 2), "reduced"
+        return requested, "normal"
+
+    async def _wait_for_quorum(self, tasks: List[asyncio.Task]):
+        """Wait for every task, or for `quorum` successes plus the grace period"""
+        quorum = min(self.quorum or len(tasks), len(tasks))
+        loop = asyncio.get_running_loop()
+        pending = set(tasks)
+        succeeded = 0
+        grace_ends = None
+        while pending:
+            timeout = None if grace_ends is None else max(grace_ends - loop.time(), 0)
+            done, pending = await asyncio.wait(
+                pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done:
+                return  # Grace period over; stragglers get cancelled
+            succeeded += sum(
+                1 for task in done if task.exception() is None and task.result()
+            )
+            if succeeded >= quorum and grace_ends is None:
+                grace_ends = loop.time() + self.quorum_grace
+
+    async def _search_provider(
+        self, provider: SearchProvider, query: str, num_results: int, entry: Dict
+    ) -> Optional[List[Source]]:
+        """Call one provider within its deadline, recording latency, outcome and
+        stats; returns None if it failed"""
+        name = provider.name
+        stats = self.stats[name]
+        start = time.perf_counter()
+        status = "error"
+        results = None
+        try:
+            results = await asyncio.wait_for(
+                provider.client.search(query, num_results), provider.deadline
+            )
+            status = "ok" if results else "empty"
+            SEARCH_RESULTS.inc(len(results), provider=name)
+            if entry["decision"] == "probe" and results:
+                stats.reset()
+            return results
+        except asyncio.TimeoutError:
+            status = "timeout"
+            entry["error"] = f"{name}: no answer within {provider.deadline}s"
+            return None
+        except asyncio.CancelledError:
+            status = "cancelled"
+            raise
+        except Exception as e:
+            print(f"Search provider {name} failed: {str(e)}")
+            entry["error"] = f"{name}: {str(e)}"
+            return None
+        finally:
+            seconds = time.perf_counter() - start
+            entry.update(
+                status=status,
+                results=len(results) if results else 0,
+                seconds=round(seconds, 4),
+            )
+            stats.record(status, seconds)
+            SEARCH_REQUEST_SECONDS.observe(seconds, provider=name)
+            SEARCH_REQUESTS.inc(provider=name, status=status)
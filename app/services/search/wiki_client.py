@@ -1,25 +1,75 @@
 # services/search/wiki_client.py
-import wikipedia
-from typing import List
-import asyncio
+from typing import Dict, List, Optional
 from datetime import datetime
-import warnings
+import aiohttp
 
 from app.models.base import Source
 from app.services.search.base import BaseSearchClient
 from app.config.settings import settings
+from app.utils.http import create_client_session
+from app.utils.rate_limit import get_limiter
+from app.utils.resilience import (
+    RETRYABLE_STATUSES,
+    RetryPolicy,
+    TransientHTTPError,
+    call_with_retry,
+    parse_retry_after,
+)
+
 
 class WikipediaClient(BaseSearchClient):
-    def __init__(self, user_agent: str = "IdeaHistoryAgent/1.0"):
-        wikipedia.set_user_agent(user_agent)  # Set user agent for Wikipedia API
+    """Async MediaWiki API client.
+
+    A lookup costs two round trips: one `list=search` request and one batched
+    `prop=extracts|info|pageprops` request covering every returned title, with
+    redirects resolved and disambiguation pages flagged in the same response.
+    """
+
+    def __init__(
+        self, user_agent: str = "IdeaHistoryAgent/1.0", api_url: Optional[str] = None
+    ):
+        self.user_agent = user_agent
+        self.api_url = api_url or settings.WIKIPEDIA_API_URL
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.limiter = get_limiter("wikipedia")
+        self.retry_policy = RetryPolicy.from_settings("SEARCH")
+
+    async def start(self):
+        """Open the pooled session. Called from the app lifespan."""
+        if self._session is None or self._session.closed:
+            self._session = create_client_session(
+                headers={"User-Agent": self.user_agent}
+            )
 
-        # # Patch BeautifulSoup usage in wikipedia package to specify parser
-        # def new_bs(*args, **kwargs):
-        #     kwargs["features"] = "html.parser"
-        #     return BeautifulSoup(*args, **kwargs)
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
 
-        # Suppress the specific warning
-        warnings.filterwarnings("ignore", category=UserWarning, module="wikipedia")
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            await self.start()
+        return self._session
+
+    async def _query(self, params: Dict) -> Dict:
+        params = {"action": "query", "format": "json", "formatversion": "2", **params}
+        return await call_with_retry(
+            lambda: self._fetch(params), self.retry_policy, name="wikipedia"
+        )
+
+    async def _fetch(self, params: Dict) -> Dict:
+        session = await self._get_session()
+        async with self.limiter.limit():
+            async with session.get(self.api_url, params=params) as response:
+                if response.status in RETRYABLE_STATUSES:
+                    raise TransientHTTPError(
+                        response.status,
+                        f"Wikipedia search failed: {await response.text()}",
+                        parse_retry_after(response.headers.get("Retry-After")),
+                    )
+                if response.status != 200:
+                    raise Exception(f"Wikipedia search failed: {await response.text()}")
+                return await response.json()
 
     async def search(self, query: str, num_results: int = 3) -> List[Source]:
         """
@@ -29,57 +79,73 @@ class WikipediaClient(BaseSearchClient):
             query: Search query string
             num_results: Number of results to return
         """
+        # Over-fetch titles so disambiguation pages can be skipped without
+        # another round trip.
+        data = await self._query(
+            {
+                "list": "search",
+                "srsearch": query,
+                "srlimit": num_results + settings.WIKI_SEARCH_OVERFETCH,
+                "srprop": "",
+            }
+        )
+        titles = [hit["title"] for hit in data.get("query", {}).get("search", [])]
+        if not titles:
+            return []
+
+        data = await self._query(
+            {
+                "prop": "extracts|info|pageprops",
+                "titles": "|".join(titles),
+                "redirects": "1",
+                "exintro": "1",
+                "explaintext": "1",
+                "exlimit": "max",
+                "inprop": "url",
+                "ppprop": "disambiguation",
+            }
+        )
+        result = data.get("query", {})
+
+        # Follow title normalization and redirects back to the search order
+        aliases = {}
+        for mapping in result.get("normalized", []) + result.get("redirects", []):
+            aliases[mapping["from"]] = mapping["to"]
+
+        pages = {page["title"]: page for page in result.get("pages", [])}
+
+        sources = []
+        seen = set()
+        for title in titles:
+            for _ in range(len(aliases)):
+                if title in pages or title not in aliases:
+                    break
+                title = aliases[title]
+            page = pages.get(title)
+            if page is None or page.get("missing") or title in seen:
+                continue
+            if "disambiguation" in page.get("pageprops", {}):
+                continue
+            seen.add(title)
+
+            # Keep the first paragraph (usually the most relevant summary)
+            extract = page.get("extract") or ""
+            summary = extract.split("\n")[0]
+            sources.append(
+                Source(
+                    url=page.get("fullurl")
+                    or f"https://en.wikipedia.org/wiki/{title.replace(' ', '_')}",
+                    title=page["title"],
+                    snippet=(
+                        summary[: settings.MAX_SNIPPET_LENGTH] + "..."
+                        if len(summary) > settings.MAX_SNIPPET_LENGTH
+                        else summary
+                    ),
+                    source_type="wikipedia",
+                    retrieved_at=datetime.now(),
+                )
+            )
+            if len(sources) >= num_results:
+                break
 
-        # Run Wikipedia API calls in a thread pool since they're blocking
-        def _search():
-            # Search for pages
-            search_results = wikipedia.search(query, results=num_results)
-            sources = []
-
-            for title in search_results:
-                try:
-                    page = wikipedia.page(title)
-                    # Get the first section (usually the most relevant summary)
-                    summary = page.summary.split("\n")[0] if page.summary else ""
-
-                    sources.append(
-                        Source(
-                            url=page.url,
-                            title=page.title,
-                            snippet=(
-                                summary[:settings.MAX_SNIPPET_LENGTH] + "..."
-                                if len(summary) > settings.MAX_SNIPPET_LENGTH
-                                else summary
-                            ),
-                            source_type="wikipedia",
-                            retrieved_at=datetime.now(),
-                        )
-                    )
-                except wikipedia.exceptions.DisambiguationError as e:
-                    # Handle disambiguation pages by taking the first option
-                    try:
-                        page = wikipedia.page(e.options[0])
-                        sources.append(
-                            Source(
-                                url=page.url,
-                                title=page.title,
-                                snippet=(
-                                    page.summary[:settings.MAX_SNIPPET_LENGTH] + "..."
-                                    if len(page.summary) > settings.MAX_SNIPPET_LENGTH
-                                    else page.summary
-                                ),
-                                source_type="wikipedia",
-                                retrieved_at=datetime.now(),
-                            )
-                        )
-                    except:
-                        continue
-                except:
-                    continue
-
-            return sources
-
-        # Run blocking code in thread pool
-        loop = asyncio.get_event_loop()
-        sources = await loop.run_in_executor(None, _search)
         return sources
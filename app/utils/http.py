@@ -0,0 +1,41 @@
+# app/utils/http.py
+from typing import Dict, Optional
+import ssl
+import aiohttp
+import certifi
+from app.config.settings import settings
+
+_ssl_context: Optional[ssl.SSLContext] = None
+
+
+def get_ssl_context() -> ssl.SSLContext:
+    """SSL context with certifi's CA bundle, parsed once per process"""
+    global _ssl_context
+    if _ssl_context is None:
+        _ssl_context = ssl.create_default_context(cafile=certifi.where())
+    return _ssl_context
+
+
+def create_client_session(
+    limit: Optional[int] = None,
+    limit_per_host: Optional[int] = None,
+    headers: Optional[Dict[str, str]] = None,
+    **kwargs,
+) -> aiohttp.ClientSession:
+    """Create a long-lived session with a keep-alive, DNS-caching connector.
+
+    Must be called from inside a running event loop.
+    """
+    connector = aiohttp.TCPConnector(
+        ssl=get_ssl_context(),
+        limit=limit or settings.HTTP_POOL_LIMIT,
+        limit_per_host=limit_per_host or settings.HTTP_POOL_LIMIT_PER_HOST,
+        keepalive_timeout=settings.HTTP_KEEPALIVE_TIMEOUT,
+        ttl_dns_cache=settings.HTTP_DNS_CACHE_TTL,
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=settings.HTTP_TIMEOUT),
+        headers={"User-Agent": settings.USER_AGENT, **(headers or {})},
+        **kwargs,
+    )
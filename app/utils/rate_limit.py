@@ -0,0 +1,193 @@
+# app/utils/rate_limit.py
+"""
+Process-wide admission control for outbound provider calls.
+
+Each provider (openai, anthropic, google, wikipedia) gets one
+`ProviderLimiter` shared by every client instance: a token bucket for
+requests/minute, a token bucket for LLM tokens/minute and a semaphore capping
+in-flight calls. Clients wrap each HTTP call in `limiter.limit(...)`, so a
+burst of research runs queues up here instead of tripping the provider's
+rate limits.
+"""
+
+import asyncio
+import json
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+
+from app.config.settings import settings
+from app.utils.metrics import registry
+
+RATE_LIMIT_WAIT_SECONDS = registry.histogram(
+    "rate_limit_wait_seconds",
+    "Time a provider call waited for admission",
+    ["provider"],
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 15.0, 60.0),
+)
+RATE_LIMIT_WAITING = registry.gauge(
+    "rate_limit_waiting", "Provider calls waiting for admission", ["provider"]
+)
+PROVIDER_IN_FLIGHT = registry.gauge(
+    "provider_in_flight", "Provider calls currently running", ["provider"]
+)
+
+
+class TokenBucket:
+    """Refills at `rate_per_minute`, holding at most `capacity` tokens.
+
+    The balance may go negative through `adjust` (e.g. when a completion used
+    more tokens than reserved); later callers then wait for it to recover.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def try_acquire(self, amount: float = 1.0) -> float:
+        """Take `amount` tokens if available; otherwise return the seconds to wait"""
+        amount = min(amount, self.capacity)
+        self._refill()
+        if self.tokens >= amount:
+            self.tokens -= amount
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    async def acquire(self, amount: float = 1.0):
+        while True:
+            delay = self.try_acquire(amount)
+            if not delay:
+                return
+            await asyncio.sleep(delay)
+
+    def adjust(self, amount: float):
+        """Charge (positive) or refund (negative) tokens after the fact"""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - amount)
+
+
+class Permit:
+    """Handed out by ProviderLimiter.limit; settles the token reservation"""
+
+    def __init__(self, limiter: "ProviderLimiter", reserved_tokens: int):
+        self.limiter = limiter
+        self.reserved_tokens = reserved_tokens
+
+    def record_tokens(self, used_tokens: int):
+        if self.limiter.token_bucket is not None:
+            self.limiter.token_bucket.adjust(used_tokens - self.reserved_tokens)
+            self.reserved_tokens = used_tokens
+
+
+class ProviderLimiter:
+    """Requests/min, tokens/min and concurrency limits for one provider.
+
+    A limit of 0 disables it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        requests_per_minute: float = 0,
+        tokens_per_minute: float = 0,
+        max_concurrency: int = 0,
+    ):
+        self.name = name
+        self.request_bucket = (
+            TokenBucket(requests_per_minute) if requests_per_minute else None
+        )
+        self.token_bucket = (
+            TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        )
+        self.max_concurrency = max_concurrency
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Admission is FIFO: one waiter at a time drains the buckets
+        self._admission: Optional[asyncio.Lock] = None
+
+    def _bind(self):
+        # asyncio primitives belong to one event loop; scripts and tests may
+        # run several loops in sequence
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._admission = asyncio.Lock()
+            self._semaphore = (
+                asyncio.Semaphore(self.max_concurrency)
+                if self.max_concurrency
+                else None
+            )
+
+    @asynccontextmanager
+    async def limit(self, tokens: int = 0):
+        """Wait for admission, then hold a concurrency slot for the block"""
+        self._bind()
+        start = time.perf_counter()
+        semaphore = self._semaphore
+        acquired = False
+        RATE_LIMIT_WAITING.inc(provider=self.name)
+        try:
+            if semaphore is not None:
+                await semaphore.acquire()
+                acquired = True
+            async with self._admission:
+                if self.request_bucket is not None:
+                    await self.request_bucket.acquire(1)
+                if self.token_bucket is not None and tokens:
+                    await self.token_bucket.acquire(tokens)
+        except BaseException:
+            if acquired:
+                semaphore.release()
+            raise
+        finally:
+            RATE_LIMIT_WAITING.dec(provider=self.name)
+            RATE_LIMIT_WAIT_SECONDS.observe(
+                time.perf_counter() - start, provider=self.name
+            )
+
+        PROVIDER_IN_FLIGHT.inc(provider=self.name)
+        try:
+            yield Permit(self, tokens if self.token_bucket is not None else 0)
+        finally:
+            PROVIDER_IN_FLIGHT.dec(provider=self.name)
+            if acquired:
+                semaphore.release()
+
+
+_limiters: Dict[str, ProviderLimiter] = {}
+
+
+def get_limiter(provider: str) -> ProviderLimiter:
+    """Shared limiter for `provider`, configured from settings"""
+    limiter = _limiters.get(provider)
+    if limiter is None:
+        key = provider.upper()
+        limiter = ProviderLimiter(
+            provider,
+            requests_per_minute=getattr(settings, f"RATE_LIMIT_{key}_RPM", 0),
+            tokens_per_minute=getattr(settings, f"RATE_LIMIT_{key}_TPM", 0),
+            max_concurrency=getattr(settings, f"RATE_LIMIT_{key}_CONCURRENCY", 0),
+        )
+        _limiters[provider] = limiter
+    return limiter
+
+
+def estimate_request_tokens(
+    messages: List[Dict[str, str]],
+    functions: Optional[List[Dict]] = None,
+    max_completion_tokens: int = 512,
+) -> int:
+    """Rough token reservation for a chat request (~4 characters per token)"""
+    prompt_chars = sum(len(message.get("content") or "") for message in messages)
+    if functions:
+        prompt_chars += len(json.dumps(functions))
+    return prompt_chars // 4 + max_completion_tokens
@@ -0,0 +1,268 @@
+# app/utils/resilience.py
+"""
+Retries, deadlines and hedged requests for provider calls.
+
+`call_with_retry` re-runs an operation on transient failures (timeouts,
+dropped connections, 408/409/429/5xx/529) with full-jitter exponential
+backoff, waits at least as long as a Retry-After hint, and gives up once the
+call's overall deadline would be exceeded. `iterate_with_deadline` holds a
+streamed reply to the same per-attempt timeout and deadline. `hedged` starts a duplicate of a
+slow call once it has run longer than the recent p95 latency and returns
+whichever finishes first.
+"""
+
+import asyncio
+import random
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+import aiohttp
+
+from app.config.settings import settings
+from app.utils.metrics import registry
+
+T = TypeVar("T")
+
+RETRIES = registry.counter(
+    "provider_retries_total", "Provider call retries", ["operation", "reason"]
+)
+GIVE_UPS = registry.counter(
+    "provider_give_ups_total",
+    "Provider calls that failed after retrying or hitting their deadline",
+    ["operation", "reason"],
+)
+HEDGES = registry.counter(
+    "hedged_requests_total", "Hedged duplicate requests", ["operation", "outcome"]
+)
+
+RETRYABLE_STATUSES = {408, 409, 425, 429, 500, 502, 503, 504, 529}
+
+
+class TransientHTTPError(Exception):
+    """An HTTP response worth retrying, with the server's Retry-After hint"""
+
+    def __init__(self, status: int, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds from a Retry-After header (delta-seconds form only)"""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        return None
+
+
+def classify_error(exc: BaseException) -> Tuple[Optional[str], Optional[float]]:
+    """Return (reason, retry_after) if `exc` is transient, else (None, None).
+
+    Works on the OpenAI/Anthropic SDK errors by duck typing (`status_code`,
+    `response.headers`) so neither SDK has to be imported here.
+    """
+    if isinstance(exc, asyncio.TimeoutError):
+        return "timeout", None
+    if isinstance(exc, (aiohttp.ClientConnectionError, ConnectionError)):
+        return "connection", None
+    if type(exc).__name__ in ("APIConnectionError", "APITimeoutError"):
+        return "connection", None
+
+    status = getattr(exc, "status_code", None) or getattr(exc, "status", None)
+    if status not in RETRYABLE_STATUSES:
+        return None, None
+
+    retry_after = getattr(exc, "retry_after", None)
+    if retry_after is None:
+        headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+        retry_after = parse_retry_after(headers.get("retry-after"))
+    return f"http_{status}", retry_after
+
+
+@dataclass
+class RetryPolicy:
+    max_attempts: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 20.0
+    attempt_timeout: Optional[float] = None
+    deadline: Optional[float] = None
+
+    @classmethod
+    def from_settings(cls, prefix: str) -> "RetryPolicy":
+        """Read `{prefix}_MAX_ATTEMPTS`, `{prefix}_BACKOFF_BASE`, ... (0 = none)"""
+        return cls(
+            max_attempts=getattr(settings, f"{prefix}_MAX_ATTEMPTS"),
+            base_delay=getattr(settings, f"{prefix}_BACKOFF_BASE"),
+            max_delay=getattr(settings, f"{prefix}_BACKOFF_MAX"),
+            attempt_timeout=getattr(settings, f"{prefix}_ATTEMPT_TIMEOUT") or None,
+            deadline=getattr(settings, f"{prefix}_CALL_DEADLINE") or None,
+        )
+
+    def backoff(self, attempt: int, rng: random.Random = random) -> float:
+        """Full-jitter delay before retry number `attempt` (1-based)"""
+        return rng.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+async def call_with_retry(
+    operation: Callable[[], Awaitable[T]],
+    policy: RetryPolicy,
+    name: str = "call",
+) -> T:
+    """Run `operation()` under `policy`, retrying transient failures"""
+    started = time.monotonic()
+    attempt = 0
+    while True:
+        attempt += 1
+        timeout = policy.attempt_timeout
+        if policy.deadline is not None:
+            remaining = policy.deadline - (time.monotonic() - started)
+            if remaining <= 0:
+                GIVE_UPS.inc(operation=name, reason="deadline")
+                raise asyncio.TimeoutError(
+                    f"{name} exceeded its {policy.deadline}s deadline"
+                )
+            timeout = min(timeout, remaining) if timeout else remaining
+
+        try:
+            if timeout:
+                return await asyncio.wait_for(operation(), timeout)
+            return await operation()
+        except Exception as e:
+            reason, retry_after = classify_error(e)
+            if reason is None:
+                raise
+            if attempt >= policy.max_attempts:
+                GIVE_UPS.inc(operation=name, reason=reason)
+                raise
+
+            delay = max(policy.backoff(attempt), retry_after or 0.0)
+            if policy.deadline is not None:
+                remaining = policy.deadline - (time.monotonic() - started)
+                if delay >= remaining:
+                    GIVE_UPS.inc(operation=name, reason="deadline")
+                    raise
+            RETRIES.inc(operation=name, reason=reason)
+            print(
+                f"{name} failed ({reason}), retry {attempt}/{policy.max_attempts - 1} "
+                f"in {delay:.2f}s: {str(e)}"
+            )
+            await asyncio.sleep(delay)
+
+
+async def iterate_with_deadline(
+    stream: AsyncIterator[T],
+    policy: RetryPolicy,
+    started: float,
+    name: str = "call",
+) -> AsyncIterator[T]:
+    """Yield from `stream`, waiting at most `policy.attempt_timeout` for each
+    item and raising once `policy.deadline` (counted from `started`, a
+    time.monotonic() reading) has passed"""
+    iterator = stream.__aiter__()
+    while True:
+        timeout = policy.attempt_timeout
+        if policy.deadline is not None:
+            remaining = policy.deadline - (time.monotonic() - started)
+            if remaining <= 0:
+                GIVE_UPS.inc(operation=name, reason="deadline")
+                raise asyncio.TimeoutError(
+                    f"{name} exceeded its {policy.deadline}s deadline"
+                )
+            timeout = min(timeout, remaining) if timeout else remaining
+
+        try:
+            if timeout:
+                item = await asyncio.wait_for(iterator.__anext__(), timeout)
+            else:
+                item = await iterator.__anext__()
+        except StopAsyncIteration:
+            return
+        yield item
+
+
+class LatencyTracker:
+    """Sliding window of recent latencies for percentile estimates"""
+
+    def __init__(self, window: int = 200):
+        self.samples: Deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+_trackers: Dict[str, LatencyTracker] = {}
+
+
+def get_latency_tracker(name: str) -> LatencyTracker:
+    """Process-wide tracker for `name`, so hedge delays learn across runs"""
+    tracker = _trackers.get(name)
+    if tracker is None:
+        tracker = _trackers[name] = LatencyTracker()
+    return tracker
+
+
+async def hedged(
+    operation: Callable[[], Awaitable[T]],
+    tracker: LatencyTracker,
+    name: str = "call",
+    quantile: float = 0.95,
+    min_samples: int = 20,
+    initial_delay: Optional[float] = None,
+) -> T:
+    """Run `operation()`, starting one duplicate if the first attempt is slower
+    than the tracker's `quantile` latency; return the first success.
+
+    Until `min_samples` latencies are known, `initial_delay` is used (None
+    disables hedging for now).
+    """
+    if len(tracker.samples) >= min_samples:
+        delay = tracker.percentile(quantile)
+    else:
+        delay = initial_delay
+
+    started = time.perf_counter()
+    tasks = [asyncio.ensure_future(operation())]
+    try:
+        if delay is not None:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                HEDGES.inc(operation=name, outcome="fired")
+                tasks.append(asyncio.ensure_future(operation()))
+
+        pending = set(tasks)
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is None:
+                    if task is not tasks[0]:
+                        HEDGES.inc(operation=name, outcome="won")
+                    tracker.record(time.perf_counter() - started)
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        # Cancel the loser (or everything, if we were cancelled ourselves)
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,85 @@
+# app/utils/serialization.py
+"""
+JSON encoding for the hot paths: SSE events, graph snapshots and stored
+results.
+
+Models are encoded straight to bytes by pydantic's compiled serializer, so a
+graph snapshot never becomes an intermediate dict. Everything else goes
+through orjson when it is installed, otherwise through pydantic_core, which
+also handles datetimes and nested models without a Python `default` hook.
+Output is always compact: no indentation or spaces on the wire.
+
+A snapshot taken while the graph is still changing is wrapped in `RawJSON`,
+so it can sit inside an event dict and be spliced into the encoded event
+verbatim.
+"""
+
+import json
+from typing import Any, Dict, Optional
+
+import pydantic_core
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "pydantic"
+
+
+class RawJSON(bytes):
+    """An already encoded JSON value"""
+
+
+def _orjson_default(obj: Any) -> Any:
+    if isinstance(obj, RawJSON):
+        return json.loads(obj)
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(obj: Any) -> bytes:
+    """Encode `obj` as compact JSON"""
+    if isinstance(obj, BaseModel):
+        return model_to_json(obj)
+    if isinstance(obj, RawJSON):
+        return bytes(obj)
+    if orjson is not None:
+        return orjson.dumps(obj, default=_orjson_default)
+    return pydantic_core.to_json(obj)
+
+
+def loads(data: Any) -> Any:
+    if isinstance(data, RawJSON):
+        # orjson only accepts exact bytes
+        data = bytes(data)
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def model_to_json(model: BaseModel, indent: Optional[int] = None) -> bytes:
+    """A model's JSON, as model_dump_json() but without the str round trip"""
+    return model.__pydantic_serializer__.to_json(model, indent=indent)
+
+
+def snapshot(model: BaseModel) -> RawJSON:
+    """Encode a model now, for embedding in an event encoded later"""
+    return RawJSON(model_to_json(model))
+
+
+def encode_event(event: Dict[str, Any]) -> bytes:
+    """Encode an event dict, splicing in top-level `RawJSON` values as is"""
+    if not any(isinstance(value, RawJSON) for value in event.values()):
+        return dumps(event)
+    parts = [dumps(str(key)) + b":" + dumps(value) for key, value in event.items()]
+    return b"{" + b",".join(parts) + b"}"
+
+
+def decode_graph(value: Any) -> Any:
+    """An event's graph as a dict, whether spliced JSON or already a dict"""
+    if isinstance(value, (bytes, str)):
+        return loads(value)
+    return value
@@ -0,0 +1,112 @@
+# benchmarks/bench_google_pool.py
+"""
+Per-query latency of GoogleSearchClient with a fresh session per query (the
+old behaviour) vs. the pooled, long-lived session, against a local HTTP
+stand-in for the Custom Search API.
+
+Usage: python -m benchmarks.bench_google_pool [--queries 200] [--concurrency 1]
+"""
+
+import argparse
+import asyncio
+import ssl
+import statistics
+import time
+from typing import List
+
+import aiohttp
+import certifi
+from aiohttp import web
+
+from app.services.search.google_search import GoogleSearchClient
+
+FAKE_RESPONSE = {
+    "items": [
+        {
+            "link": f"https://example.com/{i}",
+            "title": f"Result {i}",
+            "snippet": "Lorem ipsum dolor sit amet " * 4,
+        }
+        for i in range(5)
+    ]
+}
+
+
+async def start_stand_in(port: int = 0):
+    async def handle(request: web.Request):
+        return web.json_response(FAKE_RESPONSE)
+
+    app = web.Application()
+    app.router.add_get("/customsearch/v1", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", port)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/customsearch/v1"
+
+
+async def unpooled_search(base_url: str, query: str):
+    """The pre-pooling implementation: new CA bundle, connector and session per query"""
+    ssl_context = ssl.create_default_context(cafile=certifi.where())
+    async with aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(ssl=ssl_context)
+    ) as session:
+        async with session.get(base_url, params={"q": query}) as response:
+            return await response.json()
+
+
+async def measure(fn, queries: int, concurrency: int) -> List[float]:
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with semaphore:
+            start = time.perf_counter()
+            await fn(f"query {i}")
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one(i) for i in range(queries)))
+    return latencies
+
+
+def summarize(label: str, latencies: List[float]):
+    ordered = sorted(latencies)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    print(
+        f"{label:<10} mean={statistics.mean(latencies) * 1000:7.2f}ms "
+        f"p50={statistics.median(latencies) * 1000:7.2f}ms "
+        f"p95={p95 * 1000:7.2f}ms"
+    )
+
+
+async def main(queries: int, concurrency: int):
+    runner, base_url = await start_stand_in()
+    try:
+        before = await measure(
+            lambda q: unpooled_search(base_url, q), queries, concurrency
+        )
+
+        client = GoogleSearchClient(base_url=base_url)
+        await client.start()
+        try:
+            await client.search("warmup")
+            after = await measure(client.search, queries, concurrency)
+        finally:
+            await client.close()
+    finally:
+        await runner.cleanup()
+
+    summarize("unpooled", before)
+    summarize("pooled", after)
+    print(
+        f"speedup    {statistics.mean(before) / statistics.mean(after):.1f}x mean latency"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=1)
+    args = parser.parse_args()
+    asyncio.run(main(args.queries, args.concurrency))
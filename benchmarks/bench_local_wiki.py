@@ -0,0 +1,127 @@
+# benchmarks/bench_local_wiki.py
+"""
+Local Wikipedia index: build throughput and memory on a synthetic abstracts
+dump, and query latency of LocalWikipediaClient.
+
+Pages are random words with Zipf-like frequencies. Peak memory
+(tracemalloc) during the build should stay flat as the dump grows, since
+pages are streamed and inserted in fixed-size batches.
+
+Usage: python -m benchmarks.bench_local_wiki [--pages 10000,100000]
+"""
+
+import argparse
+import gzip
+import itertools
+import os
+import random
+import statistics
+import tempfile
+import time
+import tracemalloc
+from typing import Dict, List
+from xml.sax.saxutils import escape
+
+from app.services.search.local_wiki import LocalWikipediaClient, build_index
+
+
+def make_vocabulary(size: int, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return [
+        "".join(rng.choice(letters) for _ in range(rng.randint(3, 10)))
+        for _ in range(size)
+    ]
+
+
+class ZipfWords:
+    """Words drawn with Zipf-like frequencies, roughly as in real text"""
+
+    def __init__(self, vocabulary: List[str], seed: int):
+        self.vocabulary = vocabulary
+        self.weights = list(
+            itertools.accumulate(1 / rank for rank in range(1, len(vocabulary) + 1))
+        )
+        self.rng = random.Random(seed)
+
+    def sample(self, count: int) -> str:
+        return " ".join(
+            self.rng.choices(self.vocabulary, cum_weights=self.weights, k=count)
+        )
+
+
+def write_dump(path: str, pages: int, words: ZipfWords):
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        f.write("<feed>\n")
+        for n in range(pages):
+            title = words.sample(2).title()
+            abstract = words.sample(60)
+            f.write(
+                f"<doc><title>Wikipedia: {escape(title)} {n}</title>"
+                f"<url>https://en.wikipedia.org/wiki/Page_{n}</url>"
+                f"<abstract>{escape(abstract)}</abstract></doc>\n"
+            )
+        f.write("</feed>\n")
+
+
+def bench(pages: int, queries: int, seed: int) -> Dict:
+    words = ZipfWords(make_vocabulary(50000, seed), seed)
+    with tempfile.TemporaryDirectory() as directory:
+        dump = os.path.join(directory, "abstract.xml.gz")
+        index = os.path.join(directory, "wiki.sqlite3")
+        write_dump(dump, pages, words)
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        build_index(dump, index)
+        build_seconds = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        client = LocalWikipediaClient(index)
+        # Research queries are content words: skip the most frequent ranks,
+        # which play the part of the stopwords the client drops
+        rng = random.Random(seed)
+        content_words = words.vocabulary[100:5000]
+        latencies = []
+        for _ in range(queries):
+            query = " ".join(rng.sample(content_words, 3))
+            start = time.perf_counter()
+            client.query(query, num_results=3)
+            latencies.append((time.perf_counter() - start) * 1000)
+        latencies.sort()
+
+        return {
+            "pages": pages,
+            "dump_mb": os.path.getsize(dump) / 1e6,
+            "index_mb": os.path.getsize(index) / 1e6,
+            "build_s": build_seconds,
+            "pages_per_s": pages / build_seconds,
+            "peak_mb": peak / 1e6,
+            "p50_ms": statistics.median(latencies),
+            "p99_ms": latencies[int(len(latencies) * 0.99) - 1],
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--pages", default="10000,100000")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(
+        f"{'pages':>8} {'dump MB':>8} {'index MB':>9} {'build s':>8} "
+        f"{'pages/s':>9} {'peak MB':>8} {'p50 ms':>7} {'p99 ms':>7}"
+    )
+    for pages in (int(p) for p in args.pages.split(",")):
+        r = bench(pages, args.queries, args.seed)
+        print(
+            f"{r['pages']:>8} {r['dump_mb']:>8.1f} {r['index_mb']:>9.1f} "
+            f"{r['build_s']:>8.1f} {r['pages_per_s']:>9.0f} {r['peak_mb']:>8.1f} "
+            f"{r['p50_ms']:>7.3f} {r['p99_ms']:>7.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+# benchmarks/bench_merge_clustering.py
+"""
+Node-merge prompt size and candidate quality on synthetic graphs: the old
+single prompt with every node's full model_dump() (sources included) vs.
+local pre-clustering with compact cluster descriptors.
+
+Graphs are generated with planted near-duplicates (reworded summaries,
+overlapping contributors, nearby years), so the report can show how many of
+them land in a candidate cluster (recall) and how many co-clustered pairs
+are planted duplicates (precision).
+
+Usage: python -m benchmarks.bench_merge_clustering [--sizes 100,300,1000]
+"""
+
+import argparse
+import json
+import random
+import time
+from itertools import combinations
+from typing import Dict, List, Set, Tuple
+
+from app.core.clustering import NodeClusterer, batch_clusters, describe_node
+from app.core.summary import make_token_counter
+from app.models.base import Node, Source
+from app.services.llm.prompts import MERGE_CLUSTERS_PROMPT
+
+REGIONS = ["Ancient Greece", "Rome", "China", "India", "France", "England", "Persia"]
+VOCABULARY = (
+    "virtue justice law state citizen reason nature duty freedom power "
+    "community ethics knowledge faith order property labor right contract "
+    "sovereignty harmony soul society tradition reform revolution empire "
+    "democracy authority equality liberty truth wisdom custom ritual trade"
+).split()
+FILLER = ["notably", "broadly", "in practice", "over time", "in this view"]
+
+
+def make_source(rng: random.Random, n: int) -> Source:
+    words = " ".join(rng.choice(VOCABULARY) for _ in range(45))
+    return Source(
+        url=f"https://example.com/{n}",
+        title=f"Source {n}",
+        snippet=words,
+        source_type="google",
+    )
+
+
+def reword(rng: random.Random, summary: str) -> str:
+    """Drop a few words and insert filler, keeping most of the wording"""
+    words = summary.split()
+    kept = [word for word in words if rng.random() > 0.15]
+    position = rng.randrange(len(kept) + 1)
+    return " ".join(kept[:position] + [rng.choice(FILLER)] + kept[position:])
+
+
+def make_graph(
+    size: int, duplicate_rate: float, seed: int
+) -> Tuple[List[Node], Set[Tuple[str, str]]]:
+    """Nodes plus the set of planted duplicate pairs (sorted id tuples)"""
+    rng = random.Random(seed)
+    nodes: List[Node] = []
+    families: Dict[str, List[str]] = {}
+    while len(nodes) < size:
+        n = len(nodes)
+        summary = " ".join(rng.choice(VOCABULARY) for _ in range(30))
+        base = Node(
+            id=f"n{n}",
+            time_period=f"Era {n}",
+            year=rng.randrange(-800, 2000),
+            region=rng.choice(REGIONS),
+            key_contributors=[f"Thinker {rng.randrange(size * 2)}" for _ in range(2)],
+            main_idea_summary=summary,
+            sources=[make_source(rng, n * 10 + i) for i in range(3)],
+        )
+        nodes.append(base)
+        families[base.id] = [base.id]
+
+        while rng.random() < duplicate_rate and len(nodes) < size:
+            n = len(nodes)
+            contributors = base.key_contributors[:1] + [f"Thinker {n}"]
+            duplicate = Node(
+                id=f"n{n}",
+                time_period=base.time_period,
+                year=base.year + rng.randrange(-25, 26),
+                region=base.region if rng.random() < 0.8 else rng.choice(REGIONS),
+                key_contributors=contributors,
+                main_idea_summary=reword(rng, summary),
+                sources=[make_source(rng, n * 10 + i) for i in range(3)],
+            )
+            nodes.append(duplicate)
+            families[base.id].append(duplicate.id)
+
+    planted = {
+        tuple(sorted(pair))
+        for family in families.values()
+        for pair in combinations(family, 2)
+    }
+    rng.shuffle(nodes)
+    return nodes, planted
+
+
+def bench(size: int, duplicate_rate: float, batch_nodes: int, seed: int) -> Dict:
+    count_tokens = make_token_counter()
+    nodes, planted = make_graph(size, duplicate_rate, seed)
+
+    # The pre-clustering merge prompt embedded every node's model_dump(),
+    # which back then still inlined the node's sources
+    old_prompt_tokens = count_tokens(
+        str(
+            [
+                {**node.model_dump(), "sources": [s.model_dump() for s in node.sources]}
+                for node in nodes
+            ]
+        )
+    )
+
+    clusterer = NodeClusterer()
+    start = time.perf_counter()
+    clusters = clusterer.clusters(nodes)
+    clustering_seconds = time.perf_counter() - start
+    features = [clusterer._features(node) for node in nodes]
+    candidate_pairs = len(clusterer.candidate_pairs(features))
+
+    batches = batch_clusters(clusters, batch_nodes)
+    new_prompt_tokens = 0
+    for batch in batches:
+        groups = [
+            {"group": number, "nodes": [describe_node(node) for node in cluster]}
+            for number, cluster in enumerate(batch, start=1)
+        ]
+        new_prompt_tokens += count_tokens(
+            MERGE_CLUSTERS_PROMPT.format(
+                concept="benchmark",
+                clusters=json.dumps(groups, ensure_ascii=False, indent=1),
+            )
+        )
+
+    co_clustered = {
+        tuple(sorted((a.id, b.id)))
+        for cluster in clusters
+        for a, b in combinations(cluster, 2)
+    }
+    found = len(co_clustered & planted)
+    return {
+        "nodes": size,
+        "planted_pairs": len(planted),
+        "candidate_pairs": candidate_pairs,
+        "all_pairs": size * (size - 1) // 2,
+        "clusters": len(clusters),
+        "llm_calls": len(batches),
+        "clustering_ms": round(clustering_seconds * 1000, 1),
+        "old_prompt_tokens": old_prompt_tokens,
+        "new_prompt_tokens": new_prompt_tokens,
+        "recall": round(found / len(planted), 3) if planted else 1.0,
+        "precision": round(found / len(co_clustered), 3) if co_clustered else 1.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", default="100,300,1000")
+    parser.add_argument("--duplicate-rate", type=float, default=0.3)
+    parser.add_argument("--batch-nodes", type=int, default=40)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(
+        f"{'nodes':>6} {'planted':>8} {'cand pairs':>11} {'clusters':>9} "
+        f"{'calls':>6} {'cluster ms':>11} {'old tokens':>11} {'new tokens':>11} "
+        f"{'recall':>7} {'precision':>10}"
+    )
+    for size in (int(s) for s in args.sizes.split(",")):
+        r = bench(size, args.duplicate_rate, args.batch_nodes, args.seed)
+        print(
+            f"{r['nodes']:>6} {r['planted_pairs']:>8} {r['candidate_pairs']:>11} "
+            f"{r['clusters']:>9} {r['llm_calls']:>6} {r['clustering_ms']:>11} "
+            f"{r['old_prompt_tokens']:>11} {r['new_prompt_tokens']:>11} "
+            f"{r['recall']:>7} {r['precision']:>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# benchmarks/bench_model_routing.py
+"""
+Wall time of a research run with every LLM call on one (slow) model vs. the
+judge and query calls routed to a faster model, with per-route calls,
+latency and tokens from IdeaHistoryAgent.route_stats().
+
+Chat and search are the seeded stand-ins in benchmarks/fakes.py; the model
+latencies are set with --large-latency and --small-latency.
+
+Usage: python -m benchmarks.bench_model_routing [--routes judge=small,query=small]
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Dict
+
+from app.core.agent import IdeaHistoryAgent, parse_model_routes
+from app.services.search.search_manager import SearchManager
+from benchmarks.fakes import FakeChatClient, FakeSearchClient, LatencyModel
+
+
+async def run(routes: Dict[str, str], latencies: Dict[str, LatencyModel], seed: int):
+    clients = {
+        model: FakeChatClient(
+            model=model, latency=latency, seed=seed, sufficient_after=5
+        )
+        for model, latency in latencies.items()
+    }
+    agent = IdeaHistoryAgent(
+        chat_client=clients["large"],
+        search_manager=SearchManager(
+            FakeSearchClient("google", seed=seed),
+            FakeSearchClient("wikipedia", seed=seed + 1),
+        ),
+        routes={purpose: clients[model] for purpose, model in routes.items()},
+    )
+    start = time.perf_counter()
+    graph = await agent.research_concept("democracy")
+    return time.perf_counter() - start, len(graph.nodes), agent.route_stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--routes", default="judge=small,query=small")
+    parser.add_argument("--large-latency", default="constant:0.2")
+    parser.add_argument("--small-latency", default="constant:0.05")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    latencies = {
+        "large": LatencyModel.parse(args.large_latency),
+        "small": LatencyModel.parse(args.small_latency),
+    }
+    for name, routes in (
+        ("single", {}),
+        ("routed", parse_model_routes(args.routes)),
+    ):
+        wall, nodes, stats = asyncio.run(run(routes, latencies, args.seed))
+        print(f"{name}: {wall:.2f}s, {nodes} nodes")
+        for purpose, route in stats.items():
+            print(
+                f"  {purpose:>6} {route['model']:>6} calls={route['calls']:<3} "
+                f"mean={route['mean_seconds']:.3f}s "
+                f"tokens={route['prompt_tokens']}+{route['completion_tokens']}"
+            )
+
+
+if __name__ == "__main__":
+    main()
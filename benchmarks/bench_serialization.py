@@ -0,0 +1,90 @@
+# benchmarks/bench_serialization.py
+"""
+CPU time to encode one full-graph SSE event: the old path (model_dump() into
+a dict, then json.dumps with a Python datetime hook) vs. app/utils/
+serialization.py (the graph encoded straight from the models and spliced
+into the event), with and without orjson for the event envelope.
+
+Usage: python -m benchmarks.bench_serialization [--sizes 5,50,200]
+"""
+
+import argparse
+import json
+import time
+from datetime import datetime
+from typing import Callable, Dict
+
+from app.models.base import IdeaGraph
+from app.utils import serialization
+from app.utils.serialization import encode_event, snapshot
+from benchmarks.bench_source_table import make_graph
+
+
+class _OldEventEncoder(json.JSONEncoder):
+    def default(self, obj):
+        if isinstance(obj, datetime):
+            return obj.isoformat()
+        return super().default(obj)
+
+
+def old_event(graph: IdeaGraph) -> str:
+    event = {"type": "graph_updated", "data": {}, "graph": graph.model_dump()}
+    return json.dumps(event, cls=_OldEventEncoder)
+
+
+def new_event(graph: IdeaGraph) -> str:
+    event = {"type": "graph_updated", "data": {}, "graph": snapshot(graph)}
+    return encode_event(event).decode("utf-8")
+
+
+def per_call_us(fn: Callable[[], object], min_seconds: float) -> float:
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        fn()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return elapsed / calls * 1e6
+
+
+def bench(size: int, min_seconds: float) -> Dict:
+    graph, _ = make_graph(size, sources_per_round=8, nodes_per_round=4, seed=0)
+    result = {
+        "nodes": size,
+        "event_bytes_old": len(old_event(graph)),
+        "event_bytes_new": len(new_event(graph)),
+        "old_us": per_call_us(lambda: old_event(graph), min_seconds),
+        "new_us": per_call_us(lambda: new_event(graph), min_seconds),
+    }
+    orjson = serialization.orjson
+    serialization.orjson = None
+    try:
+        result["new_no_orjson_us"] = per_call_us(lambda: new_event(graph), min_seconds)
+    finally:
+        serialization.orjson = orjson
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", default="5,50,200")
+    parser.add_argument("--min-seconds", type=float, default=0.5)
+    args = parser.parse_args()
+
+    print(f"backend: {serialization.BACKEND}")
+    print(
+        f"{'nodes':>6} {'old B':>9} {'new B':>9} {'old us':>9} {'new us':>9} "
+        f"{'no orjson us':>13} {'speedup':>8}"
+    )
+    for size in (int(s) for s in args.sizes.split(",")):
+        r = bench(size, args.min_seconds)
+        print(
+            f"{r['nodes']:>6} {r['event_bytes_old']:>9} {r['event_bytes_new']:>9} "
+            f"{r['old_us']:>9.1f} {r['new_us']:>9.1f} "
+            f"{r['new_no_orjson_us']:>13.1f} {r['old_us'] / r['new_us']:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
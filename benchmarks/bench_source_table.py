@@ -0,0 +1,142 @@
+# benchmarks/bench_source_table.py
+"""
+Payload size and memory of graphs with a shared source table vs. sources
+copied into every node and edge (the inlined form still served to old
+clients).
+
+Graphs are built the way the agent builds them: each research round finds a
+batch of sources, and every node and edge extracted in that round cites the
+whole batch.
+
+Usage: python -m benchmarks.bench_source_table [--sizes 5,50]
+"""
+
+import argparse
+import json
+import random
+import tracemalloc
+from typing import Callable, Dict, Tuple
+
+from app.models.base import Edge, IdeaGraph, Node, Source, inline_sources
+
+WORDS = (
+    "virtue justice law state citizen reason nature duty freedom power "
+    "community ethics knowledge faith order property labor right contract"
+).split()
+
+
+def make_graph(
+    size: int, sources_per_round: int, nodes_per_round: int, seed: int
+) -> Tuple[IdeaGraph, Dict[str, int]]:
+    """A graph of `size` nodes plus the bytes of its full-mode event stream,
+    inlined and with the table"""
+    rng = random.Random(seed)
+    graph = IdeaGraph(concept="benchmark")
+    stream_bytes = {"inline": 0, "table": 0}
+    round_number = 0
+    while len(graph.nodes) < size:
+        round_number += 1
+        sources = [
+            Source(
+                url=f"https://example.com/{round_number}/{i}",
+                title=f"Source {round_number}.{i}",
+                snippet=" ".join(rng.choice(WORDS) for _ in range(50)),
+                source_type=rng.choice(["google", "wikipedia"]),
+            )
+            for i in range(sources_per_round)
+        ]
+        for _ in range(min(nodes_per_round, size - len(graph.nodes))):
+            previous = graph.nodes[-1] if graph.nodes else None
+            node = Node(
+                time_period=f"Era {len(graph.nodes)}",
+                year=len(graph.nodes) * 50,
+                region="Europe",
+                key_contributors=[f"Thinker {len(graph.nodes)}"],
+                main_idea_summary=" ".join(rng.choice(WORDS) for _ in range(40)),
+                sources=sources,
+            )
+            graph.add_node(node)
+            if previous is not None:
+                graph.add_edge(
+                    Edge(
+                        source_node_id=previous.id,
+                        target_node_id=node.id,
+                        change_description=" ".join(
+                            rng.choice(WORDS) for _ in range(15)
+                        ),
+                        sources=sources,
+                    )
+                )
+            # Full-mode streaming sends the whole graph after every change
+            dump = graph.model_dump(mode="json")
+            stream_bytes["table"] += len(json.dumps(dump))
+            stream_bytes["inline"] += len(json.dumps(inline_sources(dump)))
+    return graph, stream_bytes
+
+
+def retained_bytes(build: Callable[[], object]) -> int:
+    """Memory still allocated by the object `build` returns"""
+    tracemalloc.start()
+    obj = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del obj
+    return current
+
+
+def bench(size: int, sources_per_round: int, nodes_per_round: int, seed: int) -> Dict:
+    graph, stream_bytes = make_graph(size, sources_per_round, nodes_per_round, seed)
+    table_json = json.dumps(graph.model_dump(mode="json"))
+    inline_json = json.dumps(graph.model_dump_inline(mode="json"))
+    inline = json.loads(inline_json)
+
+    return {
+        "nodes": len(graph.nodes),
+        "edges": len(graph.edges),
+        "sources": len(graph.sources),
+        "inline_bytes": len(inline_json),
+        "table_bytes": len(table_json),
+        "stream_inline_bytes": stream_bytes["inline"],
+        "stream_table_bytes": stream_bytes["table"],
+        # Parsed payload, as a client holds it
+        "inline_parsed": retained_bytes(lambda: json.loads(inline_json)),
+        "table_parsed": retained_bytes(lambda: json.loads(table_json)),
+        # Models in process: each node and edge holding its own Source copies
+        # (what loading the inlined form used to produce) vs. the table
+        "inline_models": retained_bytes(
+            lambda: (
+                [Node(**node) for node in inline["nodes"]],
+                [Edge(**edge) for edge in inline["edges"]],
+            )
+        ),
+        "table_models": retained_bytes(lambda: IdeaGraph.from_json(table_json)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", default="5,50")
+    parser.add_argument("--sources-per-round", type=int, default=8)
+    parser.add_argument("--nodes-per-round", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(
+        f"{'nodes':>6} {'edges':>6} {'sources':>8} {'inline B':>10} {'table B':>10} "
+        f"{'ratio':>6} {'inline stream':>14} {'table stream':>13} {'inline parsed':>14} {'table parsed':>13} "
+        f"{'inline models':>14} {'table models':>13}"
+    )
+    for size in (int(s) for s in args.sizes.split(",")):
+        r = bench(size, args.sources_per_round, args.nodes_per_round, args.seed)
+        print(
+            f"{r['nodes']:>6} {r['edges']:>6} {r['sources']:>8} "
+            f"{r['inline_bytes']:>10} {r['table_bytes']:>10} "
+            f"{r['inline_bytes'] / r['table_bytes']:>6.1f} "
+            f"{r['stream_inline_bytes']:>14} {r['stream_table_bytes']:>13} "
+            f"{r['inline_parsed']:>14} {r['table_parsed']:>13} "
+            f"{r['inline_models']:>14} {r['table_models']:>13}"
+        )
+
+
+if __name__ == "__main__":
+    main()
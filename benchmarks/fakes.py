@@ -0,0 +1,272 @@
+# benchmarks/fakes.py
+"""
+Deterministic local stand-ins for the chat and search providers, so the
+agent and the API can be exercised and timed without network access.
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from app.models.base import Source
+from app.models.responses import (
+    ChatCompletion,
+    ChatMessage,
+    Choice,
+    FunctionCall,
+    TokenUsageDetails,
+)
+from app.services.llm.base import BaseChatClient
+from app.services.search.base import BaseSearchClient
+
+
+class FakeProviderError(Exception):
+    """Raised by the fakes to simulate a provider failure"""
+
+
+@dataclass
+class LatencyModel:
+    """Latency distribution in seconds: constant, uniform or lognormal"""
+
+    kind: str = "constant"
+    mean: float = 0.0
+    spread: float = 0.0
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "constant" or self.mean <= 0:
+            return self.mean
+        if self.kind == "uniform":
+            return max(rng.uniform(self.mean - self.spread, self.mean + self.spread), 0)
+        if self.kind == "lognormal":
+            # `spread` is the sigma of the underlying normal; mean is preserved
+            mu = math.log(self.mean) - self.spread**2 / 2
+            return rng.lognormvariate(mu, self.spread)
+        raise ValueError(f"Unknown latency distribution: {self.kind}")
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyModel":
+        """Parse 'constant:0.5', 'uniform:0.5:0.2' or 'lognormal:0.5:0.4'"""
+        parts = spec.split(":")
+        return cls(
+            kind=parts[0],
+            mean=float(parts[1]) if len(parts) > 1 else 0.0,
+            spread=float(parts[2]) if len(parts) > 2 else 0.0,
+        )
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + 3) // 4
+
+
+@dataclass
+class FakeChatStats:
+    calls: Dict[str, int] = field(default_factory=dict)
+    failures: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+    @property
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": dict(self.calls),
+            "total_calls": self.total_calls,
+            "failures": self.failures,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+        }
+
+
+class FakeChatClient(BaseChatClient):
+    """Answers the agent's function calls with plausible, seeded outputs.
+
+    `outputs` maps a function name to a callable taking the messages and
+    returning the arguments dict (or None for no call), overriding the
+    built-in responders.
+    """
+
+    def __init__(
+        self,
+        model: str = "fake-chat",
+        latency: Optional[LatencyModel] = None,
+        failure_rate: float = 0.0,
+        seed: int = 0,
+        nodes_per_call: int = 1,
+        sufficient_after: int = 4,
+        outputs: Optional[Dict[str, Callable[[List[Dict]], Optional[Dict]]]] = None,
+    ):
+        self.model = model
+        self.latency = latency or LatencyModel()
+        self.failure_rate = failure_rate
+        self.rng = random.Random(seed)
+        self.nodes_per_call = nodes_per_call
+        self.sufficient_after = sufficient_after
+        self.outputs = outputs or {}
+        self.stats = FakeChatStats()
+        self._counter = 0
+
+    async def chat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        functions: Optional[List[Dict]] = None,
+        function_call: Optional[Dict] = None,
+        **kwargs,
+    ) -> ChatCompletion:
+        name = functions[0]["name"] if functions else "chat"
+        self.stats.calls[name] = self.stats.calls.get(name, 0) + 1
+
+        await asyncio.sleep(self.latency.sample(self.rng))
+        if self.rng.random() < self.failure_rate:
+            self.stats.failures += 1
+            raise FakeProviderError(f"Simulated {name} failure")
+
+        responder = self.outputs.get(name) or getattr(self, f"_respond_{name}", None)
+        calls = responder(messages) if responder else None
+        if calls is None:
+            calls = []
+        elif isinstance(calls, dict):
+            calls = [calls]
+
+        prompt = "".join(message.get("content") or "" for message in messages)
+        # Like the providers' parallel tool calling: every call in one message
+        tool_calls = [
+            FunctionCall(name=name, arguments=json.dumps(arguments))
+            for arguments in calls
+        ]
+        choices = [
+            Choice(
+                finish_reason="tool_calls" if tool_calls else "stop",
+                index=0,
+                message=ChatMessage(
+                    role="assistant",
+                    content=None if tool_calls else "Nothing to add.",
+                    tool_calls=tool_calls,
+                ),
+            )
+        ]
+
+        prompt_tokens = estimate_tokens(prompt)
+        completion_tokens = sum(estimate_tokens(json.dumps(c)) for c in calls) or 5
+        self.stats.prompt_tokens += prompt_tokens
+        self.stats.completion_tokens += completion_tokens
+        self._counter += 1
+        return ChatCompletion(
+            id=f"fake-{self._counter}",
+            choices=choices,
+            created=0,
+            model=self.model,
+            usage=TokenUsageDetails(
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                total_tokens=prompt_tokens + completion_tokens,
+            ),
+        )
+
+    @staticmethod
+    def _node_ids(messages: List[Dict]) -> List[str]:
+        return re.findall(r"Node ID: (\w+)", messages[-1]["content"])
+
+    def _respond_create_node(self, messages):
+        calls = []
+        for _ in range(self.nodes_per_call):
+            n = self.rng.randrange(10_000)
+            calls.append(
+                {
+                    "time_period": f"Era {n}",
+                    "year": self.rng.randrange(-800, 2000),
+                    "region": self.rng.choice(["Europe", "Asia", "Africa", "Americas"]),
+                    "key_contributors": [f"Thinker {n}"],
+                    "main_idea_summary": f"Development {n} of the concept, "
+                    "described in a sentence or two of moderate length.",
+                }
+            )
+        return calls
+
+    def _respond_create_edge(self, messages):
+        node_ids = self._node_ids(messages)
+        if len(node_ids) < 2:
+            return None
+        source, target = self.rng.sample(node_ids, 2)
+        return {
+            "source_node_id": source,
+            "target_node_id": target,
+            "change_description": "The idea was reinterpreted in a new context.",
+            "weight": 1.0,
+        }
+
+    def _respond_judge_information(self, messages):
+        count = int(
+            re.search(r"Current nodes: (\d+)", messages[-1]["content"]).group(1)
+        )
+        return {
+            "is_sufficient": count >= self.sufficient_after,
+            "reasoning": "Enough eras are covered." if count else "Too few nodes.",
+        }
+
+    def _respond_generate_next_query(self, messages):
+        return {
+            "query": f"history of the concept part {self.rng.randrange(10_000)}",
+            "reasoning": "Covers a new period.",
+        }
+
+    def _respond_generate_next_queries(self, messages):
+        width = re.search(r"next (\d+) search queries", messages[-1]["content"])
+        width = int(width.group(1)) if width else 3
+        return {
+            "queries": [
+                f"history of the concept part {self.rng.randrange(10_000)}"
+                for _ in range(width)
+            ],
+            "reasoning": "Each covers a different period.",
+        }
+
+    def _respond_merge_node_groups(self, messages):
+        return {"merges": []}
+
+
+class FakeSearchClient(BaseSearchClient):
+    """Returns results derived from a hash of the query, after a simulated delay"""
+
+    def __init__(
+        self,
+        source_type: str = "google",
+        latency: Optional[LatencyModel] = None,
+        failure_rate: float = 0.0,
+        seed: int = 0,
+        snippet_words: int = 30,
+    ):
+        self.source_type = source_type
+        self.latency = latency or LatencyModel()
+        self.failure_rate = failure_rate
+        self.rng = random.Random(seed)
+        self.snippet_words = snippet_words
+        self.calls = 0
+        self.failures = 0
+
+    async def search(self, query: str, num_results: int = 5) -> List[Source]:
+        self.calls += 1
+        await asyncio.sleep(self.latency.sample(self.rng))
+        if self.rng.random() < self.failure_rate:
+            self.failures += 1
+            raise FakeProviderError(f"Simulated {self.source_type} search failure")
+
+        digest = hashlib.sha1(query.encode("utf-8")).hexdigest()[:10]
+        return [
+            Source(
+                url=f"https://{self.source_type}.example.com/{digest}/{i}",
+                title=f"{query} ({i})",
+                snippet=f"Result {i} about {query}. "
+                + " ".join(["lorem"] * self.snippet_words),
+                source_type=self.source_type,
+                retrieved_at=datetime.now(),
+            )
+            for i in range(num_results)
+        ]
@@ -0,0 +1,273 @@
+# benchmarks/run_agent_bench.py
+"""
+Offline end-to-end benchmark of IdeaHistoryAgent and the /research endpoint.
+
+Chat and search providers are replaced by the seeded stand-ins in
+benchmarks/fakes.py, so runs are repeatable and need no API keys. For each
+scenario it reports wall time per phase, LLM calls, prompt/completion tokens,
+SSE bytes emitted and peak Python memory, and writes everything to JSON.
+
+Usage:
+    python -m benchmarks.run_agent_bench --out bench.json
+    python -m benchmarks.run_agent_bench --compare bench.json
+    python -m benchmarks.run_agent_bench --llm-latency lognormal:0.8:0.4 \\
+        --search-latency uniform:0.4:0.2 --llm-failure-rate 0.05
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from app.core.agent import IdeaHistoryAgent
+from app.services.search.search_manager import SearchManager
+from benchmarks.fakes import FakeChatClient, FakeSearchClient, LatencyModel
+
+
+@dataclass
+class Scenario:
+    name: str
+    agent_kwargs: Dict[str, Any] = field(default_factory=dict)
+    request: Dict[str, Any] = field(default_factory=dict)
+
+
+SCENARIOS = [
+    Scenario("serial"),
+    Scenario(
+        "pipelined",
+        agent_kwargs={"pipelined": True},
+        request={"pipelined": True},
+    ),
+    Scenario(
+        "fanout3",
+        agent_kwargs={"queries_per_round": 3},
+        request={"queries_per_round": 3},
+    ),
+    Scenario("delta_stream", request={"delta": True}),
+]
+
+
+@dataclass
+class BenchConfig:
+    concept: str = "democracy"
+    min_nodes: int = 3
+    max_nodes: int = 5
+    repeats: int = 3
+    seed: int = 0
+    llm_latency: LatencyModel = field(default_factory=LatencyModel)
+    search_latency: LatencyModel = field(default_factory=LatencyModel)
+    llm_failure_rate: float = 0.0
+    search_failure_rate: float = 0.0
+
+
+def make_fakes(config: BenchConfig, seed: int):
+    chat = FakeChatClient(
+        latency=config.llm_latency,
+        failure_rate=config.llm_failure_rate,
+        seed=seed,
+        sufficient_after=config.max_nodes,
+    )
+    google = FakeSearchClient(
+        "google",
+        latency=config.search_latency,
+        failure_rate=config.search_failure_rate,
+        seed=seed,
+    )
+    wiki = FakeSearchClient(
+        "wikipedia",
+        latency=config.search_latency,
+        failure_rate=config.search_failure_rate,
+        seed=seed + 1,
+    )
+    return chat, SearchManager(google_client=google, wiki_client=wiki)
+
+
+async def bench_agent(config: BenchConfig, scenario: Scenario, seed: int) -> Dict:
+    """Drive research_concept directly"""
+    chat, search_manager = make_fakes(config, seed)
+    agent = IdeaHistoryAgent(
+        chat_client=chat,
+        search_manager=search_manager,
+        min_nodes=config.min_nodes,
+        max_nodes=config.max_nodes,
+        record_timings=True,
+        **scenario.agent_kwargs,
+    )
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    graph = await agent.research_concept(config.concept)
+    wall_time = time.perf_counter() - start
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings = graph.metadata.get("timings", {})
+    return {
+        "wall_time": wall_time,
+        "phases": timings.get("stage_totals", {}),
+        "overlap_saved": timings.get("overlap_saved", 0.0),
+        "rounds": timings.get("rounds", 0),
+        "nodes": len(graph.nodes),
+        "edges": len(graph.edges),
+        "llm": chat.stats.to_dict(),
+        "peak_memory_bytes": peak_memory,
+    }
+
+
+async def bench_endpoint(config: BenchConfig, scenario: Scenario, seed: int) -> Dict:
+    """Start a job via POST /research over ASGI and measure its SSE stream"""
+    from app.api.main import app, run_research_job
+    from app.core.jobs import JobManager
+
+    chat, search_manager = make_fakes(config, seed)
+    app.state.search_manager = search_manager
+    app.state.llm_cache = None
+    app.state.search_cache = None
+    app.state.result_store = None
+    app.state.chat_client_factory = lambda: chat
+    app.state.job_manager = JobManager(run_research_job)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        start = time.perf_counter()
+        first_byte: Optional[float] = None
+        sse_bytes = 0
+        events = 0
+        response = await client.post(
+            "/research",
+            json={"concept": config.concept, "stream": True, **scenario.request},
+        )
+        events_url = response.json()["events_url"]
+        async with client.stream("GET", events_url, timeout=None) as response:
+            async for chunk in response.aiter_bytes():
+                if first_byte is None:
+                    first_byte = time.perf_counter() - start
+                sse_bytes += len(chunk)
+                events += chunk.count(b"data: ")
+        wall_time = time.perf_counter() - start
+
+    return {
+        "wall_time": wall_time,
+        "time_to_first_byte": first_byte,
+        "sse_bytes": sse_bytes,
+        "sse_events": events,
+        "llm_calls": chat.stats.total_calls,
+    }
+
+
+def _mean(values: List[float]) -> float:
+    return sum(values) / len(values) if values else 0.0
+
+
+def aggregate(runs: List[Dict]) -> Dict:
+    """Average numeric fields (recursively) across repeated runs"""
+    result = {}
+    for key, value in runs[0].items():
+        if isinstance(value, dict):
+            result[key] = aggregate([run.get(key, {}) for run in runs])
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            result[key] = round(
+                _mean([run.get(key) or 0 for run in runs if key in run]), 6
+            )
+        else:
+            result[key] = value
+    return result
+
+
+async def run(config: BenchConfig, scenarios: List[Scenario]) -> Dict:
+    results = {}
+    for scenario in scenarios:
+        agent_runs, endpoint_runs = [], []
+        for repeat in range(config.repeats):
+            seed = config.seed + repeat
+            agent_runs.append(await bench_agent(config, scenario, seed))
+            endpoint_runs.append(await bench_endpoint(config, scenario, seed))
+        results[scenario.name] = {
+            "agent": aggregate(agent_runs),
+            "endpoint": aggregate(endpoint_runs),
+        }
+    return {
+        "created_at": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "config": {
+            **{k: v for k, v in vars(config).items() if "latency" not in k},
+            "llm_latency": vars(config.llm_latency),
+            "search_latency": vars(config.search_latency),
+        },
+        "scenarios": results,
+    }
+
+
+def print_report(report: Dict, baseline: Optional[Dict] = None):
+    header = f"{'scenario':<14}{'wall s':>9}{'llm calls':>11}{'tokens':>9}{'sse KB':>9}{'peak MB':>9}"
+    print(header)
+    for name, result in report["scenarios"].items():
+        agent, endpoint = result["agent"], result["endpoint"]
+        tokens = agent["llm"]["prompt_tokens"] + agent["llm"]["completion_tokens"]
+        line = (
+            f"{name:<14}{agent['wall_time']:>9.3f}{agent['llm']['total_calls']:>11.1f}"
+            f"{tokens:>9.0f}{endpoint['sse_bytes'] / 1024:>9.1f}"
+            f"{agent['peak_memory_bytes'] / 2**20:>9.2f}"
+        )
+        if baseline and name in baseline.get("scenarios", {}):
+            before = baseline["scenarios"][name]["agent"]["wall_time"]
+            if before:
+                line += f"  ({(agent['wall_time'] - before) / before:+.1%} wall vs baseline)"
+        print(line)
+        phases = ", ".join(f"{k}={v:.3f}" for k, v in agent["phases"].items())
+        print(f"{'':<14}phases: {phases}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--concept", default="democracy")
+    parser.add_argument("--scenarios", default=",".join(s.name for s in SCENARIOS))
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--min-nodes", type=int, default=3)
+    parser.add_argument("--max-nodes", type=int, default=5)
+    parser.add_argument("--llm-latency", default="lognormal:0.05:0.3")
+    parser.add_argument("--search-latency", default="uniform:0.03:0.01")
+    parser.add_argument("--llm-failure-rate", type=float, default=0.0)
+    parser.add_argument("--search-failure-rate", type=float, default=0.0)
+    parser.add_argument("--out", help="Write the JSON report here")
+    parser.add_argument("--compare", help="Baseline JSON report to compare against")
+    args = parser.parse_args()
+
+    config = BenchConfig(
+        concept=args.concept,
+        min_nodes=args.min_nodes,
+        max_nodes=args.max_nodes,
+        repeats=args.repeats,
+        seed=args.seed,
+        llm_latency=LatencyModel.parse(args.llm_latency),
+        search_latency=LatencyModel.parse(args.search_latency),
+        llm_failure_rate=args.llm_failure_rate,
+        search_failure_rate=args.search_failure_rate,
+    )
+    wanted = set(args.scenarios.split(","))
+    scenarios = [scenario for scenario in SCENARIOS if scenario.name in wanted]
+
+    report = asyncio.run(run(config, scenarios))
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,9 @@ import { useState } from 'react';
 import HistoryGraph from './components/HistoryGraph';
 import SearchBar from './components/SearchBar';
 import { GraphData } from './components/HistoryGraph/types';
+import { applyEvent, StreamState } from './components/HistoryGraph/graphPatch';
+
+const API_URL = 'http://localhost:8000';
 
 export default function App() {
   const [graphData, setGraphData] = useState<GraphData | null>(null);
@@ -16,76 +19,84 @@ export default function App() {
     setGraphData(null);
 
     try {
-      const response = await fetch('http://localhost:8000/research', {
+      // Start (or join) a research job, then follow its event log
+      const response = await fetch(`${API_URL}/research`, {
         method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-          'Accept': 'text/event-stream',
-        },
-        body: JSON.stringify({ concept, stream: true })
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ concept, stream: true, delta: true })
       });
+      if (!response.ok) {
+        throw new Error(`Failed to start research (${response.status})`);
+      }
+      const job = await response.json();
 
-      const reader = response.body?.getReader();
-      const decoder = new TextDecoder();
+      let streamState: StreamState = { graph: null, lastSeq: 0 };
 
-      while (reader) {
-        const { done, value } = await reader.read();
-        if (done) break;
+      // EventSource reconnects on its own and resends Last-Event-ID, so a
+      // dropped connection resumes the job instead of losing it
+      await new Promise<void>((resolve) => {
+        const source = new EventSource(`${API_URL}${job.events_url}`);
 
-        const chunk = decoder.decode(value);
-        const lines = chunk.split('\n');
+        source.onmessage = (message) => {
+          try {
+            const eventData = JSON.parse(message.data);
+            console.log('Received event:', eventData);
 
-        for (const line of lines) {
-          if (line.startsWith('data: ')) {
-            try {
-              const eventData = JSON.parse(line.slice(6));
-              console.log('Received event:', eventData);
+            if (eventData.type === 'done') {
+              source.close();
+              resolve();
+              return;
+            }
 
-              // If event data is null, skip
-              // if (eventData === null) {
-              //   break;
-              // }
+            if (eventData.type === 'error') {
+              setError(eventData.data.error ?? eventData.data);
+            }
 
-              if (eventData.type === 'error') {
-                setError(eventData.data);
+            // Update status based on event type
+            switch (eventData.type) {
+              case 'start':
+                setStatus('Starting research...');
                 break;
-              }
-
-              // Update status based on event type
-              switch (eventData.type) {
-                case 'start':
-                  setStatus('Starting research...');
-                  break;
-                case 'query':
-                  setStatus(`Searching: ${eventData.data.query}`);
-                  break;
-                case 'sources_found':
-                  setStatus(`Found ${eventData.data.count} sources`);
-                  break;
-                case 'graph_updated':
-                  setStatus(`Updating graph: ${eventData.data.nodes} nodes, ${eventData.data.edges} edges`);
-                  break;
-                case 'complete':
-                  setStatus('Research complete');
-                  break;
-              }
+              case 'query':
+                setStatus(`Searching: ${eventData.data.query}`);
+                break;
+              case 'sources_found':
+                setStatus(`Found ${eventData.data.count} sources`);
+                break;
+              case 'graph_updated':
+                setStatus(`Updating graph: ${eventData.data.nodes} nodes, ${eventData.data.edges} edges`);
+                break;
+              case 'complete':
+                setStatus('Research complete');
+                break;
+            }
 
-              // Update graph data whenever we receive new graph state
-              if (eventData.graph) {
-                setGraphData(prevData => {
-                  // Only update if the new graph has content
-                  if (eventData.graph.nodes.length > 0 || eventData.graph.edges.length > 0) {
-                    return eventData.graph;
-                  }
-                  return prevData;
-                });
-              }
-            } catch (e) {
-              console.error('Error parsing event data:', e);
+            // Rebuild the graph from snapshots and patches
+            const nextState = applyEvent(streamState, eventData);
+            if (nextState !== streamState && nextState.graph) {
+              const graph = nextState.graph;
+              setGraphData(prevData => {
+                // Only update if the new graph has content
+                if (graph.nodes.length > 0 || graph.edges.length > 0) {
+                  return graph;
+                }
+                return prevData;
+              });
             }
+            streamState = nextState;
+          } catch (e) {
+            console.error('Error parsing event data:', e);
           }
-        }
-      }
+        };
+
+        source.onerror = () => {
+          // CLOSED means the browser gave up (e.g. the job expired)
+          if (source.readyState === EventSource.CLOSED) {
+            setError('Lost connection to the research job');
+            resolve();
+          }
+        };
+      });
     } catch (err) {
       setError(err instanceof Error ? err.message : 'An error occurred');
     } finally {
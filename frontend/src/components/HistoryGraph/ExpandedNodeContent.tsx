@@ -14,6 +14,8 @@ export default function ExpandedNodeContent({
   onMouseEnter: () => void;
   onMouseLeave: () => void;
 }) {
+  // The graph view resolves source ids before rendering
+  const sources = data.sources ?? [];
 
   return createPortal(
     <div 
@@ -52,9 +54,9 @@ export default function ExpandedNodeContent({
           {/* Sources Section */}
           <div className="border-t pt-3">
             <div className="font-semibold text-sm mb-2 text-gray-700">
-              Sources ({data.sources.length}):
+              Sources ({sources.length}):
             </div>
-            {data.sources.map((source, index) => (
+            {sources.map((source, index) => (
               <div key={index} className="mb-3 pb-3 border-b border-gray-100 last:border-b-0">
                 <a 
                   href={source.url}
@@ -0,0 +1,95 @@
+// src/components/HistoryGraph/graphPatch.ts
+// Mirrors the reference reducer in app/core/graph_stream.py.
+import { Edge, GraphData, Node, Source } from './types';
+
+export type PatchOp =
+  | { op: 'add_sources'; sources: Record<string, Source> }
+  | { op: 'add_node'; node: Node }
+  | { op: 'remove_nodes'; ids: string[] }
+  | { op: 'add_edge'; edge: Edge }
+  | { op: 'redirect_edges'; old_ids: string[]; new_id: string }
+  | { op: 'set_edges'; edges: Edge[] }
+  | { op: 'set_metadata'; metadata: Record<string, unknown> };
+
+export interface StreamEvent {
+  type: string;
+  data: unknown;
+  seq?: number;
+  graph?: GraphData;
+  patch?: PatchOp[];
+}
+
+export interface StreamState {
+  graph: GraphData | null;
+  lastSeq: number;
+}
+
+const edgeKey = (edge: Edge) => `${edge.source_node_id}\u0000${edge.target_node_id}`;
+
+function dedupEdges(edges: Edge[]): Edge[] {
+  const seen = new Set<string>();
+  return edges.filter((edge) => {
+    const key = edgeKey(edge);
+    if (seen.has(key)) return false;
+    seen.add(key);
+    return true;
+  });
+}
+
+export function applyPatch(graph: GraphData, patch: PatchOp[]): GraphData {
+  let { nodes, edges, sources, metadata } = graph;
+  for (const op of patch) {
+    switch (op.op) {
+      case 'add_sources':
+        sources = { ...sources, ...op.sources };
+        break;
+      case 'add_node':
+        nodes = [...nodes, op.node];
+        break;
+      case 'remove_nodes': {
+        const ids = new Set(op.ids);
+        nodes = nodes.filter((node) => !ids.has(node.id));
+        edges = edges.filter(
+          (edge) => !ids.has(edge.source_node_id) && !ids.has(edge.target_node_id)
+        );
+        break;
+      }
+      case 'add_edge':
+        if (!edges.some((edge) => edgeKey(edge) === edgeKey(op.edge))) {
+          edges = [...edges, op.edge];
+        }
+        break;
+      case 'redirect_edges': {
+        const oldIds = new Set(op.old_ids);
+        edges = dedupEdges(
+          edges
+            .map((edge) => ({
+              ...edge,
+              source_node_id: oldIds.has(edge.source_node_id) ? op.new_id : edge.source_node_id,
+              target_node_id: oldIds.has(edge.target_node_id) ? op.new_id : edge.target_node_id,
+            }))
+            .filter((edge) => edge.source_node_id !== edge.target_node_id)
+        );
+        break;
+      }
+      case 'set_edges':
+        edges = op.edges;
+        break;
+      case 'set_metadata':
+        metadata = op.metadata;
+        break;
+    }
+  }
+  return { ...graph, nodes, edges, sources, metadata };
+}
+
+// Snapshots replace the graph; patches apply only if they directly follow the
+// last applied event, otherwise they are ignored until the next snapshot.
+export function applyEvent(state: StreamState, event: StreamEvent): StreamState {
+  if (event.graph) {
+    return { graph: event.graph, lastSeq: event.seq ?? state.lastSeq };
+  }
+  if (!event.patch || event.seq === undefined) return state;
+  if (!state.graph || event.seq !== state.lastSeq + 1) return state;
+  return { graph: applyPatch(state.graph, event.patch), lastSeq: event.seq };
+}
@@ -15,7 +15,7 @@ import ReactFlow, {
 import 'reactflow/dist/style.css';
 import CustomNode from './CustomNode';
 import CustomEdge from './CustomEdge';
-import { GraphData } from './types';
+import { GraphData, resolveSources } from './types';
 
 const nodeTypes = {
   custom: CustomNode,
@@ -81,7 +81,7 @@ export default function HistoryGraph({ graphData }: HistoryGraphProps) {
       id: node.id,
       type: 'custom',
       position: { x: 0, y: 0 },
-      data: node,
+      data: { ...node, sources: resolveSources(node, graphData.sources) },
     }));
 
     const newEdges = graphData.edges.map((edge, index) => ({
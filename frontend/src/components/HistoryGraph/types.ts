@@ -14,7 +14,9 @@ export interface Node {
   region: string;
   key_contributors: string[];
   main_idea_summary: string;
-  sources: Source[];
+  // Ids into GraphData.sources; older payloads inline `sources` instead
+  source_ids?: string[];
+  sources?: Source[];
 }
 
 export interface Edge {
@@ -22,12 +24,23 @@ export interface Edge {
   target_node_id: string;
   change_description: string;
   weight: number;
-  sources: Source[];
+  source_ids?: string[];
+  sources?: Source[];
 }
 
 export interface GraphData {
   concept: string;
   nodes: Node[];
   edges: Edge[];
+  sources?: Record<string, Source>;
   metadata: Record<string, unknown>;
-}
\ No newline at end of file
+}
+
+// Sources of a node or edge, from the graph's table or the inlined form
+export function resolveSources(
+  item: { source_ids?: string[]; sources?: Source[] },
+  table: Record<string, Source> = {}
+): Source[] {
+  if (!item.source_ids) return item.sources ?? [];
+  return item.source_ids.flatMap((id) => (table[id] ? [table[id]] : []));
+}
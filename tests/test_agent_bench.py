@@ -0,0 +1,33 @@
+import asyncio
+
+from benchmarks.fakes import FakeChatClient, LatencyModel
+from benchmarks.run_agent_bench import BenchConfig, Scenario, bench_agent
+
+
+def test_fake_chat_client_is_deterministic():
+    messages = [{"role": "user", "content": "Current nodes: 0"}]
+    functions = [{"name": "create_node"}]
+
+    first = asyncio.run(FakeChatClient(seed=7).chat_completion(messages, functions))
+    second = asyncio.run(FakeChatClient(seed=7).chat_completion(messages, functions))
+
+    assert (
+        first.choices[0].message.function_call.arguments
+        == second.choices[0].message.function_call.arguments
+    )
+
+
+def test_bench_agent_reports_phases_and_tokens():
+    config = BenchConfig(min_nodes=2, max_nodes=3, repeats=1)
+    result = asyncio.run(bench_agent(config, Scenario("serial"), seed=0))
+
+    assert result["nodes"] >= 2
+    assert result["llm"]["total_calls"] > 0
+    assert result["llm"]["prompt_tokens"] > 0
+    assert {"search", "nodes", "judge"} <= set(result["phases"])
+    assert result["peak_memory_bytes"] > 0
+
+
+def test_latency_model_parse():
+    model = LatencyModel.parse("uniform:0.5:0.2")
+    assert (model.kind, model.mean, model.spread) == ("uniform", 0.5, 0.2)
@@ -0,0 +1,76 @@
+import asyncio
+import json
+
+import httpx
+
+from app.api.main import app, run_research_job
+from app.core.jobs import JobManager
+from app.services.search.search_manager import SearchManager
+from benchmarks.fakes import FakeChatClient, FakeSearchClient, LatencyModel
+
+
+def test_batch_streams_each_graph_then_a_summary():
+    async def main():
+        chat = FakeChatClient(
+            latency=LatencyModel("constant", 0.001), sufficient_after=3
+        )
+        app.state.search_manager = SearchManager(
+            FakeSearchClient("google"), FakeSearchClient("wikipedia")
+        )
+        app.state.llm_cache = None
+        app.state.search_cache = None
+        app.state.result_store = None
+        app.state.chat_client_factory = lambda: chat
+
+        async def runner(job):
+            if job.concept == "nothing":
+                return None
+            return await run_research_job(job)
+
+        app.state.job_manager = JobManager(runner)
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://t"
+        ) as client:
+            response = await client.post(
+                "/research/batch",
+                json={
+                    "concepts": ["stoicism", "nothing", "democracy"],
+                    "concurrency": 2,
+                    "inline_sources": True,
+                },
+            )
+            assert response.headers["content-type"] == "application/x-ndjson"
+            lines = [json.loads(line) for line in response.text.splitlines()]
+
+            empty = await client.post("/research/batch", json={"concepts": []})
+            assert empty.status_code == 400
+
+            for body in (
+                {"concepts": ["stoicism"], "concurrency": 0},
+                {"concepts": ["stoicism"], "concurrency": 1000},
+                {"concepts": ["stoicism"], "queries_per_round": 1000},
+            ):
+                out_of_range = await client.post("/research/batch", json=body)
+                assert out_of_range.status_code == 400
+            too_many = await client.post(
+                "/research", json={"concept": "stoicism", "queries_per_round": 1000}
+            )
+            assert too_many.status_code == 400
+
+        results, summary = lines[:-1], lines[-1]
+        assert sorted(line["concept"] for line in results) == [
+            "democracy",
+            "nothing",
+            "stoicism",
+        ]
+        graphs = [line["graph"] for line in results if "graph" in line]
+        assert len(graphs) == 2
+        assert all("sources" in graph["nodes"][0] for graph in graphs)
+        assert summary["type"] == "summary"
+        assert (summary["completed"], summary["failed"]) == (2, 1)
+        assert summary["failures"][0]["concept"] == "nothing"
+        assert summary["usage"]["prompt_tokens"] == chat.stats.prompt_tokens > 0
+
+    asyncio.run(main())
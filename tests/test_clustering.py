@@ -0,0 +1,107 @@
+import asyncio
+
+from app.core.agent import IdeaHistoryAgent
+from app.core.clustering import NodeClusterer, batch_clusters, describe_node
+from app.models.base import Node
+from app.services.search.search_manager import SearchManager
+from benchmarks.fakes import FakeChatClient, FakeSearchClient
+
+
+def make_node(node_id, summary, year=100, region="Greece", contributors=("Plato",)):
+    return Node(
+        id=node_id,
+        time_period="Classical",
+        year=year,
+        region=region,
+        key_contributors=list(contributors),
+        main_idea_summary=summary,
+    )
+
+
+NODES = [
+    make_node("a1", "Virtue ethics grounds justice in the character of citizens"),
+    make_node("a2", "Virtue ethics grounds justice in the character of good citizens"),
+    make_node(
+        "b1",
+        "Monastic communities preserve scripture through manuscript copying",
+        year=800,
+        region="Ireland",
+        contributors=("Columba",),
+    ),
+    make_node(
+        "c1",
+        "Social contract theory derives legitimate authority from consent",
+        year=1650,
+        region="England",
+        contributors=("Hobbes",),
+    ),
+]
+
+
+def test_near_duplicates_form_one_cluster():
+    clusters = NodeClusterer().clusters(NODES)
+    assert [[node.id for node in cluster] for cluster in clusters] == [["a1", "a2"]]
+
+
+def test_max_cluster_size_stops_chaining():
+    nodes = [
+        make_node(f"n{i}", "Virtue ethics grounds justice in the character of citizens")
+        for i in range(5)
+    ]
+    clusters = NodeClusterer(max_cluster_size=2).clusters(nodes)
+    assert all(len(cluster) <= 2 for cluster in clusters)
+    assert sum(len(cluster) for cluster in clusters) == 4
+
+
+def test_batches_keep_clusters_whole():
+    clusters = [NODES[:2], NODES[2:3] * 3, NODES[3:4] * 2]
+    batches = batch_clusters(clusters, max_nodes=4)
+    assert [[len(cluster) for cluster in batch] for batch in batches] == [[2], [3], [2]]
+
+
+def test_descriptor_has_no_sources_and_short_summary():
+    node = make_node("x", "word " * 200)
+    descriptor = describe_node(node, summary_chars=50)
+    assert "sources" not in descriptor
+    assert len(descriptor["summary"]) <= 53
+
+
+def test_agent_applies_several_merges_from_one_call():
+    nodes = NODES + [
+        make_node(
+            "c2",
+            "Social contract theory derives legitimate authority from popular consent",
+            year=1660,
+            region="England",
+            contributors=("Hobbes", "Locke"),
+        )
+    ]
+
+    def decide(messages):
+        return {
+            "merges": [
+                {"node_ids": ["a1", "a2"], "reasoning": "same", "merged_summary": "A"},
+                {"node_ids": ["c1", "c2"], "reasoning": "same", "merged_summary": "C"},
+                # Crosses candidate groups, must be ignored
+                {"node_ids": ["a1", "c1"], "reasoning": "no", "merged_summary": "X"},
+            ]
+        }
+
+    chat = FakeChatClient(outputs={"merge_node_groups": decide})
+    agent = IdeaHistoryAgent(
+        chat_client=chat,
+        search_manager=SearchManager(
+            google_client=FakeSearchClient("google"),
+            wiki_client=FakeSearchClient("wikipedia"),
+        ),
+    )
+    agent.graph.nodes = nodes
+    agent.graph.concept = "justice"
+
+    asyncio.run(agent._merge_similar_nodes())
+
+    summaries = sorted(node.main_idea_summary for node in agent.graph.nodes)
+    assert len(agent.graph.nodes) == 3
+    assert "A" in summaries and "C" in summaries
+    assert chat.stats.calls["merge_node_groups"] == 1
+    assert len(agent.graph.metadata["merge_history"]) == 2
@@ -0,0 +1,124 @@
+import json
+from app.core.graph_stream import InlineSourceEvents, apply_patch
+from app.models.base import Edge, IdeaGraph, Node, Source
+
+
+def make_node(node_id, year):
+    return Node(
+        id=node_id,
+        time_period=str(year),
+        year=year,
+        region="Europe",
+        key_contributors=[],
+        main_idea_summary=f"Idea {node_id}",
+    )
+
+
+def make_graph():
+    graph = IdeaGraph(concept="democracy")
+    for node_id, year in [("a", -500), ("b", 1689), ("c", 1776), ("d", 1789)]:
+        graph.add_node(make_node(node_id, year))
+    for source, target in [("a", "b"), ("b", "c"), ("b", "d"), ("c", "d")]:
+        graph.add_edge(
+            Edge(source_node_id=source, target_node_id=target, change_description="x")
+        )
+    return graph
+
+
+def test_indexes_track_mutations():
+    graph = make_graph()
+    assert graph.get_node("c").year == 1776
+    assert not graph.add_edge(
+        Edge(source_node_id="a", target_node_id="b", change_description="dup")
+    )
+    assert graph.degree("b") == 3
+
+    merged = make_node("cd", 1776)
+    graph.merge_nodes(["c", "d"], merged)
+
+    assert graph.get_node("c") is None and graph.get_node("cd") is merged
+    assert [(e.source_node_id, e.target_node_id) for e in graph.edges] == [
+        ("a", "b"),
+        ("b", "cd"),
+    ]
+    assert [e.source_node_id for e in graph.in_edges("cd")] == ["b"]
+    assert graph.has_edge("b", "cd") and not graph.has_edge("c", "d")
+
+
+def test_serialized_shape_is_unchanged():
+    graph = make_graph()
+    data = graph.model_dump()
+    assert set(data) == {"concept", "nodes", "edges", "sources", "metadata"}
+    assert set(graph.model_dump_inline()) == {"concept", "nodes", "edges", "metadata"}
+
+    restored = IdeaGraph.from_json(graph.to_json())
+    assert json.loads(restored.to_json()) == json.loads(graph.to_json())
+    assert restored.get_node("a").year == -500
+    assert restored.has_edge("c", "d")
+
+    # Direct assignment rebuilds the indexes
+    restored.nodes = restored.nodes[:1]
+    assert restored.get_node("b") is None
+
+
+def make_source(n):
+    return Source(
+        url=f"https://example.com/{n}", title=f"S{n}", snippet="s", source_type="google"
+    )
+
+
+def test_sources_are_stored_once_and_referenced_by_id():
+    graph = IdeaGraph(concept="democracy")
+    graph.record_changes()
+    shared = [make_source(1), make_source(2)]
+    graph.add_node(Node(**make_node("a", 1).model_dump(), sources=shared))
+    graph.add_node(Node(**make_node("b", 2).model_dump(), sources=shared[1:]))
+    graph.add_edge(
+        Edge(
+            source_node_id="a",
+            target_node_id="b",
+            change_description="x",
+            sources=shared,
+        )
+    )
+
+    assert len(graph.sources) == 2
+    node = graph.get_node("a")
+    assert node.sources == [] and len(node.source_ids) == 2
+    assert [s.url for s in graph.get_sources(graph.get_node("b"))] == [shared[1].url]
+
+    # The table is announced once, before the first node using it
+    ops = graph.drain_changes()
+    assert [op["op"] for op in ops] == [
+        "add_sources",
+        "add_node",
+        "add_node",
+        "add_edge",
+    ]
+    replayed = apply_patch({"nodes": [], "edges": []}, ops)
+    assert replayed["sources"] == graph.model_dump()["sources"]
+
+
+def test_inline_form_round_trips():
+    graph = IdeaGraph(concept="democracy")
+    graph.add_node(Node(**make_node("a", 1).model_dump(), sources=[make_source(1)]))
+    inline = graph.model_dump_inline(mode="json")
+    assert "sources" not in inline
+    assert inline["nodes"][0]["sources"][0]["url"] == "https://example.com/1"
+    assert "source_ids" not in inline["nodes"][0]
+
+    # Graphs stored in the inlined form load into the table
+    restored = IdeaGraph(**inline)
+    assert restored.model_dump(mode="json") == graph.model_dump(mode="json")
+
+
+def test_inline_event_stream():
+    graph = IdeaGraph(concept="democracy")
+    converter = InlineSourceEvents()
+    converter.convert({"seq": 1, "graph": graph.model_dump(mode="json")})
+    graph.record_changes()
+    graph.add_node(Node(**make_node("a", 1).model_dump(), sources=[make_source(1)]))
+
+    event = converter.convert({"seq": 2, "patch": graph.drain_changes()})
+    assert [op["op"] for op in event["patch"]] == ["add_node"]
+    assert event["patch"][0]["node"]["sources"][0]["title"] == "S1"
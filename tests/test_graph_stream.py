@@ -0,0 +1,60 @@
+from app.core.graph_stream import GraphEventStream, apply_event
+from app.models.base import Edge, IdeaGraph, Node
+
+
+def make_node(node_id, year):
+    return Node(
+        id=node_id,
+        time_period=str(year),
+        year=year,
+        region="Europe",
+        key_contributors=[],
+        main_idea_summary=f"Idea {node_id}",
+    )
+
+
+def test_patches_rebuild_the_graph():
+    graph = IdeaGraph(concept="democracy")
+    stream = GraphEventStream(graph, checkpoint_interval=100)
+    events = [stream.next_event("start", {})]
+
+    for node_id, year in [("a", -500), ("b", 1689), ("c", 1776), ("d", 1789)]:
+        graph.add_node(make_node(node_id, year))
+    events.append(stream.next_event("graph_updated", {}))
+
+    for source, target in [("a", "b"), ("b", "c"), ("b", "d"), ("c", "d")]:
+        graph.add_edge(
+            Edge(source_node_id=source, target_node_id=target, change_description="x")
+        )
+    events.append(stream.next_event("graph_updated", {}))
+
+    graph.merge_nodes(["c", "d"], make_node("cd", 1776))
+    graph.metadata["merge_history"] = [{"merged_node_ids": ["c", "d"]}]
+    events.append(stream.next_event("graph_updated", {}))
+
+    graph.set_edges(reversed(list(graph.edges)))
+    events.append(stream.next_event("graph_updated", {}))
+
+    assert [event["seq"] for event in events] == [1, 2, 3, 4, 5]
+    assert "graph" in events[0] and all("patch" in event for event in events[1:])
+
+    state, last_seq = None, 0
+    for event in events:
+        state, last_seq = apply_event(state, last_seq, event)
+    assert last_seq == 5
+    assert state == graph.model_dump()
+
+
+def test_gap_waits_for_next_snapshot():
+    graph = IdeaGraph(concept="democracy")
+    stream = GraphEventStream(graph, checkpoint_interval=3)
+    first = stream.next_event("start", {})
+    graph.add_node(make_node("a", 1))
+    stream.next_event("graph_updated", {})  # dropped by the client
+    graph.add_node(make_node("b", 2))
+    checkpoint = stream.next_event("graph_updated", {})
+
+    state, last_seq = apply_event(None, 0, first)
+    assert "graph" in checkpoint
+    state, last_seq = apply_event(state, last_seq, checkpoint)
+    assert [node["id"] for node in state["nodes"]] == ["a", "b"]
@@ -0,0 +1,90 @@
+import asyncio
+import json
+
+import httpx
+
+from app.api.main import app, run_research_job
+from app.core.jobs import JOB_COMPLETE, JobManager
+from app.services.search.search_manager import SearchManager
+from benchmarks.fakes import FakeChatClient, FakeSearchClient, LatencyModel
+
+
+def test_concurrent_submissions_share_one_job():
+    async def main():
+        runs = []
+        release = asyncio.Event()
+
+        async def runner(job):
+            runs.append(job.concept)
+            job.append({"type": "start"})
+            await release.wait()
+            return {"nodes": []}
+
+        manager = JobManager(runner)
+        first, started = manager.submit("Stoicism", {"delta": True})
+        second, attached_started = manager.submit("  stoicism ", {"delta": True})
+        other, _ = manager.submit("stoicism", {"delta": False})
+        release.set()
+        await asyncio.gather(first.wait(), other.wait())
+
+        assert started and not attached_started
+        assert first is second and other is not first
+        assert first.subscribers == 2
+        assert runs == ["Stoicism", "stoicism"]
+        assert first.status == JOB_COMPLETE
+
+        # A finished job is not reused
+        third, started_again = manager.submit("stoicism", {"delta": True})
+        assert started_again and third is not first
+        await third.wait()
+
+    asyncio.run(main())
+
+
+def test_events_resume_after_last_event_id():
+    async def main():
+        app.state.search_manager = SearchManager(
+            FakeSearchClient("google"), FakeSearchClient("wikipedia")
+        )
+        app.state.llm_cache = None
+        app.state.search_cache = None
+        app.state.result_store = None
+        app.state.chat_client_factory = lambda: FakeChatClient(
+            latency=LatencyModel("constant", 0.001), sufficient_after=3
+        )
+        app.state.job_manager = JobManager(run_research_job)
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://t"
+        ) as client:
+            created = (
+                await client.post(
+                    "/research", json={"concept": "stoicism", "delta": True}
+                )
+            ).json()
+            attached = (
+                await client.post(
+                    "/research", json={"concept": "Stoicism", "delta": True}
+                )
+            ).json()
+            assert attached["job_id"] == created["job_id"] and attached["attached"]
+
+            full = (await client.get(created["events_url"])).text
+            resumed = (
+                await client.get(created["events_url"], headers={"Last-Event-ID": "3"})
+            ).text
+            status = (await client.get(f"/research/{created['job_id']}")).json()
+
+        ids = [int(line[4:]) for line in full.splitlines() if line.startswith("id: ")]
+        assert ids == list(range(1, len(ids) + 1))
+        resumed_ids = [
+            int(line[4:]) for line in resumed.splitlines() if line.startswith("id: ")
+        ]
+        assert resumed_ids == ids[3:]
+
+        last = json.loads(full.strip().splitlines()[-1][len("data: ") :])
+        assert last == {"type": "done", "data": {"status": "complete", "error": None}}
+        assert status["status"] == "complete" and status["result"]["nodes"]
+
+    asyncio.run(main())
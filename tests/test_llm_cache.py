@@ -0,0 +1,87 @@
+import asyncio
+from app.models.responses import (
+    ChatCompletion,
+    ChatMessage,
+    Choice,
+    FunctionCall,
+    TokenUsageDetails,
+)
+from app.services.llm.base import BaseChatClient
+from app.services.llm.cache import LLMCache, CachedChatClient
+from app.utils.cache import MemoryCacheBackend, SQLiteCacheBackend
+
+
+class CountingChatClient(BaseChatClient):
+    def __init__(self):
+        self.model = "fake-model"
+        self.calls = 0
+
+    async def chat_completion(
+        self, messages, functions=None, function_call=None, **kwargs
+    ):
+        self.calls += 1
+        return ChatCompletion(
+            id=f"cmpl-{self.calls}",
+            choices=[
+                Choice(
+                    finish_reason="function_call",
+                    index=0,
+                    message=ChatMessage(
+                        role="assistant",
+                        content=None,
+                        function_call=FunctionCall(
+                            name="generate_next_query",
+                            arguments='{"query": "stoicism"}',
+                        ),
+                    ),
+                )
+            ],
+            created=1700000000,
+            model=self.model,
+            usage=TokenUsageDetails(
+                prompt_tokens=10, completion_tokens=5, total_tokens=15
+            ),
+        )
+
+
+def test_identical_requests_are_served_from_cache(tmp_path):
+    for backend in (
+        MemoryCacheBackend(max_entries=4),
+        SQLiteCacheBackend(str(tmp_path / "llm.sqlite3")),
+    ):
+        inner = CountingChatClient()
+        cache = LLMCache(backend, ttl=60)
+        client = CachedChatClient(inner, cache)
+        messages = [{"role": "user", "content": "next query?"}]
+
+        live = asyncio.run(
+            client.chat_completion(messages, function_call={"name": "x"})
+        )
+        cached = asyncio.run(
+            client.chat_completion(messages, function_call={"name": "x"})
+        )
+        assert inner.calls == 1
+        assert cached.choices == live.choices
+        assert not live.cached and cached.cached
+        # Hits spend no tokens; the saving is only in the cache's stats
+        assert cached.usage.total_tokens == 0
+
+        # Any change to the request is a different key
+        asyncio.run(client.chat_completion(messages, function_call="auto"))
+        assert inner.calls == 2
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["tokens_saved"] == 15
+
+
+def test_key_is_independent_of_dict_ordering():
+    a = LLMCache.make_key(
+        "m",
+        [{"role": "user", "content": "hi"}],
+        [{"name": "f", "parameters": {"a": 1, "b": 2}}],
+    )
+    b = LLMCache.make_key(
+        "m",
+        [{"content": "hi", "role": "user"}],
+        [{"parameters": {"b": 2, "a": 1}, "name": "f"}],
+    )
+    assert a == b
@@ -0,0 +1,62 @@
+import asyncio
+import gzip
+import json
+
+from app.models.base import Source
+from app.services.search.local_wiki import LocalWikipediaClient, build_index
+
+ABSTRACTS = """<feed>
+<doc><title>Wikipedia: Stoicism</title><url>https://en.wikipedia.org/wiki/Stoicism</url>
+<abstract>Stoicism is a school of Hellenistic philosophy founded by Zeno of Citium.</abstract></doc>
+<doc><title>Wikipedia: Zeno of Citium</title><url>https://en.wikipedia.org/wiki/Zeno_of_Citium</url>
+<abstract>Zeno of Citium was a Hellenistic philosopher, the founder of Stoicism.</abstract></doc>
+<doc><title>Wikipedia: Mercury</title><url>https://en.wikipedia.org/wiki/Mercury</url>
+<abstract>Mercury may refer to:</abstract></doc>
+<doc><title>Wikipedia: Printing press</title><url>https://en.wikipedia.org/wiki/Printing_press</url>
+<abstract>A printing press applies pressure to an inked surface.</abstract></doc>
+</feed>"""
+
+
+class FakeWiki:
+    async def search(self, query, num_results=3):
+        return [
+            Source(
+                url="https://en.wikipedia.org/wiki/Epictetus",
+                title="Epictetus",
+                snippet="A Stoic philosopher",
+                source_type="wikipedia",
+            )
+        ]
+
+
+def test_build_from_gzipped_abstracts_and_rank_by_bm25(tmp_path):
+    dump = tmp_path / "abstract.xml.gz"
+    with gzip.open(dump, "wt") as f:
+        f.write(ABSTRACTS)
+    index = tmp_path / "wiki.sqlite3"
+
+    # Small batches exercise the streaming insert path
+    assert build_index(str(dump), str(index), batch_size=2) == 3
+
+    client = LocalWikipediaClient(str(index))
+    sources = asyncio.run(client.search("Stoicism philosophy", num_results=3))
+    assert [source.title for source in sources] == ["Stoicism", "Zeno of Citium"]
+    assert sources[0].source_type == "wikipedia"
+    assert sources[0].url == "https://en.wikipedia.org/wiki/Stoicism"
+    assert asyncio.run(client.search("?!")) == []
+
+
+def test_jsonl_dump_and_api_fallback(tmp_path):
+    dump = tmp_path / "extracts.jsonl"
+    dump.write_text(
+        json.dumps({"title": "Stoicism", "text": "A school of philosophy.\nMore."})
+        + "\n"
+    )
+    index = tmp_path / "wiki.sqlite3"
+    build_index(str(dump), str(index))
+
+    client = LocalWikipediaClient(str(index), fallback=FakeWiki())
+    sources = asyncio.run(client.search("stoic philosophy", num_results=2))
+    assert [source.title for source in sources] == ["Stoicism", "Epictetus"]
+    assert sources[0].snippet == "A school of philosophy."
+    assert sources[0].url == "https://en.wikipedia.org/wiki/Stoicism"
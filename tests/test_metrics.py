@@ -0,0 +1,81 @@
+import asyncio
+
+from app.core.agent import IdeaHistoryAgent
+from app.services.search.search_manager import SearchManager
+from app.utils.metrics import (
+    LLM_REQUESTS,
+    SEARCH_REQUESTS,
+    MetricsRegistry,
+    registry,
+)
+from benchmarks.fakes import FakeChatClient, FakeSearchClient
+
+
+def test_render_prometheus_text():
+    metrics = MetricsRegistry()
+    calls = metrics.counter("calls_total", "Calls", ["purpose"])
+    latency = metrics.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+
+    calls.inc(purpose="judge")
+    calls.inc(2, purpose="judge")
+    latency.observe(0.05)
+    latency.observe(0.5)
+    latency.observe(5)
+
+    text = metrics.render()
+    assert "# TYPE calls_total counter" in text
+    assert 'calls_total{purpose="judge"} 3' in text
+    assert 'latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{le="1.0"} 2' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 3' in text
+    assert "latency_seconds_count 3" in text
+
+
+def test_agent_records_llm_and_search_metrics():
+    before_judge = LLM_REQUESTS.get(purpose="judge", model="fake-chat", status="ok")
+    before_wiki = SEARCH_REQUESTS.get(provider="wikipedia", status="ok")
+
+    agent = IdeaHistoryAgent(
+        chat_client=FakeChatClient(sufficient_after=3),
+        search_manager=SearchManager(
+            FakeSearchClient("google"), FakeSearchClient("wikipedia")
+        ),
+        record_timings=True,
+    )
+    graph = asyncio.run(agent.research_concept("stoicism"))
+
+    llm = graph.metadata["timings"]["llm"]
+    # No merge call: the random fake nodes yield no merge candidates
+    assert {"nodes", "edges", "judge", "query"} <= set(llm)
+    assert llm["nodes"]["prompt_tokens"] > 0
+    assert (
+        LLM_REQUESTS.get(purpose="judge", model="fake-chat", status="ok")
+        == before_judge + llm["judge"]["calls"]
+    )
+    assert SEARCH_REQUESTS.get(provider="wikipedia", status="ok") > before_wiki
+    assert 'research_stage_seconds_count{stage="search"}' in registry.render()
+
+
+def test_pipelined_run_counts_discarded_speculation():
+    agent = IdeaHistoryAgent(
+        chat_client=FakeChatClient(sufficient_after=3),
+        search_manager=SearchManager(
+            FakeSearchClient("google"), FakeSearchClient("wikipedia")
+        ),
+        pipelined=True,
+        record_timings=True,
+    )
+    graph = asyncio.run(agent.research_concept("stoicism"))
+
+    timings = graph.metadata["timings"]
+    # The last round's speculative search is cancelled once the judge stops
+    assert timings["speculations_discarded"] == 1
+    assert set(timings["stage_totals"]) <= {
+        "search",
+        "nodes",
+        "edges",
+        "judge",
+        "query",
+        "merge",
+        "validate",
+    }
@@ -0,0 +1,157 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from app.api.main import app, run_research_job
+from app.core.agent import IdeaHistoryAgent, parse_model_routes
+from app.config.settings import settings
+from app.core.jobs import JobManager
+from app.services.llm.claude_client import ClaudeChatClient
+from app.services.search.search_manager import SearchManager
+from benchmarks.fakes import FakeChatClient, FakeSearchClient
+
+
+def test_parse_model_routes():
+    assert parse_model_routes("") == {}
+    assert parse_model_routes(" judge=small , nodes = large,") == {
+        "judge": "small",
+        "nodes": "large",
+    }
+    with pytest.raises(ValueError):
+        parse_model_routes("summarize=small")
+    with pytest.raises(ValueError):
+        parse_model_routes("judge")
+
+
+def test_agent_routes_each_purpose_to_its_client():
+    large = FakeChatClient(model="large", sufficient_after=3)
+    small = FakeChatClient(model="small", sufficient_after=3)
+    agent = IdeaHistoryAgent(
+        chat_client=large,
+        search_manager=SearchManager(
+            FakeSearchClient("google"), FakeSearchClient("wikipedia")
+        ),
+        routes={"judge": small, "query": small},
+        record_timings=True,
+    )
+    graph = asyncio.run(agent.research_concept("stoicism"))
+
+    assert graph.nodes
+    assert set(small.stats.calls) <= {
+        "judge_information",
+        "generate_next_query",
+        "generate_next_queries",
+    }
+    assert small.stats.calls["judge_information"] > 0
+    assert "judge_information" not in large.stats.calls
+    assert large.stats.calls["create_node"] > 0
+
+    stats = agent.route_stats()
+    assert stats["judge"]["model"] == "small"
+    assert stats["nodes"]["model"] == "large"
+    assert stats["judge"]["calls"] == small.stats.calls["judge_information"]
+    assert stats["nodes"]["prompt_tokens"] > 0
+    assert graph.metadata["timings"]["llm"]["judge"]["model"] == "small"
+
+    with pytest.raises(ValueError):
+        IdeaHistoryAgent(
+            chat_client=large,
+            search_manager=agent.search_manager,
+            routes={"summarize": small},
+        )
+
+
+def test_claude_routed_judge_forces_the_judge_tool():
+    claude = ClaudeChatClient(model="claude-3-5-haiku-20241022")
+    requests = []
+
+    async def create(**request):
+        requests.append(request)
+        return SimpleNamespace(
+            id="msg_1",
+            role="assistant",
+            model=claude.model,
+            stop_reason="tool_use",
+            usage=SimpleNamespace(input_tokens=10, output_tokens=5),
+            content=[
+                SimpleNamespace(
+                    type="tool_use",
+                    name="judge_information",
+                    input={"is_sufficient": True, "reasoning": "enough"},
+                )
+            ],
+        )
+
+    claude.client = SimpleNamespace(messages=SimpleNamespace(create=create))
+    agent = IdeaHistoryAgent(
+        chat_client=FakeChatClient(),
+        search_manager=SearchManager(
+            FakeSearchClient("google"), FakeSearchClient("wikipedia")
+        ),
+        min_nodes=0,
+        routes={"judge": claude},
+    )
+
+    assert asyncio.run(agent._has_sufficient_information()) is True
+    assert requests[0]["tool_choice"] == {"type": "tool", "name": "judge_information"}
+    assert agent.route_stats()["judge"]["model"] == claude.model
+    assert claude._build_request(
+        [], [{"name": "f", "description": "", "parameters": {}}], "auto"
+    )["tool_choice"] == {"type": "auto"}
+
+
+def test_request_overrides_models_per_purpose(monkeypatch):
+    monkeypatch.setattr(settings, "ALLOWED_MODELS", "small, medium")
+
+    async def main():
+        clients = {}
+
+        def factory(model=None):
+            model = model or "fake-chat"
+            return clients.setdefault(
+                model, FakeChatClient(model=model, sufficient_after=3)
+            )
+
+        app.state.search_manager = SearchManager(
+            FakeSearchClient("google"), FakeSearchClient("wikipedia")
+        )
+        app.state.llm_cache = None
+        app.state.search_cache = None
+        app.state.result_store = None
+        app.state.chat_client_factory = factory
+        app.state.job_manager = JobManager(run_research_job)
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://t"
+        ) as client:
+            response = await client.post(
+                "/research",
+                json={"concept": "stoicism", "models": {"judge": "small"}},
+            )
+            job = await client.get(f"/research/{response.json()['job_id']}")
+            while job.json()["status"] in ("queued", "running"):
+                await asyncio.sleep(0.01)
+                job = await client.get(f"/research/{response.json()['job_id']}")
+
+            unknown = await client.post(
+                "/research",
+                json={"concept": "stoicism", "models": {"summarize": "small"}},
+            )
+            assert unknown.status_code == 400
+
+            disallowed = await client.post(
+                "/research",
+                json={"concept": "stoicism", "models": {"judge": "bogus-model"}},
+            )
+            assert disallowed.status_code == 400
+            assert "bogus-model" not in clients
+        await app.state.job_manager.close()
+        return job.json()
+
+    job = asyncio.run(main())
+    assert job["routes"]["judge"]["model"] == "small"
+    assert job["routes"]["nodes"]["model"] == "fake-chat"
+    assert job["routes"]["judge"]["calls"] > 0
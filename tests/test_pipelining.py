@@ -0,0 +1,64 @@
+import asyncio
+
+from app.core.agent import IdeaHistoryAgent
+from app.services.search.search_manager import SearchManager
+from benchmarks.fakes import FakeChatClient, FakeSearchClient
+
+
+class RecordingSearchClient(FakeSearchClient):
+    def __init__(self, source_type):
+        super().__init__(source_type)
+        self.queries = []
+
+    async def search(self, query, num_results=5):
+        self.queries.append(query)
+        return await super().search(query, num_results)
+
+
+def run(pipelined):
+    google = RecordingSearchClient("google")
+    agent = IdeaHistoryAgent(
+        chat_client=FakeChatClient(sufficient_after=4),
+        search_manager=SearchManager(google, RecordingSearchClient("wikipedia")),
+        pipelined=pipelined,
+    )
+    graph = asyncio.run(agent.research_concept("stoicism"))
+    return agent, graph, google.queries
+
+
+def describe(graph):
+    """The graph without its random node ids"""
+    eras = {node.id: node.time_period for node in graph.nodes}
+    return (
+        sorted(eras.values()),
+        sorted(
+            (eras[edge.source_node_id], eras[edge.target_node_id])
+            for edge in graph.edges
+        ),
+        sorted(source.url for source in graph.sources.values()),
+    )
+
+
+def test_pipelined_run_builds_the_serial_graph():
+    serial, serial_graph, serial_queries = run(pipelined=False)
+    pipelined, pipelined_graph, pipelined_queries = run(pipelined=True)
+
+    assert describe(pipelined_graph) == describe(serial_graph)
+    assert [s.url for s in pipelined.collected_sources] == [
+        s.url for s in serial.collected_sources
+    ]
+
+    # The speculative search started before the judge said "enough" is the
+    # only extra one (if it got going before it was cancelled)
+    assert pipelined.speculations_discarded == 1
+    assert pipelined_queries[: len(serial_queries)] == serial_queries
+    discarded = pipelined_queries[len(serial_queries) :]
+    assert len(discarded) <= 1
+    thrown_away = [
+        source.url
+        for query in discarded
+        for source in asyncio.run(FakeSearchClient("google").search(query))
+    ]
+    kept = {s.url for s in pipelined.collected_sources}
+    kept |= {s.url for s in pipelined_graph.sources.values()}
+    assert kept.isdisjoint(thrown_away)
@@ -0,0 +1,58 @@
+import asyncio
+
+from app.core.agent import IdeaHistoryAgent
+from app.services.search.search_manager import SearchManager
+from benchmarks.fakes import FakeChatClient, FakeSearchClient
+
+
+class SharedResultSearchClient(FakeSearchClient):
+    """Adds the same result to every query's answer"""
+
+    async def search(self, query, num_results=5):
+        results = await super().search(query, num_results)
+        shared = results[0].model_copy(update={"url": "https://example.com/shared"})
+        return results[1:] + [shared]
+
+
+def make_agent(events, **kwargs):
+    google = FakeSearchClient("google")
+    wiki = SharedResultSearchClient("wikipedia")
+    return IdeaHistoryAgent(
+        chat_client=FakeChatClient(sufficient_after=6),
+        search_manager=SearchManager(google_client=google, wiki_client=wiki),
+        on_update=events.append,
+        **kwargs,
+    )
+
+
+def test_each_round_searches_every_query_and_merges_results():
+    events = []
+    agent = make_agent(events, queries_per_round=3, dedup_sources=False)
+    google = agent.search_manager.google_client
+    asyncio.run(agent.research_concept("stoicism"))
+
+    # The first query event is the concept itself
+    query_events = [e["data"] for e in events if e["type"] == "query"][1:]
+    found = [e["data"]["count"] for e in events if e["type"] == "sources_found"]
+    assert agent.round >= 2
+    assert len(query_events) == agent.round
+    assert all(len(event["queries"]) == 3 for event in query_events)
+    # One search for the concept, then three per round
+    assert google.calls == 1 + 3 * agent.round
+
+    # Every round's queries share one result, which is only kept once
+    per_query = found[0] - 1
+    assert found[1:] == [3 * per_query + 1] * agent.round
+
+
+def test_perform_searches_drops_repeated_urls():
+    agent = make_agent([], queries_per_round=3)
+    sources = asyncio.run(
+        agent._perform_searches(["stoicism", "stoicism", "epicureanism"])
+    )
+    single = asyncio.run(agent._perform_searches(["stoicism"]))
+
+    urls = [source.url for source in sources]
+    assert len(urls) == len(set(urls))
+    assert set(source.url for source in single) < set(urls)
+    assert urls.count("https://example.com/shared") == 1
@@ -0,0 +1,226 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from app.api.main import app
+from app.core.jobs import JobManager, JobQueueFull
+from app.services.llm.openai_client import OpenAIChatClient
+from app.utils.rate_limit import ProviderLimiter, TokenBucket
+from app.utils.resilience import RetryPolicy, TransientHTTPError
+
+
+def test_token_bucket_refills_at_rate():
+    bucket = TokenBucket(rate_per_minute=600, capacity=2)  # 10/s
+    assert bucket.try_acquire() == 0
+    assert bucket.try_acquire() == 0
+    assert bucket.try_acquire() == pytest.approx(0.1, abs=0.01)
+
+    bucket.adjust(-5)  # refunds never exceed capacity
+    assert bucket.tokens <= 2
+
+
+def test_limiter_caps_concurrency_and_request_rate():
+    limiter = ProviderLimiter("test", requests_per_minute=1200, max_concurrency=2)
+    limiter.request_bucket.capacity = limiter.request_bucket.tokens = 1
+    running = 0
+    peak = 0
+
+    async def call():
+        nonlocal running, peak
+        async with limiter.limit():
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+    async def main():
+        start = time.perf_counter()
+        await asyncio.gather(*(call() for _ in range(5)))
+        return time.perf_counter() - start
+
+    elapsed = asyncio.run(main())
+    assert peak <= 2
+    # 20 requests/s with a burst of one: the last of five starts after ~0.2s
+    assert elapsed >= 0.19
+
+
+def test_full_job_queue_rejects_with_retry_after():
+    async def main():
+        release = asyncio.Event()
+
+        async def runner(job):
+            await release.wait()
+            return {}
+
+        manager = JobManager(runner, max_running=1, max_queued=1)
+        running, _ = manager.submit("a")
+        queued, _ = manager.submit("b")
+        await asyncio.sleep(0)
+        assert running.status == "running" and queued.status == "queued"
+
+        # Attaching to an in-flight job is still allowed
+        assert manager.submit("B")[0] is queued
+        with pytest.raises(JobQueueFull) as exc:
+            manager.submit("c")
+        assert exc.value.retry_after >= 1
+
+        release.set()
+        await asyncio.gather(running.wait(), queued.wait())
+        assert manager.stats()["rejected"] == 1
+
+    asyncio.run(main())
+
+
+def test_api_returns_429_when_queue_is_full():
+    async def main():
+        release = asyncio.Event()
+
+        async def runner(job):
+            await release.wait()
+            return {}
+
+        app.state.result_store = None
+        app.state.job_manager = JobManager(runner, max_running=1, max_queued=0)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://t"
+        ) as client:
+            accepted = await client.post("/research", json={"concept": "a"})
+            rejected = await client.post("/research", json={"concept": "b"})
+        release.set()
+        return accepted, rejected
+
+    accepted, rejected = asyncio.run(main())
+    assert accepted.status_code == 200
+    assert rejected.status_code == 429
+    assert int(rejected.headers["retry-after"]) >= 1
+
+
+def test_stream_retries_release_the_limiter_between_attempts():
+    client = OpenAIChatClient()
+    client.limiter = ProviderLimiter("test", max_concurrency=1)
+    client.retry_policy = RetryPolicy(max_attempts=2, base_delay=0.1, max_delay=0.1)
+    attempts = []
+
+    async def chunks():
+        call = SimpleNamespace(
+            index=0,
+            function=SimpleNamespace(name="create_node", arguments='{"title": "A"}'),
+        )
+        delta = SimpleNamespace(tool_calls=[call])
+        yield SimpleNamespace(
+            choices=[SimpleNamespace(index=0, delta=delta)], usage=None
+        )
+        yield SimpleNamespace(
+            choices=[],
+            usage=SimpleNamespace(prompt_tokens=5, completion_tokens=3, total_tokens=8),
+        )
+
+    async def create(**request):
+        attempts.append(request)
+        if len(attempts) == 1:
+            raise TransientHTTPError(503, "down")
+        return chunks()
+
+    client.client = SimpleNamespace(
+        chat=SimpleNamespace(completions=SimpleNamespace(create=create))
+    )
+
+    async def other_request():
+        # Runs during the backoff after the first attempt
+        await asyncio.sleep(0.02)
+        async with client.limiter.limit():
+            return len(attempts)
+
+    async def main():
+        other = asyncio.create_task(other_request())
+        calls = [
+            call
+            async for call in client.stream_function_calls(
+                [], [{"name": "create_node", "parameters": {}}]
+            )
+        ]
+        return calls, await other
+
+    calls, attempts_seen = asyncio.run(main())
+    assert [call.name for call in calls] == ["create_node"]
+    assert len(attempts) == 2
+    # The slot was free while the stream was backing off
+    assert attempts_seen == 1
+
+
+def test_stalled_stream_falls_back_until_a_call_is_yielded():
+    client = OpenAIChatClient()
+    client.limiter = ProviderLimiter("test", max_concurrency=1)
+    client.retry_policy = RetryPolicy(max_attempts=1, attempt_timeout=0.05)
+    requests = []
+
+    def tool_call_chunk(arguments):
+        call = SimpleNamespace(
+            index=0,
+            function=SimpleNamespace(name="create_node", arguments=arguments),
+        )
+        delta = SimpleNamespace(tool_calls=[call])
+        return SimpleNamespace(
+            choices=[SimpleNamespace(index=0, delta=delta)], usage=None
+        )
+
+    async def stalled(first_chunks):
+        for chunk in first_chunks:
+            yield chunk
+        await asyncio.sleep(1)
+
+    stall_after = []
+
+    async def create(**request):
+        requests.append(request)
+        if request.get("stream"):
+            return stalled(stall_after)
+        call = SimpleNamespace(
+            type="function",
+            function=SimpleNamespace(name="create_node", arguments='{"title": "A"}'),
+        )
+        message = SimpleNamespace(
+            role="assistant", content=None, function_call=None, tool_calls=[call]
+        )
+        return SimpleNamespace(
+            id="c1",
+            created=0,
+            model=client.model,
+            choices=[
+                SimpleNamespace(index=0, finish_reason="tool_calls", message=message)
+            ],
+            usage=SimpleNamespace(prompt_tokens=5, completion_tokens=3, total_tokens=8),
+        )
+
+    client.client = SimpleNamespace(
+        chat=SimpleNamespace(completions=SimpleNamespace(create=create))
+    )
+
+    async def collect():
+        usage = []
+        calls = [
+            call
+            async for call in client.stream_function_calls(
+                [], [{"name": "create_node", "parameters": {}}], on_usage=usage.append
+            )
+        ]
+        return calls, usage
+
+    # Nothing yielded before the stall: redone without streaming
+    calls, usage = asyncio.run(collect())
+    assert [call.arguments for call in calls] == ['{"title": "A"}']
+    assert [bool(r.get("stream")) for r in requests] == [True, False]
+    assert usage[0].total_tokens == 8
+
+    # A call already handed out: the stall is an error, not a second answer
+    stall_after.extend(
+        [tool_call_chunk('{"title": "B"}'), tool_call_chunk('{"title": "C"}')]
+    )
+    requests.clear()
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(collect())
+    assert len(requests) == 1
@@ -0,0 +1,110 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.utils.resilience import (
+    LatencyTracker,
+    RetryPolicy,
+    TransientHTTPError,
+    call_with_retry,
+    classify_error,
+    hedged,
+    iterate_with_deadline,
+)
+
+
+class RateLimitError(Exception):
+    """Shaped like the OpenAI/Anthropic SDK status errors"""
+
+    def __init__(self, retry_after):
+        super().__init__("rate limited")
+        self.status_code = 429
+        self.response = SimpleNamespace(headers={"retry-after": retry_after})
+
+
+def test_classify_error():
+    assert classify_error(RateLimitError("2")) == ("http_429", 2.0)
+    assert classify_error(TransientHTTPError(503, "down")) == ("http_503", None)
+    assert classify_error(asyncio.TimeoutError())[0] == "timeout"
+    assert classify_error(ValueError("bad request")) == (None, None)
+
+
+def test_retries_transient_errors_honoring_retry_after():
+    attempts = []
+
+    async def flaky():
+        attempts.append(time.perf_counter())
+        if len(attempts) < 3:
+            raise RateLimitError("0.05")
+        return "ok"
+
+    policy = RetryPolicy(max_attempts=3, base_delay=0.001, max_delay=0.001)
+    assert asyncio.run(call_with_retry(flaky, policy)) == "ok"
+    assert len(attempts) == 3
+    assert attempts[1] - attempts[0] >= 0.05
+
+
+def test_permanent_errors_and_deadlines_are_not_retried():
+    calls = 0
+
+    async def broken():
+        nonlocal calls
+        calls += 1
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        asyncio.run(call_with_retry(broken, RetryPolicy(max_attempts=5)))
+    assert calls == 1
+
+    async def slow():
+        await asyncio.sleep(1)
+
+    policy = RetryPolicy(max_attempts=10, base_delay=0.01, deadline=0.05)
+    start = time.perf_counter()
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(call_with_retry(slow, policy))
+    assert time.perf_counter() - start < 0.5
+
+
+def test_hedge_fires_after_p95_and_takes_first_answer():
+    tracker = LatencyTracker()
+    for _ in range(20):
+        tracker.record(0.01)
+    delays = iter([1.0, 0.01])
+    started = []
+
+    async def call():
+        delay = next(delays)
+        started.append(delay)
+        await asyncio.sleep(delay)
+        return delay
+
+    start = time.perf_counter()
+    result = asyncio.run(hedged(call, tracker, min_samples=20))
+    assert result == 0.01
+    assert started == [1.0, 0.01]
+    assert time.perf_counter() - start < 0.5
+
+
+def test_stream_iteration_honors_attempt_timeout_and_deadline():
+    async def chunks(pause):
+        for i in range(3):
+            await asyncio.sleep(pause)
+            yield i
+
+    async def collect(pause, policy):
+        return [
+            i
+            async for i in iterate_with_deadline(
+                chunks(pause), policy, time.monotonic()
+            )
+        ]
+
+    assert asyncio.run(collect(0.01, RetryPolicy(attempt_timeout=0.1))) == [0, 1, 2]
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(collect(0.1, RetryPolicy(attempt_timeout=0.02)))
+    # Each chunk is quick, but together they overrun the deadline
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(collect(0.03, RetryPolicy(attempt_timeout=0.1, deadline=0.05)))
@@ -0,0 +1,98 @@
+import asyncio
+import json
+import time
+
+import httpx
+
+from app.api.main import app, run_research_job
+from app.core.jobs import JobManager
+from app.core.result_store import GraphResultStore
+from app.services.search.search_manager import SearchManager
+from benchmarks.fakes import FakeChatClient, FakeSearchClient
+
+CONFIG = {"min_nodes": 3, "max_nodes": 5, "model": "gpt-4o-mini"}
+
+
+def test_store_freshness_and_replacement(tmp_path):
+    store = GraphResultStore(str(tmp_path / "results.sqlite3"), fresh_for=60)
+    store.put("Stoicism", CONFIG, {"concept": "Stoicism", "nodes": [1]})
+
+    hit = store.get("  stoicism", CONFIG)
+    assert hit is not None and not hit.stale
+    assert hit.to_dict()["nodes"] == [1]
+    assert store.get("stoicism", {**CONFIG, "max_nodes": 8}) is None
+
+    store.put("stoicism", CONFIG, {"concept": "stoicism", "nodes": [1, 2]})
+    assert store.get("Stoicism", CONFIG).to_dict()["nodes"] == [1, 2]
+    assert len(store) == 1
+
+    store.fresh_for = 0
+    time.sleep(0.01)
+    assert store.get("stoicism", CONFIG).stale
+    store.max_age = 0
+    assert store.get("stoicism", CONFIG) is None
+    assert store.stats() == {"entries": 1, "hits": 2, "stale_hits": 1, "misses": 2}
+
+
+def test_repeated_concept_served_from_store(tmp_path):
+    async def main():
+        chat = FakeChatClient(sufficient_after=3)
+        app.state.search_manager = SearchManager(
+            FakeSearchClient("google"), FakeSearchClient("wikipedia")
+        )
+        app.state.llm_cache = None
+        app.state.search_cache = None
+        app.state.chat_client_factory = lambda: chat
+        app.state.job_manager = JobManager(run_research_job)
+        app.state.result_store = store = GraphResultStore(
+            str(tmp_path / "results.sqlite3")
+        )
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://t"
+        ) as client:
+            first = await client.post(
+                "/research", json={"concept": "stoicism", "stream": False}
+            )
+            calls = chat.stats.total_calls
+
+            second = await client.post(
+                "/research", json={"concept": "Stoicism", "stream": False}
+            )
+            assert chat.stats.total_calls == calls
+            assert second.headers["x-result-stale"] == "false"
+            assert second.json() == first.json()
+
+            streamed = (
+                await client.post(
+                    "/research", json={"concept": "stoicism", "delta": True}
+                )
+            ).json()
+            assert streamed["cached"]
+            body = (await client.get(streamed["events_url"])).text
+            events = [
+                json.loads(line[len("data: ") :])
+                for line in body.splitlines()
+                if line.startswith("data: ")
+            ]
+            assert [event["type"] for event in events] == ["complete", "done"]
+            assert events[0]["graph"] == first.json()
+
+            # A stale hit is served immediately and refreshed in the background
+            store.fresh_for = 0
+            stale = await client.post(
+                "/research", json={"concept": "stoicism", "stream": False}
+            )
+            assert stale.headers["x-result-stale"] == "true"
+            # A stale hit in the other event format shares the same refresh
+            await client.post(
+                "/research",
+                json={"concept": "stoicism", "stream": False, "delta": True},
+            )
+            assert len(app.state.job_manager._in_flight) == 1
+            refresh = next(iter(app.state.job_manager._in_flight.values()))
+            await refresh.wait()
+            assert chat.stats.total_calls > calls
+
+    asyncio.run(main())
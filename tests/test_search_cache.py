@@ -0,0 +1,87 @@
+import asyncio
+import time
+from datetime import datetime
+from app.models.base import Source
+from app.services.search.cache import SearchCache, CachedSearchClient
+from app.utils.cache import MemoryCacheBackend, SQLiteCacheBackend, TieredCache
+
+
+class CountingSearchClient:
+    def __init__(self):
+        self.calls = 0
+
+    async def search(self, query, num_results=5):
+        self.calls += 1
+        return [
+            Source(
+                url=f"https://example.com/{i}",
+                title=f"Result {i}",
+                snippet=f"About {query}",
+                source_type="google",
+                retrieved_at=datetime(2024, 1, 2, 3, 4, 5, 678901),
+            )
+            for i in range(num_results)
+        ]
+
+
+def test_cached_client_round_trips_sources(tmp_path):
+    cache = SearchCache(
+        TieredCache(
+            [
+                MemoryCacheBackend(max_entries=8),
+                SQLiteCacheBackend(str(tmp_path / "search.sqlite3")),
+            ]
+        ),
+        ttls={"google": 60},
+    )
+    inner = CountingSearchClient()
+    client = CachedSearchClient(inner, cache, provider="google")
+
+    first = asyncio.run(client.search("History of  Democracy", 2))
+    second = asyncio.run(client.search("history of democracy ", 2))
+
+    assert inner.calls == 1
+    assert second == first
+    assert second[0].retrieved_at == datetime(2024, 1, 2, 3, 4, 5, 678901)
+    assert cache.backend.stats.hits == 1
+
+    # A different result count is a different key
+    asyncio.run(client.search("history of democracy", 3))
+    assert inner.calls == 2
+
+
+def test_disk_tier_survives_memory_eviction(tmp_path):
+    path = str(tmp_path / "search.sqlite3")
+    cache = SearchCache(
+        TieredCache([MemoryCacheBackend(max_entries=1), SQLiteCacheBackend(path)])
+    )
+    inner = CountingSearchClient()
+    client = CachedSearchClient(inner, cache, provider="wikipedia")
+
+    asyncio.run(client.search("stoicism", 1))
+    asyncio.run(client.search("nihilism", 1))
+    asyncio.run(client.search("stoicism", 1))
+
+    assert inner.calls == 2
+    assert cache.backend.tiers[0].stats.evictions >= 1
+    assert cache.backend.tiers[1].stats.hits == 1
+
+
+def test_entries_expire_and_lru_evicts(tmp_path):
+    memory = MemoryCacheBackend(max_entries=2)
+    memory.set("a", "1", ttl=0.01)
+    time.sleep(0.02)
+    assert memory.get("a") is None
+    assert memory.stats.expirations == 1
+
+    disk = SQLiteCacheBackend(str(tmp_path / "lru.sqlite3"), max_entries=2)
+    disk.set("a", "1")
+    time.sleep(0.01)
+    disk.set("b", "2")
+    time.sleep(0.01)
+    disk.get("a")
+    time.sleep(0.01)
+    disk.set("c", "3")
+    assert disk.get("b") is None
+    assert disk.get("a") == "1"
+    assert len(disk) == 2
@@ -0,0 +1,124 @@
+import asyncio
+import time
+
+import pytest
+
+from app.config.settings import settings
+from app.services.search.search_manager import SearchManager, default_provider_deadline
+from app.utils.resilience import RetryPolicy, TransientHTTPError, call_with_retry
+from benchmarks.fakes import FakeSearchClient, LatencyModel
+
+
+class FlakyClient(FakeSearchClient):
+    """Fails while `failing` is set"""
+
+    def __init__(self, source_type):
+        super().__init__(source_type)
+        self.failing = True
+        self.requested = []
+
+    async def search(self, query, num_results=5):
+        self.requested.append(num_results)
+        if self.failing:
+            raise ConnectionError("down")
+        return await super().search(query, num_results)
+
+
+def make_manager(google, wiki, **kwargs):
+    manager = SearchManager(google_client=google, wiki_client=wiki, **kwargs)
+    for provider in manager.providers.values():
+        provider.deadline = 0.2
+    manager.min_samples = 3
+    return manager
+
+
+def test_slow_and_failing_providers_give_partial_results():
+    slow = FakeSearchClient("google", latency=LatencyModel("constant", 5))
+    manager = make_manager(slow, FakeSearchClient("wikipedia"))
+
+    start = time.perf_counter()
+    results = asyncio.run(manager.search("stoicism"))
+    assert time.perf_counter() - start < 1
+    assert [source.source_type for source in results] == ["wikipedia"] * 3
+    assert results.report["google"]["status"] == "timeout"
+    assert results.report["wikipedia"]["status"] == "ok"
+
+    failing = make_manager(FlakyClient("google"), FlakyClient("wikipedia"))
+    with pytest.raises(RuntimeError, match="All search providers failed"):
+        asyncio.run(failing.search("stoicism"))
+
+
+def test_quorum_cancels_stragglers():
+    slow = FakeSearchClient("wikipedia", latency=LatencyModel("constant", 0.15))
+    manager = make_manager(FakeSearchClient("google"), slow, quorum=1, quorum_grace=0)
+    results = asyncio.run(manager.search("stoicism"))
+    assert len(results) == 5
+    assert results.report["wikipedia"]["status"] == "cancelled"
+    assert manager.provider_stats()["wikipedia"]["totals"] == {"cancelled": 1}
+
+
+def test_unhealthy_provider_is_skipped_then_probed():
+    flaky = FlakyClient("google")
+    manager = make_manager(flaky, FakeSearchClient("wikipedia"))
+
+    async def run(times):
+        return [await manager.search("stoicism") for _ in range(times)]
+
+    reports = [results.report["google"] for results in asyncio.run(run(5))]
+    assert [report["decision"] for report in reports] == [
+        "normal",
+        "normal",
+        "normal",
+        "probe",
+        "skipped",
+    ]
+    assert reports[-1]["status"] == "skipped" and len(flaky.requested) == 4
+
+    # A successful probe restores the provider
+    manager.stats["google"].next_probe = 0
+    flaky.failing = False
+    reports = [results.report["google"] for results in asyncio.run(run(2))]
+    assert [report["decision"] for report in reports] == ["probe", "normal"]
+
+
+def test_slow_provider_is_asked_for_fewer_results():
+    slowish = FakeSearchClient("google", latency=LatencyModel("constant", 0.12))
+    manager = make_manager(slowish, FakeSearchClient("wikipedia"))
+
+    async def run():
+        return [await manager.search("stoicism") for _ in range(4)]
+
+    last = asyncio.run(run())[-1].report["google"]
+    assert last["decision"] == "reduced"
+    assert (last["requested"], last["results"]) == (5, 2)
+
+
+def test_provider_deadline_leaves_room_for_client_retries(monkeypatch):
+    monkeypatch.setattr(settings, "SEARCH_CALL_DEADLINE", 0.3)
+    monkeypatch.setattr(settings, "SEARCH_PROVIDER_DEADLINE", 0.1)
+    assert default_provider_deadline() > settings.SEARCH_CALL_DEADLINE
+
+    class RetryingClient(FakeSearchClient):
+        """Fails its first attempt, then succeeds after a backoff"""
+
+        async def search(self, query, num_results=5):
+            policy = RetryPolicy(
+                max_attempts=2,
+                base_delay=0.15,
+                max_delay=0.15,
+                deadline=settings.SEARCH_CALL_DEADLINE,
+            )
+            attempts = []
+
+            async def attempt():
+                attempts.append(1)
+                if len(attempts) == 1:
+                    await asyncio.sleep(0.1)
+                    raise TransientHTTPError(503, "down")
+                return await FakeSearchClient.search(self, query, num_results)
+
+            return await call_with_retry(attempt, policy)
+
+    manager = SearchManager(RetryingClient("google"), FakeSearchClient("wikipedia"))
+    results = asyncio.run(manager.search("stoicism"))
+    assert results.report["google"]["status"] == "ok"
@@ -0,0 +1,66 @@
+import json
+from datetime import datetime
+
+from app.core.graph_stream import GraphEventStream, apply_event
+from app.models.base import IdeaGraph, Node, Source
+from app.utils import serialization
+from app.utils.serialization import RawJSON, dumps, encode_event, snapshot
+
+
+def make_graph():
+    graph = IdeaGraph(concept="democracy")
+    graph.add_node(
+        Node(
+            id="a",
+            time_period="5th century BCE",
+            year=-450,
+            region="Athens",
+            key_contributors=["Cleisthenes"],
+            main_idea_summary="Rule by the citizens",
+            sources=[
+                Source(
+                    url="https://example.com",
+                    title="Example",
+                    snippet="text",
+                    source_type="google",
+                    retrieved_at=datetime(2024, 1, 2, 3, 4, 5),
+                )
+            ],
+        )
+    )
+    return graph
+
+
+def test_event_with_snapshot_matches_plain_encoding():
+    graph = make_graph()
+    event = {"type": "graph_updated", "data": {"nodes": 1}, "graph": snapshot(graph)}
+    encoded = encode_event(event)
+
+    assert b"\n" not in encoded and b'": ' not in encoded
+    assert json.loads(encoded) == {
+        "type": "graph_updated",
+        "data": {"nodes": 1},
+        "graph": graph.model_dump(mode="json"),
+    }
+    # The snapshot is frozen when taken
+    graph.metadata["later"] = True
+    assert "later" not in json.loads(encoded)["graph"]["metadata"]
+
+
+def test_fallback_backend_without_orjson(monkeypatch):
+    monkeypatch.setattr(serialization, "orjson", None)
+    event = {"at": datetime(2024, 1, 2), "raw": RawJSON(b"[1,2]"), "n": 1}
+    assert json.loads(encode_event(event)) == {
+        "at": "2024-01-02T00:00:00",
+        "raw": [1, 2],
+        "n": 1,
+    }
+    assert serialization.loads(dumps({"a": [1]})) == {"a": [1]}
+
+
+def test_reducer_accepts_encoded_snapshots():
+    graph = make_graph()
+    stream = GraphEventStream(graph)
+    state, seq = apply_event(None, 0, stream.next_event("start", {}))
+    assert seq == 1
+    assert state == graph.model_dump(mode="json")
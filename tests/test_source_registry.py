@@ -0,0 +1,154 @@
+import asyncio
+
+import pytest
+
+from app.core.agent import IdeaHistoryAgent
+from app.core.source_registry import (
+    SourceRegistry,
+    canonicalize_url,
+    hamming_distance,
+    simhash,
+)
+from app.models.base import Source
+from app.services.search.search_manager import SearchManager
+from benchmarks.fakes import FakeChatClient, FakeSearchClient
+
+SNIPPET = (
+    "Stoicism is a school of Hellenistic philosophy founded by Zeno of Citium "
+    "in Athens in the early 3rd century BC, teaching virtue as the only good"
+)
+
+
+def make_source(url, snippet=SNIPPET):
+    return Source(url=url, title="Stoicism", snippet=snippet, source_type="google")
+
+
+def test_canonicalize_wikipedia_variants():
+    expected = "https://en.wikipedia.org/wiki/Stoicism_(philosophy)"
+    for url in (
+        "http://en.m.wikipedia.org/wiki/Stoicism_(philosophy)#History",
+        "https://en.wikipedia.org/wiki/Stoicism%20(philosophy)",
+        "https://en.wikipedia.org/w/index.php?title=Stoicism_(philosophy)",
+    ):
+        assert canonicalize_url(url) == expected
+
+
+def test_canonicalize_drops_tracking_and_sorts_query():
+    assert (
+        canonicalize_url("HTTP://WWW.Example.com/a/?b=2&utm_source=x&a=1&gclid=z#top")
+        == "https://example.com/a?a=1&b=2"
+    )
+    assert canonicalize_url("https://example.com:8443/") == "https://example.com:8443/"
+
+
+def test_simhash_is_close_for_near_duplicates():
+    near = SNIPPET.replace("early", "very early")
+    other = "The printing press spread rapidly across Europe after Gutenberg"
+    assert hamming_distance(simhash(SNIPPET), simhash(near)) < hamming_distance(
+        simhash(SNIPPET), simhash(other)
+    )
+
+
+def test_registry_drops_seen_urls_and_near_duplicates():
+    registry = SourceRegistry(max_distance=12)
+    first = registry.filter([make_source("https://en.wikipedia.org/wiki/Stoicism")])
+    assert len(first) == 1
+
+    again = registry.filter(
+        [
+            make_source("https://en.m.wikipedia.org/wiki/Stoicism"),
+            make_source("https://mirror.example.org/stoicism", SNIPPET + " (mirror)"),
+            make_source("https://example.com/press", "Gutenberg " * 10),
+        ]
+    )
+    assert [source.url for source in again] == ["https://example.com/press"]
+    assert registry.stats() == {
+        "accepted": 2,
+        "dropped_url": 1,
+        "dropped_near_duplicate": 1,
+    }
+
+
+def test_registry_can_be_seeded_from_earlier_runs():
+    registry = SourceRegistry(seen=[make_source("https://example.com/a")])
+    assert registry.filter([make_source("https://example.com/a/")]) == []
+
+
+def test_agent_skips_repeated_search_results():
+    # Every query returns the same results, so later rounds add nothing new
+    search = FakeSearchClient("google")
+    search_manager = SearchManager(google_client=search, wiki_client=search)
+
+    async def same_results(query, num_results=5):
+        return [
+            make_source(
+                f"https://example.com/{i}", " ".join(f"t{i}w{j}" for j in range(12))
+            )
+            for i in range(3)
+        ]
+
+    search.search = same_results
+    agent = IdeaHistoryAgent(
+        chat_client=FakeChatClient(sufficient_after=10),
+        search_manager=search_manager,
+        min_nodes=50,
+        max_nodes=60,
+    )
+    graph = asyncio.run(agent.research_concept("stoicism"))
+
+    assert len(agent.collected_sources) == 3
+    assert graph.metadata["source_dedup"]["dropped_url"] >= 3
+
+
+@pytest.mark.parametrize("pipelined", [False, True])
+def test_agent_keeps_going_after_an_all_duplicate_round(pipelined):
+    # The second query's results were all seen in the first; later ones are new
+    search = FakeSearchClient("google")
+    search_manager = SearchManager(google_client=search, wiki_client=search)
+    queries = []
+
+    async def results(query, num_results=5):
+        if query not in queries:
+            queries.append(query)
+        batch = 0 if len(queries) <= 2 else len(queries)
+        return [
+            make_source(
+                f"https://example.com/{batch}/{i}",
+                " ".join(f"b{batch}t{i}w{j}" for j in range(12)),
+            )
+            for i in range(3)
+        ]
+
+    search.search = results
+    agent = IdeaHistoryAgent(
+        chat_client=FakeChatClient(sufficient_after=6),
+        search_manager=search_manager,
+        min_nodes=6,
+        pipelined=pipelined,
+    )
+    asyncio.run(agent.research_concept("stoicism"))
+
+    assert len(queries) > 2
+    assert len(agent.collected_sources) > 3
+    assert agent.duplicate_rounds == 0
+
+
+def test_agent_caps_consecutive_duplicate_rounds():
+    search = FakeSearchClient("google")
+    search_manager = SearchManager(google_client=search, wiki_client=search)
+
+    async def same_results(query, num_results=5):
+        return [make_source("https://example.com/0", "one two three four")]
+
+    search.search = same_results
+    agent = IdeaHistoryAgent(
+        chat_client=FakeChatClient(sufficient_after=10),
+        search_manager=search_manager,
+        min_nodes=1,
+        max_duplicate_rounds=2,
+    )
+    asyncio.run(agent.research_concept("stoicism"))
+
+    # Past min_nodes, the run stops after two rounds of nothing new
+    assert agent.duplicate_rounds == 2
+    assert agent.round == 2
@@ -0,0 +1,136 @@
+import asyncio
+import json
+
+from app.core.agent import IdeaHistoryAgent
+from app.models.base import Source
+from app.models.responses import FunctionCall, TokenUsageDetails
+from app.services.llm.base import BaseChatClient
+from app.services.llm.cache import CachedChatClient, LLMCache
+from app.services.llm.streaming import JSONObjectScanner, ToolCallAssembler
+from app.utils.cache import MemoryCacheBackend
+from app.services.search.search_manager import SearchManager
+from benchmarks.fakes import FakeChatClient, FakeSearchClient
+
+
+def test_scanner_joins_fragments():
+    scanner = JSONObjectScanner()
+    assert scanner.feed('{"title": "Sto') == []
+    assert scanner.feed('icism", "year": -300') == []
+    assert scanner.feed("}") == ['{"title": "Stoicism", "year": -300}']
+    assert scanner.pending == ""
+
+
+def test_scanner_ignores_braces_in_strings():
+    scanner = JSONObjectScanner()
+    text = '{"description": "uses {braces} and \\"quotes}\\"", "tags": [{"a": 1}]}'
+    assert scanner.feed(text[:20]) == []
+    assert [json.loads(obj) for obj in scanner.feed(text[20:])] == [json.loads(text)]
+
+
+def test_scanner_splits_concatenated_objects():
+    scanner = JSONObjectScanner()
+    assert scanner.feed('{"a": 1}\n{"b"') == ['{"a": 1}']
+    assert scanner.feed(": 2}") == ['{"b": 2}']
+
+
+def test_assembler_tracks_calls_by_index():
+    assembler = ToolCallAssembler()
+    assert assembler.feed(0, name="create_node", arguments='{"title": ') == []
+    assert assembler.feed(1, name="create_node") == []
+    assert assembler.feed(0, arguments='"A"}') == [
+        FunctionCall(name="create_node", arguments='{"title": "A"}')
+    ]
+    assert assembler.feed(1, arguments='{"title": "B"') == []
+
+    # Call 1 was cut off; call 0 already emitted everything it had
+    assert assembler.finish() == [
+        FunctionCall(name="create_node", arguments='{"title": "B"')
+    ]
+
+
+def test_assembler_finish_without_arguments():
+    assembler = ToolCallAssembler()
+    assembler.feed(3, name="judge_information")
+    assert assembler.finish(3) == [
+        FunctionCall(name="judge_information", arguments="{}")
+    ]
+    assert assembler.finish(3) == []
+
+
+class StreamingChatClient(BaseChatClient):
+    """Yields two calls with a pause between them"""
+
+    def __init__(self):
+        self.model = "stream-model"
+        self.streams = 0
+
+    async def chat_completion(self, messages, functions=None, function_call=None):
+        raise AssertionError("streaming path expected")
+
+    async def stream_function_calls(
+        self, messages, functions=None, function_call=None, on_usage=None, **kwargs
+    ):
+        self.streams += 1
+        yield FunctionCall(name="create_node", arguments='{"title": "A"}')
+        await asyncio.sleep(0)
+        yield FunctionCall(name="create_node", arguments='{"title": "B"}')
+        on_usage(TokenUsageDetails(10, 4, 14))
+
+
+def test_cached_client_replays_streamed_calls():
+    inner = StreamingChatClient()
+    client = CachedChatClient(inner, LLMCache(MemoryCacheBackend()))
+    messages = [{"role": "user", "content": "nodes please"}]
+
+    async def collect():
+        usages = []
+        calls = [
+            call
+            async for call in client.stream_function_calls(
+                messages, on_usage=usages.append
+            )
+        ]
+        return calls, usages
+
+    first, first_usage = asyncio.run(collect())
+    second, second_usage = asyncio.run(collect())
+
+    assert inner.streams == 1
+    assert first == second
+    assert [call.arguments for call in first] == ['{"title": "A"}', '{"title": "B"}']
+    assert first_usage == [TokenUsageDetails(10, 4, 14)]
+    # A replay spends no tokens, so reports none
+    assert second_usage == []
+
+    # The non-streaming path reads the same entry
+    completion = asyncio.run(client.chat_completion(messages))
+    assert completion.choices[0].message.tool_calls == first
+
+
+def test_agent_emits_update_per_streamed_node():
+    events = []
+    agent = IdeaHistoryAgent(
+        chat_client=FakeChatClient(nodes_per_call=3),
+        search_manager=SearchManager(
+            google_client=FakeSearchClient("google"),
+            wiki_client=FakeSearchClient("wikipedia"),
+        ),
+        on_update=events.append,
+        stream_tool_calls=True,
+    )
+    sources = [
+        Source(
+            url="https://example.com",
+            title="Example",
+            snippet="text",
+            source_type="google",
+        )
+    ]
+
+    asyncio.run(agent._extract_nodes(sources))
+
+    updates = [event for event in events if event["type"] == "graph_updated"]
+    assert len(agent.graph.nodes) == 3
+    assert [update["data"]["nodes"] for update in updates] == [1, 2, 3]
+    assert agent.llm_usage["nodes"]["calls"] == 1
+    assert agent.llm_usage["nodes"]["prompt_tokens"] > 0
@@ -0,0 +1,71 @@
+from app.core.summary import GraphSummarizer
+from app.models.base import Edge, IdeaGraph, Node
+from app.services.llm.prompts import SUMMARY_TEMPLATE
+
+
+def make_graph():
+    graph = IdeaGraph(concept="democracy")
+    for i, year in enumerate([-500, 1689, 1776, 1789, 1848]):
+        graph.add_node(
+            Node(
+                id=f"n{i}",
+                time_period=str(year),
+                year=year,
+                region="Europe",
+                key_contributors=["Someone", "Someone else"],
+                main_idea_summary=" ".join(["word"] * 40),
+            )
+        )
+    graph.add_edge(
+        Edge(source_node_id="n1", target_node_id="n2", change_description="x")
+    )
+    graph.add_edge(
+        Edge(source_node_id="n2", target_node_id="n3", change_description="y")
+    )
+    return graph
+
+
+def reference_summary(graph):
+    nodes_info = [
+        f"Node ID: {n.id}\nTime: {n.time_period}\nRegion: {n.region}\n"
+        f"Key figures: {', '.join(n.key_contributors)}\nSummary: {n.main_idea_summary}\n"
+        for n in graph.nodes
+    ]
+    edges_info = [
+        f"From: {e.source_node_id}\nTo: {e.target_node_id}\nEvolution: {e.change_description}\n"
+        for e in graph.edges
+    ]
+    return SUMMARY_TEMPLATE.format(
+        concept=graph.concept,
+        node_info="\n" + "-" * 50 + "\n".join(nodes_info),
+        edge_info="\n".join(edges_info),
+    )
+
+
+def test_unbudgeted_summary_matches_full_rendering_and_tracks_merges():
+    graph = make_graph()
+    summarizer = GraphSummarizer(graph)
+    assert summarizer.render() == reference_summary(graph)
+    assert summarizer.render() is summarizer.render()
+
+    merged = graph.get_node("n2").model_copy(
+        update={"id": "m", "main_idea_summary": "merged"}
+    )
+    graph.merge_nodes(["n2", "n3"], merged)
+    assert summarizer.render() == reference_summary(graph)
+    assert "n3" not in summarizer._node_fragments
+
+
+def test_budget_condenses_low_degree_and_older_nodes_first():
+    graph = make_graph()
+    full = GraphSummarizer(graph)
+    full.render()
+
+    budgeted = GraphSummarizer(graph, token_budget=full.last_token_estimate - 60)
+    summary = budgeted.render()
+    assert budgeted.last_token_estimate <= budgeted.token_budget
+    assert 0 < budgeted.condensed_nodes < len(graph.nodes)
+    # n0 has no edges and is the oldest, so it is condensed first
+    assert "Node ID: n0 | -500 | Europe |" in summary
+    # n2 has the most connections, so it keeps its full description
+    assert "Node ID: n2\nTime: 1776" in summary
@@ -0,0 +1,149 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+from openai.types.chat import ChatCompletion as OpenAIChatCompletion
+
+from app.core.agent import IdeaHistoryAgent
+from app.models.base import Source
+from app.models.responses import ChatCompletion, FunctionCall
+from app.services.llm.claude_client import ClaudeChatClient
+from app.services.llm.openai_client import OpenAIChatClient
+from app.services.search.search_manager import SearchManager
+from benchmarks.fakes import FakeChatClient, FakeSearchClient
+
+
+def make_openai_response():
+    return OpenAIChatCompletion.model_validate(
+        {
+            "id": "chatcmpl-1",
+            "object": "chat.completion",
+            "created": 1700000000,
+            "model": "gpt-4o-mini",
+            "choices": [
+                {
+                    "index": 0,
+                    "finish_reason": "tool_calls",
+                    "message": {
+                        "role": "assistant",
+                        "content": None,
+                        "tool_calls": [
+                            {
+                                "id": f"call_{i}",
+                                "type": "function",
+                                "function": {
+                                    "name": "create_node",
+                                    "arguments": json.dumps({"title": title}),
+                                },
+                            }
+                            for i, title in enumerate(["A", "B"])
+                        ],
+                    },
+                }
+            ],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 8, "total_tokens": 18},
+        }
+    )
+
+
+def test_openai_response_keeps_every_tool_call():
+    completion = ChatCompletion.from_openai_response(make_openai_response())
+    message = completion.choices[0].message
+
+    assert [json.loads(call.arguments)["title"] for call in message.tool_calls] == [
+        "A",
+        "B",
+    ]
+    assert message.function_call == message.tool_calls[0]
+    assert ChatCompletion.from_dict(completion.to_dict()) == completion
+
+
+def test_legacy_cache_entries_still_load():
+    data = {
+        "id": "x",
+        "created": 0,
+        "model": "m",
+        "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+        "choices": [
+            {
+                "finish_reason": "function_call",
+                "index": 0,
+                "message": {
+                    "role": "assistant",
+                    "content": None,
+                    "function_call": {"name": "f", "arguments": "{}"},
+                },
+            }
+        ],
+    }
+    message = ChatCompletion.from_dict(data).choices[0].message
+    assert message.tool_calls == [FunctionCall(name="f", arguments="{}")]
+
+
+def test_claude_response_keeps_every_tool_use_block():
+    response = SimpleNamespace(
+        id="msg_1",
+        role="assistant",
+        model="claude",
+        stop_reason="tool_use",
+        usage=SimpleNamespace(input_tokens=10, output_tokens=8),
+        content=[
+            SimpleNamespace(type="text", text="Adding two nodes."),
+            SimpleNamespace(type="tool_use", name="create_node", input={"title": "A"}),
+            SimpleNamespace(type="tool_use", name="create_node", input={"title": "B"}),
+        ],
+    )
+    completion = ClaudeChatClient()._convert_claude_response_to_openai(response)
+    message = completion.choices[0].message
+
+    assert [json.loads(call.arguments)["title"] for call in message.tool_calls] == [
+        "A",
+        "B",
+    ]
+    assert message.content == "Adding two nodes."
+
+
+def test_openai_request_uses_parallel_tools():
+    client = OpenAIChatClient()
+    functions = [{"name": "create_node", "parameters": {}}]
+
+    auto = client._build_request([], functions, "auto")
+    assert auto["tools"] == [{"type": "function", "function": functions[0]}]
+    assert auto["tool_choice"] == "auto"
+    assert auto["parallel_tool_calls"] is True
+
+    forced = client._build_request([], functions, {"name": "create_node"})
+    assert forced["tool_choice"] == {
+        "type": "function",
+        "function": {"name": "create_node"},
+    }
+    assert "parallel_tool_calls" not in forced
+
+    assert "tools" not in client._build_request([], None, None)
+
+    reasoning = OpenAIChatClient(model="o3-mini")._build_request([], functions, "auto")
+    assert "parallel_tool_calls" not in reasoning
+
+
+def test_agent_adds_every_node_from_one_response():
+    chat = FakeChatClient(nodes_per_call=3)
+    agent = IdeaHistoryAgent(
+        chat_client=chat,
+        search_manager=SearchManager(
+            google_client=FakeSearchClient("google"),
+            wiki_client=FakeSearchClient("wikipedia"),
+        ),
+    )
+    sources = [
+        Source(
+            url="https://example.com",
+            title="Example",
+            snippet="text",
+            source_type="google",
+        )
+    ]
+
+    asyncio.run(agent._extract_nodes(sources))
+
+    assert len(agent.graph.nodes) == 3
+    assert chat.stats.calls["create_node"] == 1
@@ -0,0 +1,85 @@
+import asyncio
+from aiohttp import web
+from app.services.search.wiki_client import WikipediaClient
+
+SEARCH_RESPONSE = {
+    "query": {
+        "search": [
+            {"title": "Democracy (disambiguation)"},
+            {"title": "Athenian democracy"},
+            {"title": "Liberal Democracy"},
+            {"title": "Direct democracy"},
+        ]
+    }
+}
+
+PAGES_RESPONSE = {
+    "query": {
+        "redirects": [{"from": "Liberal Democracy", "to": "Liberal democracy"}],
+        "pages": [
+            {
+                "title": "Democracy (disambiguation)",
+                "fullurl": "https://en.wikipedia.org/wiki/Democracy_(disambiguation)",
+                "extract": "Democracy may refer to:",
+                "pageprops": {"disambiguation": ""},
+            },
+            {
+                "title": "Athenian democracy",
+                "fullurl": "https://en.wikipedia.org/wiki/Athenian_democracy",
+                "extract": "Athenian democracy developed around the 6th century BC.\nMore text.",
+            },
+            {
+                "title": "Liberal democracy",
+                "fullurl": "https://en.wikipedia.org/wiki/Liberal_democracy",
+                "extract": "Liberal democracy is a form of government.",
+            },
+            {
+                "title": "Direct democracy",
+                "fullurl": "https://en.wikipedia.org/wiki/Direct_democracy",
+                "extract": "Direct democracy is a form of democracy.",
+            },
+        ],
+    }
+}
+
+
+async def run_search(num_results):
+    requests = []
+
+    async def handle(request: web.Request):
+        requests.append(dict(request.query))
+        if request.query.get("list") == "search":
+            return web.json_response(SEARCH_RESPONSE)
+        return web.json_response(PAGES_RESPONSE)
+
+    app = web.Application()
+    app.router.add_get("/w/api.php", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    client = WikipediaClient(api_url=f"http://127.0.0.1:{port}/w/api.php")
+    try:
+        sources = await client.search("democracy", num_results)
+    finally:
+        await client.close()
+        await runner.cleanup()
+    return sources, requests
+
+
+def test_search_uses_two_round_trips_and_skips_disambiguation():
+    sources, requests = asyncio.run(run_search(2))
+
+    assert len(requests) == 2
+    assert requests[1]["titles"].split("|")[1] == "Athenian democracy"
+    assert [source.title for source in sources] == [
+        "Athenian democracy",
+        "Liberal democracy",
+    ]
+    assert (
+        sources[0].snippet == "Athenian democracy developed around the 6th century BC."
+    )
+    assert sources[1].url == "https://en.wikipedia.org/wiki/Liberal_democracy"
+    assert all(source.source_type == "wikipedia" for source in sources)